@@ -281,11 +281,15 @@ static int search_in_struct_unions(const struct _cffi_type_context_s *ctx,
     typedef unsigned char _Bool;
 #  endif
 # endif
+# define _cffi_float_complex_t   _Fcomplex    /* include <complex.h> for it */
+# define _cffi_double_complex_t  _Dcomplex    /* include <complex.h> for it */
 #else
 # include <stdint.h>
 # if (defined (__SVR4) && defined (__sun)) || defined(_AIX) || defined(__hpux)
 #  include <alloca.h>
 # endif
+# define _cffi_float_complex_t   float _Complex
+# define _cffi_double_complex_t  double _Complex
 #endif
 
 #ifdef __GNUC__
@@ -566,33 +570,46 @@ static void (*_cffi_call_python_org)(struct _cffi_externpy_s *, char *);
 
 /************************************************************/
 
-int run_bvn(int* flows, int* subsets, int nrevs, int npaps, int one_);
+int run_bvn_batch(int* paps, int* revs, int* flows, int nnz, int* subsets, int npaps, int nrevs, int one_, int nsamples, unsigned int* seeds, int* samples);
 
 /************************************************************/
 
 static void *_cffi_types[] = {
-/*  0 */ _CFFI_OP(_CFFI_OP_FUNCTION, 3), // int()(int *, int *, int, int, int)
-/*  1 */ _CFFI_OP(_CFFI_OP_POINTER, 3), // int *
+/*  0 */ _CFFI_OP(_CFFI_OP_FUNCTION, 4), // int()(int *, int *, int *, int, int *, int, int, int, int, unsigned int *, int *)
+/*  1 */ _CFFI_OP(_CFFI_OP_POINTER, 4), // int *
 /*  2 */ _CFFI_OP(_CFFI_OP_NOOP, 1),
-/*  3 */ _CFFI_OP(_CFFI_OP_PRIMITIVE, 7), // int
-/*  4 */ _CFFI_OP(_CFFI_OP_PRIMITIVE, 7),
-/*  5 */ _CFFI_OP(_CFFI_OP_PRIMITIVE, 7),
-/*  6 */ _CFFI_OP(_CFFI_OP_FUNCTION_END, 0),
+/*  3 */ _CFFI_OP(_CFFI_OP_NOOP, 1),
+/*  4 */ _CFFI_OP(_CFFI_OP_PRIMITIVE, 7), // int
+/*  5 */ _CFFI_OP(_CFFI_OP_NOOP, 1),
+/*  6 */ _CFFI_OP(_CFFI_OP_PRIMITIVE, 7),
+/*  7 */ _CFFI_OP(_CFFI_OP_PRIMITIVE, 7),
+/*  8 */ _CFFI_OP(_CFFI_OP_PRIMITIVE, 7),
+/*  9 */ _CFFI_OP(_CFFI_OP_PRIMITIVE, 7),
+/* 10 */ _CFFI_OP(_CFFI_OP_POINTER, 13), // unsigned int *
+/* 11 */ _CFFI_OP(_CFFI_OP_NOOP, 1),
+/* 12 */ _CFFI_OP(_CFFI_OP_FUNCTION_END, 0),
+/* 13 */ _CFFI_OP(_CFFI_OP_PRIMITIVE, 8), // unsigned int
 };
 
-static int _cffi_d_run_bvn(int * x0, int * x1, int x2, int x3, int x4)
+static int _cffi_d_run_bvn_batch(int * x0, int * x1, int * x2, int x3, int * x4, int x5, int x6, int x7, int x8, unsigned int * x9, int * x10)
 {
-  return run_bvn(x0, x1, x2, x3, x4);
+  return run_bvn_batch(x0, x1, x2, x3, x4, x5, x6, x7, x8, x9, x10);
 }
 #ifndef PYPY_VERSION
 static PyObject *
-_cffi_f_run_bvn(PyObject *self, PyObject *args)
+_cffi_f_run_bvn_batch(PyObject *self, PyObject *args)
 {
   int * x0;
   int * x1;
-  int x2;
+  int * x2;
   int x3;
-  int x4;
+  int * x4;
+  int x5;
+  int x6;
+  int x7;
+  int x8;
+  unsigned int * x9;
+  int * x10;
   Py_ssize_t datasize;
   struct _cffi_freeme_s *large_args_free = NULL;
   int result;
@@ -602,8 +619,14 @@ _cffi_f_run_bvn(PyObject *self, PyObject *args)
   PyObject *arg2;
   PyObject *arg3;
   PyObject *arg4;
-
-  if (!PyArg_UnpackTuple(args, "run_bvn", 5, 5, &arg0, &arg1, &arg2, &arg3, &arg4))
+  PyObject *arg5;
+  PyObject *arg6;
+  PyObject *arg7;
+  PyObject *arg8;
+  PyObject *arg9;
+  PyObject *arg10;
+
+  if (!PyArg_UnpackTuple(args, "run_bvn_batch", 11, 11, &arg0, &arg1, &arg2, &arg3, &arg4, &arg5, &arg6, &arg7, &arg8, &arg9, &arg10))
     return NULL;
 
   datasize = _cffi_prepare_pointer_call_argument(
@@ -624,21 +647,65 @@ _cffi_f_run_bvn(PyObject *self, PyObject *args)
       return NULL;
   }
 
-  x2 = _cffi_to_c_int(arg2, int);
-  if (x2 == (int)-1 && PyErr_Occurred())
-    return NULL;
+  datasize = _cffi_prepare_pointer_call_argument(
+      _cffi_type(1), arg2, (char **)&x2);
+  if (datasize != 0) {
+    x2 = ((size_t)datasize) <= 640 ? (int *)alloca((size_t)datasize) : NULL;
+    if (_cffi_convert_array_argument(_cffi_type(1), arg2, (char **)&x2,
+            datasize, &large_args_free) < 0)
+      return NULL;
+  }
 
   x3 = _cffi_to_c_int(arg3, int);
   if (x3 == (int)-1 && PyErr_Occurred())
     return NULL;
 
-  x4 = _cffi_to_c_int(arg4, int);
-  if (x4 == (int)-1 && PyErr_Occurred())
+  datasize = _cffi_prepare_pointer_call_argument(
+      _cffi_type(1), arg4, (char **)&x4);
+  if (datasize != 0) {
+    x4 = ((size_t)datasize) <= 640 ? (int *)alloca((size_t)datasize) : NULL;
+    if (_cffi_convert_array_argument(_cffi_type(1), arg4, (char **)&x4,
+            datasize, &large_args_free) < 0)
+      return NULL;
+  }
+
+  x5 = _cffi_to_c_int(arg5, int);
+  if (x5 == (int)-1 && PyErr_Occurred())
+    return NULL;
+
+  x6 = _cffi_to_c_int(arg6, int);
+  if (x6 == (int)-1 && PyErr_Occurred())
     return NULL;
 
+  x7 = _cffi_to_c_int(arg7, int);
+  if (x7 == (int)-1 && PyErr_Occurred())
+    return NULL;
+
+  x8 = _cffi_to_c_int(arg8, int);
+  if (x8 == (int)-1 && PyErr_Occurred())
+    return NULL;
+
+  datasize = _cffi_prepare_pointer_call_argument(
+      _cffi_type(10), arg9, (char **)&x9);
+  if (datasize != 0) {
+    x9 = ((size_t)datasize) <= 640 ? (unsigned int *)alloca((size_t)datasize) : NULL;
+    if (_cffi_convert_array_argument(_cffi_type(10), arg9, (char **)&x9,
+            datasize, &large_args_free) < 0)
+      return NULL;
+  }
+
+  datasize = _cffi_prepare_pointer_call_argument(
+      _cffi_type(1), arg10, (char **)&x10);
+  if (datasize != 0) {
+    x10 = ((size_t)datasize) <= 640 ? (int *)alloca((size_t)datasize) : NULL;
+    if (_cffi_convert_array_argument(_cffi_type(1), arg10, (char **)&x10,
+            datasize, &large_args_free) < 0)
+      return NULL;
+  }
+
   Py_BEGIN_ALLOW_THREADS
   _cffi_restore_errno();
-  { result = run_bvn(x0, x1, x2, x3, x4); }
+  { result = run_bvn_batch(x0, x1, x2, x3, x4, x5, x6, x7, x8, x9, x10); }
   _cffi_save_errno();
   Py_END_ALLOW_THREADS
 
@@ -648,11 +715,11 @@ _cffi_f_run_bvn(PyObject *self, PyObject *args)
   return pyresult;
 }
 #else
-#  define _cffi_f_run_bvn _cffi_d_run_bvn
+#  define _cffi_f_run_bvn_batch _cffi_d_run_bvn_batch
 #endif
 
 static const struct _cffi_global_s _cffi_globals[] = {
-  { "run_bvn", (void *)_cffi_f_run_bvn, _CFFI_OP(_CFFI_OP_CPYTHON_BLTN_V, 0), (void *)_cffi_d_run_bvn },
+  { "run_bvn_batch", (void *)_cffi_f_run_bvn_batch, _CFFI_OP(_CFFI_OP_CPYTHON_BLTN_V, 0), (void *)_cffi_d_run_bvn_batch },
 };
 
 static const struct _cffi_type_context_s _cffi_type_context = {
@@ -667,7 +734,7 @@ static const struct _cffi_type_context_s _cffi_type_context = {
   0,  /* num_enums */
   0,  /* num_typenames */
   NULL,  /* no includes */
-  7,  /* num_types */
+  14,  /* num_types */
   0,  /* flags */
 };
 
@@ -0,0 +1,98 @@
+"""
+Times the rounds of FairFlow.try_improve_ms at a fixed makespan on a synthetic
+instance: the whole round and the part spent building the improvement network.
+Run it before and after a change to FairFlow to compare the two.
+
+Usage:
+    python benchmarks/fairflow_improvement_round.py --papers 2000 --reviewers 1500
+"""
+
+import argparse
+import logging
+import time
+from collections import namedtuple
+import numpy as np
+from matcher.solvers import FairFlow
+
+Encoder = namedtuple(
+    "Encoder", ["aggregate_score_matrix", "constraint_matrix"]
+)
+
+
+def make_instance(num_papers, num_reviewers, seed):
+    rng = np.random.default_rng(seed)
+    # papers crowd into a few popular areas, reviewers spread evenly, so that
+    # papers of popular areas compete for the same reviewers.
+    num_areas = 20
+    paper_areas = np.minimum(rng.zipf(1.5, num_papers) - 1, num_areas - 1)
+    reviewer_areas = rng.integers(0, num_areas, num_reviewers)
+    same_area = paper_areas[:, np.newaxis] == reviewer_areas
+    score_matrix = np.round(
+        np.where(same_area, 0.6, 0.0)
+        + 0.4 * rng.random((num_papers, num_reviewers)),
+        2,
+    )
+    constraint_matrix = np.zeros((num_papers, num_reviewers), dtype=int)
+    constraint_matrix[rng.random((num_papers, num_reviewers)) < 0.01] = -1
+    demands = [3] * num_papers
+    minimums = [1] * num_reviewers
+    maximums = [int(np.ceil(sum(demands) / num_reviewers))] * num_reviewers
+    return (
+        minimums,
+        maximums,
+        demands,
+        Encoder(score_matrix, constraint_matrix),
+    )
+
+
+def run(num_papers, num_reviewers, makespan, rounds, seed):
+    minimums, maximums, demands, encoder = make_instance(
+        num_papers, num_reviewers, seed
+    )
+    solver = FairFlow(minimums, maximums, demands, encoder)
+    solver.makespan = makespan * np.max(solver.affinity_matrix) * max(demands)
+
+    build_times = []
+    build = solver._construct_ms_improvement_network
+
+    def timed_build(*args):
+        start = time.time()
+        build(*args)
+        build_times.append(time.time() - start)
+
+    solver._construct_ms_improvement_network = timed_build
+
+    for i in range(rounds):
+        build_times.clear()
+        start = time.time()
+        s1, s3 = solver.try_improve_ms()
+        print(
+            "round={:>2} | {:>5} x {:>5} | g1={:>5} g3={:>5} | build={:.2f}s | round={:.2f}s".format(
+                i,
+                num_papers,
+                num_reviewers,
+                s1,
+                s3,
+                sum(build_times),
+                time.time() - start,
+            )
+        )
+        if s3 == 0:
+            break
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--papers", type=int, default=2000)
+    parser.add_argument("--reviewers", type=int, default=1500)
+    parser.add_argument(
+        "--makespan",
+        type=float,
+        default=0.6,
+        help="makespan as a fraction of max(affinity) * max(demands)",
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.papers, args.reviewers, args.makespan, args.rounds, args.seed)
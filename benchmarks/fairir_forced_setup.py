@@ -0,0 +1,78 @@
+"""
+Times FairIR model construction with attribute constraints on synthetic
+instances as the number of forced (constraint = 1) pairs grows. Setup time
+should stay flat in the number of forced pairs.
+
+Usage:
+    python benchmarks/fairir_forced_setup.py --papers 1000 --reviewers 800
+"""
+
+import argparse
+import logging
+import time
+from collections import namedtuple
+import numpy as np
+from matcher.solvers import FairIR
+
+Encoder = namedtuple(
+    "Encoder",
+    ["aggregate_score_matrix", "constraint_matrix", "attribute_constraints"],
+)
+
+
+def make_instance(num_papers, num_reviewers, num_forced, num_groups, seed):
+    rng = np.random.default_rng(seed)
+    score_matrix = rng.random((num_papers, num_reviewers))
+    constraint_matrix = np.zeros((num_papers, num_reviewers), dtype=int)
+    constraint_matrix[rng.random((num_papers, num_reviewers)) < 0.01] = -1
+    forced = rng.choice(num_papers * num_reviewers, num_forced, replace=False)
+    constraint_matrix.flat[forced] = 1
+    attribute_constraints = [
+        {
+            "name": "group{}".format(group),
+            "comparator": "<=" if group % 2 else ">=",
+            "bound": 1,
+            "members": list(range(group, num_reviewers, num_groups)),
+        }
+        for group in range(num_groups)
+    ]
+    demands = [3] * num_papers
+    maximums = [
+        int(np.ceil(2 * sum(demands) / num_reviewers)) + num_forced
+    ] * num_reviewers
+    minimums = [0] * num_reviewers
+    return (
+        minimums,
+        maximums,
+        demands,
+        Encoder(score_matrix, constraint_matrix, attribute_constraints),
+    )
+
+
+def run(num_papers, num_reviewers, num_groups, seed):
+    for num_forced in [0, 100, 1000, 10000]:
+        minimums, maximums, demands, encoder = make_instance(
+            num_papers, num_reviewers, num_forced, num_groups, seed
+        )
+        start = time.time()
+        FairIR(minimums, maximums, demands, encoder)
+        print(
+            "forced={:>6} | {:>5} x {:>5} | groups={} | setup={:.2f}s".format(
+                num_forced,
+                num_papers,
+                num_reviewers,
+                num_groups,
+                time.time() - start,
+            )
+        )
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--papers", type=int, default=1000)
+    parser.add_argument("--reviewers", type=int, default=800)
+    parser.add_argument("--groups", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.papers, args.reviewers, args.groups, args.seed)
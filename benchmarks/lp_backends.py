@@ -0,0 +1,158 @@
+"""
+Compares the Gurobi and HiGHS LP backends of the FairIR and
+PerturbedMaximization solvers on the small instances of the solver tests and
+on synthetic instances: wall time and objective (total affinity for FairIR,
+expected cost for PerturbedMaximization). A backend that fails on an instance
+(e.g. a size-limited Gurobi license) is reported as n/a. The HiGHS QP solver is an active-set method, so
+PerturbedMaximization with a perturbation slows down quickly with size on it.
+
+Usage:
+    python benchmarks/lp_backends.py --sizes 10x8 30x20 60x50 300x250
+"""
+
+import argparse
+import logging
+import time
+from collections import namedtuple
+import numpy as np
+from matcher.solvers import (
+    FairIR,
+    PerturbedMaximizationSolver,
+    SolverException,
+)
+
+FairIREncoder = namedtuple(
+    "FairIREncoder",
+    ["aggregate_score_matrix", "constraint_matrix", "attribute_constraints"],
+)
+PMEncoder = namedtuple(
+    "PMEncoder",
+    [
+        "cost_matrix",
+        "constraint_matrix",
+        "prob_limit_matrix",
+        "perturbation",
+        "bad_match_thresholds",
+    ],
+)
+
+
+# The instances of tests/test_solvers_fairir.py and
+# tests/test_solvers_perturbed_maximization.py, as papers x reviewers scores
+FIXTURES = [
+    (
+        "fairir_fixture",
+        (
+            [0, 0, 0, 0],
+            [2, 2, 2, 3],
+            [2, 2, 2],
+            np.array([[0.5, 0, 0, 0.1], [0, 0.5, 0, 0.1], [0, 0, 0.5, 0.1]]),
+            np.zeros((3, 4), dtype=int),
+        ),
+    ),
+    (
+        "pm_fixture",
+        (
+            [0, 0, 0, 0],
+            [1, 1, 1, 1],
+            [2, 2],
+            np.array([[1, 1, 0.3, 0.5], [0.1, 1, 0.6, 0.8]]),
+            np.zeros((2, 4), dtype=int),
+        ),
+    ),
+]
+
+
+def make_instance(num_papers, num_reviewers, seed):
+    rng = np.random.default_rng(seed)
+    score_matrix = np.round(rng.random((num_papers, num_reviewers)), 2) + 0.01
+    constraint_matrix = np.zeros((num_papers, num_reviewers), dtype=int)
+    constraint_matrix[rng.random((num_papers, num_reviewers)) < 0.01] = -1
+    demands = [3] * num_papers
+    minimums = [0] * num_reviewers
+    maximums = [int(np.ceil(2 * sum(demands) / num_reviewers))] * num_reviewers
+    return minimums, maximums, demands, score_matrix, constraint_matrix
+
+
+def solve_fairir(instance, lp_backend):
+    minimums, maximums, demands, score_matrix, constraint_matrix = instance
+    solver = FairIR(
+        minimums,
+        maximums,
+        demands,
+        FairIREncoder(score_matrix, constraint_matrix, None),
+        lp_backend=lp_backend,
+    )
+    solution = solver.solve()
+    return np.sum(solution * score_matrix)
+
+
+def solve_perturbed_maximization(instance, lp_backend):
+    minimums, maximums, demands, score_matrix, constraint_matrix = instance
+    solver = PerturbedMaximizationSolver(
+        minimums,
+        maximums,
+        demands,
+        PMEncoder(
+            -score_matrix,
+            constraint_matrix.copy(),
+            np.full(score_matrix.shape, 0.5),
+            0.5,
+            [],
+        ),
+        # the fixtures have zero scores, which would otherwise be conflicts
+        allow_zero_score_assignments=True,
+        lp_backend=lp_backend,
+    )
+    solver.solve()
+    if not solver.solved:
+        raise SolverException("QP not solved")
+    return solver.fractional_assignment_cost
+
+
+def run(sizes, seed):
+    solvers = [
+        ("FairIR", solve_fairir),
+        ("PerturbedMaximization", solve_perturbed_maximization),
+    ]
+    instances = FIXTURES + [
+        ("random", make_instance(num_papers, num_reviewers, seed))
+        for num_papers, num_reviewers in sizes
+    ]
+    for instance_name, instance in instances:
+        num_papers, num_reviewers = instance[3].shape
+        for solver_name, solve in solvers:
+            for lp_backend in ["gurobi", "highs"]:
+                start = time.time()
+                try:
+                    result = "objective={:.4f}".format(
+                        solve(instance, lp_backend)
+                    )
+                except Exception as e:
+                    result = "n/a ({})".format(type(e).__name__)
+                print(
+                    "{:<14} | {:<21} | {:>6} | {:>5} x {:>5} | {:.2f}s | {}".format(
+                        instance_name,
+                        solver_name,
+                        lp_backend,
+                        num_papers,
+                        num_reviewers,
+                        time.time() - start,
+                        result,
+                    )
+                )
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["10x8", "30x20", "60x50", "300x250", "1000x800"],
+        help="instance sizes as <papers>x<reviewers>",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sizes = [tuple(int(n) for n in size.split("x")) for size in args.sizes]
+    run(sizes, args.seed)
@@ -0,0 +1,61 @@
+"""
+Compares the two-pass MinMaxSolver with its single-pass formulation on
+synthetic instances: wall time and flow objective (lower is better).
+
+Usage:
+    python benchmarks/minmax_single_pass.py --papers 2000 --reviewers 1500
+"""
+
+import argparse
+import time
+from collections import namedtuple
+import numpy as np
+from matcher.solvers import MinMaxSolver
+
+Encoder = namedtuple("Encoder", ["cost_matrix", "constraint_matrix"])
+
+
+def make_instance(num_papers, num_reviewers, seed):
+    rng = np.random.default_rng(seed)
+    cost_matrix = -np.round(rng.random((num_papers, num_reviewers)) * 100)
+    constraint_matrix = np.zeros((num_papers, num_reviewers), dtype=int)
+    constraint_matrix[rng.random((num_papers, num_reviewers)) < 0.01] = -1
+    demands = [3] * num_papers
+    minimums = [1] * num_reviewers
+    maximums = [int(np.ceil(2 * sum(demands) / num_reviewers))] * num_reviewers
+    return minimums, maximums, demands, Encoder(cost_matrix, constraint_matrix)
+
+
+def run(num_papers, num_reviewers, seed):
+    minimums, maximums, demands, encoder = make_instance(
+        num_papers, num_reviewers, seed
+    )
+    for single_pass in [False, True]:
+        solver = MinMaxSolver(
+            list(minimums),
+            list(maximums),
+            demands,
+            encoder,
+            single_pass=single_pass,
+        )
+        start = time.time()
+        solver.solve()
+        print(
+            "{:>11} | {:>5} x {:>5} | solved={} | time={:.2f}s | objective={}".format(
+                "single-pass" if single_pass else "two-pass",
+                num_papers,
+                num_reviewers,
+                solver.solved,
+                time.time() - start,
+                solver.optimal_cost,
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--papers", type=int, default=2000)
+    parser.add_argument("--reviewers", type=int, default=1500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.papers, args.reviewers, args.seed)
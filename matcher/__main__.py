@@ -114,6 +114,21 @@ parser.add_argument(
     help="""JSON file with attribute constraints"""
 )
 
+parser.add_argument(
+    "--lp_backend",
+    help="LP solver of the FairIR and PerturbedMaximization solvers. Choose from: {}".format(["gurobi", "highs"]),
+    default="gurobi",
+)
+
+parser.add_argument(
+    "--time_limit",
+    type=float,
+    help="""
+        Wall clock budget of the FairIR solver in seconds. When it runs out, the
+        best assignment found so far is returned.
+        """,
+)
+
 args = parser.parse_args()
 
 # Main Logic
@@ -288,6 +303,8 @@ match_data = {
     "num_alternates": num_alternates,
     "allow_zero_score_assignments": args.allow_zero_score_assignments,
     "attribute_constraints": attr_constraints,
+    "lp_backend": args.lp_backend,
+    "time_limit": args.time_limit,
     "assignments_output": "assignments.json",
     "alternates_output": "alternates.json",
     "logger": logger,
@@ -14,6 +14,7 @@ from .solvers import (
     PerturbedMaximizationSolver
 )
 from .encoder import Encoder
+from .solvers.threads import limit_blas_threads
 
 SOLVER_MAP = {
     "MinMax": MinMaxSolver,
@@ -24,6 +25,12 @@ SOLVER_MAP = {
     "PerturbedMaximization": PerturbedMaximizationSolver
 }
 
+# solvers that take an lp_backend argument
+LP_SOLVERS = (FairIR, PerturbedMaximizationSolver)
+
+# solvers that take a time_limit argument
+TIME_LIMIT_SOLVERS = (FairIR,)
+
 
 class MatcherStatus(Enum):
     INITIALIZED = "Initialized"
@@ -62,6 +69,8 @@ class KeywordDatasource:
         bad_match_thresholds=[],
         allow_zero_score_assignments=False,
         attribute_constraints=None,
+        lp_backend="gurobi",
+        time_limit=None,
         assignments_output="assignments.json",
         alternates_output="alternates.json",
         logger=logging.getLogger(__name__),
@@ -82,6 +91,8 @@ class KeywordDatasource:
         self.normalization_types = []
         self.perturbation = perturbation
         self.bad_match_thresholds = bad_match_thresholds
+        self.lp_backend = lp_backend
+        self.time_limit = time_limit
         self.assignments_output = assignments_output
         self.alternates_output = alternates_output
         self.logger = logger
@@ -160,37 +171,49 @@ class Matcher:
 
             self.logger.debug("Start encoding")
 
-            encoder = Encoder(
-                reviewers=self.datasource.reviewers,
-                papers=self.datasource.papers,
-                constraints=self.datasource.constraints,
-                scores_by_type=self.datasource.scores_by_type,
-                weight_by_type=self.datasource.weight_by_type,
-                normalization_types=self.datasource.normalization_types,
-                probability_limits=self.datasource.probability_limits,
-                attribute_constraints=self.datasource.attribute_constraints,
-                perturbation=self.datasource.perturbation,
-                bad_match_thresholds=self.datasource.bad_match_thresholds,
-                logger=self.logger,
-            )
+            # BLAS calls of the encoder and the solver stay within the thread budget
+            with limit_blas_threads():
+                encoder = Encoder(
+                    reviewers=self.datasource.reviewers,
+                    papers=self.datasource.papers,
+                    constraints=self.datasource.constraints,
+                    scores_by_type=self.datasource.scores_by_type,
+                    weight_by_type=self.datasource.weight_by_type,
+                    normalization_types=self.datasource.normalization_types,
+                    probability_limits=self.datasource.probability_limits,
+                    attribute_constraints=self.datasource.attribute_constraints,
+                    perturbation=self.datasource.perturbation,
+                    bad_match_thresholds=self.datasource.bad_match_thresholds,
+                    logger=self.logger,
+                )
 
-            self.logger.debug("Preparing solver")
+                self.logger.debug("Preparing solver")
 
-            # solver
-            solver = self.solver_class(
-                self.datasource.minimums,
-                self.datasource.maximums,
-                self.datasource.demands,
-                encoder,
-                allow_zero_score_assignments=self.datasource.allow_zero_score_assignments,
-                logger=self.logger,
-            )
+                # solver
+                solver_kwargs = {}
+                if self.solver_class in LP_SOLVERS:
+                    solver_kwargs["lp_backend"] = getattr(
+                        self.datasource, "lp_backend", "gurobi"
+                    )
+                if self.solver_class in TIME_LIMIT_SOLVERS:
+                    solver_kwargs["time_limit"] = getattr(
+                        self.datasource, "time_limit", None
+                    )
+                solver = self.solver_class(
+                    self.datasource.minimums,
+                    self.datasource.maximums,
+                    self.datasource.demands,
+                    encoder,
+                    allow_zero_score_assignments=self.datasource.allow_zero_score_assignments,
+                    logger=self.logger,
+                    **solver_kwargs,
+                )
 
-            solution = None
-            start_time = time.time()
+                solution = None
+                start_time = time.time()
 
-            self.logger.debug("Solving solver")
-            solution = solver.solve()
+                self.logger.debug("Solving solver")
+                solution = solver.solve()
 
             self.logger.debug(
                 "Complete solver run took {} seconds".format(
@@ -5,11 +5,38 @@ Responsible for:
 """
 
 from collections import defaultdict, namedtuple
+from operator import itemgetter
 import numpy as np
+from scipy import sparse
 import json
 import logging
 
 
+def _top_k_per_row(scores, k):
+    """
+    Return the row and column indices of the k highest finite scores of each row,
+    ordered by row, then by decreasing score, then by column. Ties at the k-th
+    score are broken in favor of the lower column index, as a stable sort would.
+    """
+    num_rows, num_columns = scores.shape
+    k = min(k, num_columns)
+    if k <= 0 or num_rows == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    kth_score = np.take_along_axis(scores, top, axis=1).min(axis=1)[:, None]
+
+    above = scores > kth_score
+    at = scores == kth_score
+    num_at_needed = k - above.sum(axis=1, keepdims=True)
+    selected = above | (at & (np.cumsum(at, axis=1) <= num_at_needed))
+    selected &= np.isfinite(scores)
+
+    rows, columns = np.nonzero(selected)
+    order = np.lexsort((columns, -scores[rows, columns], rows))
+    return rows[order], columns[order]
+
+
 def _score_to_cost(score, scaling_factor=100):
     """
     Simple helper function for converting a score into a cost.
@@ -25,6 +52,104 @@ class EncoderError(Exception):
     pass
 
 
+class DefaultSparseMatrix:
+    """
+    A #papers by #reviewers matrix where most cells hold the same default value.
+
+    Stored as the scalar `default` plus a scipy.sparse CSR matrix `offsets`
+    holding (value - default) for the cells that differ from it. Supports
+    scaling by a scalar and addition, and is converted to a dense numpy array
+    by `toarray()` or `np.asarray()`.
+    """
+
+    def __init__(self, shape, default, offsets=None, dtype=float):
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.default = dtype(default)
+        if offsets is None:
+            offsets = sparse.csr_matrix(self.shape, dtype=dtype)
+        self.offsets = sparse.csr_matrix(offsets, dtype=dtype)
+        self.offsets.eliminate_zeros()
+
+    @classmethod
+    def from_entries(cls, shape, default, rows, cols, values, dtype=float):
+        """
+        Build a matrix from parallel arrays of cell coordinates and values.
+        If a cell appears more than once, the last value wins.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.asarray(values, dtype=dtype)
+
+        offsets = sparse.csr_matrix(
+            (values - dtype(default), (rows, cols)), shape=shape, dtype=dtype
+        )
+
+        # the conversion above sums duplicate cells; redo it keeping only the
+        # last occurrence of each cell instead.
+        if offsets.nnz < len(values):
+            cells = rows * shape[1] + cols
+            _, last_reversed = np.unique(cells[::-1], return_index=True)
+            keep = len(cells) - 1 - last_reversed
+            offsets = sparse.csr_matrix(
+                (values[keep] - dtype(default), (rows[keep], cols[keep])),
+                shape=shape,
+                dtype=dtype,
+            )
+
+        return cls(shape, default, offsets, dtype)
+
+    def nonzero_pattern(self):
+        """Row and column indices of the cells that differ from the default."""
+        coo = self.offsets.tocoo()
+        return coo.row, coo.col
+
+    def values_at(self, rows, cols):
+        """The values of the cells at the given row and column indices."""
+        if len(rows) == 0:
+            return np.zeros(0, dtype=self.dtype)
+        return self.default + np.asarray(self.offsets[rows, cols]).ravel()
+
+    def rows_toarray(self, start, stop):
+        """Materialize rows `start` to `stop` of the matrix as a dense numpy array."""
+        return self.default + self.offsets[start:stop].toarray()
+
+    def toarray(self):
+        """Materialize the matrix as a dense numpy array."""
+        dense = np.full(self.shape, self.default, dtype=self.dtype)
+        rows, cols = self.nonzero_pattern()
+        dense[rows, cols] += self.offsets.data
+        return dense
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.toarray()
+        return dense if dtype is None else dense.astype(dtype)
+
+    def __mul__(self, scalar):
+        return DefaultSparseMatrix(
+            self.shape,
+            self.default * scalar,
+            self.offsets * scalar,
+            dtype=self.dtype,
+        )
+
+    __rmul__ = __mul__
+
+    def __add__(self, other):
+        if isinstance(other, DefaultSparseMatrix):
+            return DefaultSparseMatrix(
+                self.shape,
+                self.default + other.default,
+                self.offsets + other.offsets,
+                dtype=self.dtype,
+            )
+        return DefaultSparseMatrix(
+            self.shape, self.default + other, self.offsets, dtype=self.dtype
+        )
+
+    __radd__ = __add__
+
+
 class Encoder:
     """
      Responsible for keeping track of paper and reviewer indexes.
@@ -117,8 +242,8 @@ class Encoder:
                 without_normalization_matrices[score_type] = scores
 
         self.logger.debug("Init conflicts")
-        self.constraint_matrix = self._encode_constraints(constraints)
-        self.prob_limit_matrix = self._encode_probability_limits(
+        self.sparse_constraint_matrix = self._encode_constraints(constraints)
+        self.sparse_prob_limit_matrix = self._encode_probability_limits(
             probability_limits
         )
 
@@ -152,12 +277,12 @@ class Encoder:
         self.attribute_constraints = constraints_list
 
         # don't use numpy.sum() here. it will collapse the matrices into a single value.
-        self.aggregate_score_matrix = np.full(
-            self.matrix_shape, 0, dtype=float
+        self.sparse_aggregate_score_matrix = DefaultSparseMatrix(
+            self.matrix_shape, 0
         )
 
         if without_normalization_matrices:
-            self.aggregate_score_matrix = sum(
+            self.sparse_aggregate_score_matrix = sum(
                 [
                     scores * weight_by_type[score_type]
                     for score_type, scores in without_normalization_matrices.items()
@@ -165,81 +290,152 @@ class Encoder:
             )
 
         if with_normalization_matrices:
-            self.aggregate_score_matrix += self._normalize(
+            self.sparse_aggregate_score_matrix += self._normalize(
                 weight_by_type, with_normalization_matrices
             )
 
-        self.cost_matrix = _score_to_cost(self.aggregate_score_matrix)
+        self.sparse_cost_matrix = _score_to_cost(
+            self.sparse_aggregate_score_matrix
+        )
 
-    def _normalize(self, weight_by_type, with_normalization_matrices):
+        # dense matrices are only materialized when a solver asks for them
+        self._dense_matrices = {}
 
-        indicator = {
-            score_type: scores != 0.0
-            for score_type, scores in with_normalization_matrices.items()
-        }
-        sum_of_weights = sum(
-            [
-                indicator * weight_by_type[score_type]
-                for score_type, indicator in indicator.items()
-            ]
+    def _dense(self, name):
+        """Materialize (once) the dense version of the sparse matrix `sparse_<name>`."""
+        if name not in self._dense_matrices:
+            self.logger.debug("Materializing dense {}".format(name))
+            self._dense_matrices[name] = getattr(
+                self, "sparse_" + name
+            ).toarray()
+        return self._dense_matrices[name]
+
+    @property
+    def aggregate_score_matrix(self):
+        return self._dense("aggregate_score_matrix")
+
+    @property
+    def cost_matrix(self):
+        return self._dense("cost_matrix")
+
+    @property
+    def constraint_matrix(self):
+        return self._dense("constraint_matrix")
+
+    @property
+    def prob_limit_matrix(self):
+        return self._dense("prob_limit_matrix")
+
+    def _normalize(self, weight_by_type, with_normalization_matrices):
+        """
+        Weighted average of the given score matrices, where each cell only averages
+        over the score types that have a nonzero score for that cell.
+        """
+        # cells that differ from the default in any score type; all other cells
+        # share the same value, computed from the defaults.
+        rows, cols = np.nonzero(
+            sum(
+                [
+                    abs(scores.offsets)
+                    for scores in with_normalization_matrices.values()
+                ]
+            )
         )
-        normalizer = np.where(sum_of_weights == 0, 0, 1 / sum_of_weights)
 
-        return normalizer * sum(
-            [
-                scores * weight_by_type[score_type]
+        def weighted_average(values_by_type):
+            sum_of_weights = sum(
+                [
+                    (values != 0.0) * weight_by_type[score_type]
+                    for score_type, values in values_by_type.items()
+                ]
+            )
+            normalizer = np.divide(
+                1,
+                sum_of_weights,
+                out=np.zeros_like(sum_of_weights, dtype=float),
+                where=sum_of_weights != 0,
+            )
+            return normalizer * sum(
+                [
+                    values * weight_by_type[score_type]
+                    for score_type, values in values_by_type.items()
+                ]
+            )
+
+        default = weighted_average(
+            {
+                score_type: np.array([scores.default])
                 for score_type, scores in with_normalization_matrices.items()
-            ]
+            }
+        )[0]
+        values = weighted_average(
+            {
+                score_type: scores.values_at(rows, cols)
+                for score_type, scores in with_normalization_matrices.items()
+            }
+        )
+
+        return DefaultSparseMatrix.from_entries(
+            self.matrix_shape, default, rows, cols, values
+        )
+
+    def _index_edges(self, edges):
+        """
+        Convert a list of (forum, user, value) tuples to parallel arrays of
+        paper indices, reviewer indices and values.
+        """
+        if not isinstance(edges, list):
+            edges = list(edges)
+
+        def column(position, lookup=None):
+            items = map(itemgetter(position), edges)
+            if lookup is not None:
+                items = map(lookup.__getitem__, items)
+            return np.fromiter(
+                items,
+                dtype=float if lookup is None else np.int64,
+                count=len(edges),
+            )
+
+        return (
+            column(0, self.index_by_forum),
+            column(1, self.index_by_user),
+            column(2),
         )
 
     def _encode_scores(self, scores):
         """return a matrix containing unweighted scores."""
         default = scores.get("default", 0)
-        edges = scores.get("edges", [])
-        score_matrix = np.full(self.matrix_shape, default, dtype=float)
-
-        for forum, user, score in edges:
-            coordinates = (
-                self.index_by_forum[forum],
-                self.index_by_user[user],
-            )
-            score_matrix[coordinates] = score
+        rows, cols, values = self._index_edges(scores.get("edges", []))
 
-        return score_matrix
+        return DefaultSparseMatrix.from_entries(
+            self.matrix_shape, default, rows, cols, values
+        )
 
     def _encode_constraints(self, constraints):
         """
         return a matrix containing constraint values. label should have no bearing on the outcome.
         """
-        constraint_matrix = np.full(self.matrix_shape, 0, dtype=int)
-        for forum, user, constraint in constraints:
-            coordinates = (
-                self.index_by_forum[forum],
-                self.index_by_user[user],
-            )
-            constraint_matrix[coordinates] = constraint
+        rows, cols, values = self._index_edges(constraints)
 
-        return constraint_matrix
+        return DefaultSparseMatrix.from_entries(
+            self.matrix_shape, 0, rows, cols, values, dtype=int
+        )
 
     def _encode_probability_limits(self, probability_limits):
         """
         return a matrix containing probability limits
         """
         if isinstance(probability_limits, float):
-            prob_limit_matrix = np.full(
-                self.matrix_shape, probability_limits, dtype=float
-            )
-        else:  # list of tuples
-            prob_limit_matrix = np.full(
-                self.matrix_shape, 1, dtype=float
-            )  # default to no limit
-            for forum, user, limit in probability_limits:
-                coordinates = (
-                    self.index_by_forum[forum],
-                    self.index_by_user[user],
-                )
-                prob_limit_matrix[coordinates] = limit
-        return prob_limit_matrix
+            return DefaultSparseMatrix(self.matrix_shape, probability_limits)
+
+        # list of tuples
+        rows, cols, values = self._index_edges(probability_limits)
+
+        # default to no limit
+        return DefaultSparseMatrix.from_entries(
+            self.matrix_shape, 1, rows, cols, values
+        )
 
     def decode_assignments(self, flow_matrix):
         """
@@ -248,53 +444,53 @@ class Encoder:
         """
         assignments_by_forum = defaultdict(list)
 
-        for paper_index, paper_flows in enumerate(flow_matrix):
-            paper_id = self.papers[paper_index]
-            for reviewer_index, flow in enumerate(paper_flows):
-                reviewer = self.reviewers[reviewer_index]
-
-                if flow:
-                    coordinates = (paper_index, reviewer_index)
-                    paper_user_entry = {
-                        "aggregate_score": self.aggregate_score_matrix[
-                            coordinates
-                        ],
-                        "user": reviewer,
-                    }
-                    assignments_by_forum[paper_id].append(paper_user_entry)
+        paper_indices, reviewer_indices = np.nonzero(flow_matrix)
+        scores = self.sparse_aggregate_score_matrix.values_at(
+            paper_indices, reviewer_indices
+        )
+
+        for paper_index, reviewer_index, score in zip(
+            paper_indices, reviewer_indices, scores
+        ):
+            assignments_by_forum[self.papers[paper_index]].append(
+                {"aggregate_score": score, "user": self.reviewers[reviewer_index]}
+            )
 
         return dict(assignments_by_forum)
 
-    def decode_alternates(self, flow_matrix, num_alternates):
+    def decode_alternates(
+        self, flow_matrix, num_alternates, cells_per_block=10**7
+    ):
         """
         Return a dictionary, keyed on forum IDs, with lists containing dicts
         representing alternate suggested users.
 
+        Papers are processed in blocks of about `cells_per_block` cells, so that
+        only one block of the score matrix is dense at a time.
         """
-        alternates_by_forum = {}
-
-        for paper_index, paper_flows in enumerate(flow_matrix):
-            paper_id = self.papers[paper_index]
-            unassigned = []
-            for reviewer_index, flow in enumerate(paper_flows):
-                reviewer = self.reviewers[reviewer_index]
-
-                # alternates must not be assigned
-                if not flow:
-                    coordinates = (paper_index, reviewer_index)
-                    paper_user_entry = {
-                        "aggregate_score": self.aggregate_score_matrix[
-                            coordinates
-                        ],
-                        "user": reviewer,
-                    }
-                    unassigned.append(paper_user_entry)
-
-            unassigned.sort(
-                key=lambda entry: entry["aggregate_score"], reverse=True
+        alternates_by_forum = {paper_id: [] for paper_id in self.papers}
+        num_papers, num_reviewers = self.matrix_shape
+        block_size = max(1, cells_per_block // max(1, num_reviewers))
+
+        for start in range(0, num_papers, block_size):
+            stop = min(start + block_size, num_papers)
+            scores = self.sparse_aggregate_score_matrix.rows_toarray(
+                start, stop
             )
 
-            alternates_by_forum[paper_id] = unassigned[:num_alternates]
+            # alternates must not be assigned
+            scores[np.asarray(flow_matrix[start:stop]) != 0] = -np.inf
+
+            rows, reviewer_indices = _top_k_per_row(scores, num_alternates)
+            for row, reviewer_index, score in zip(
+                rows, reviewer_indices, scores[rows, reviewer_indices]
+            ):
+                alternates_by_forum[self.papers[start + row]].append(
+                    {
+                        "aggregate_score": score,
+                        "user": self.reviewers[reviewer_index],
+                    }
+                )
 
         return alternates_by_forum
 
@@ -308,15 +504,14 @@ class Encoder:
         alternates_by_forum = {}
         for paper_index, reviewer_indices in alternates_by_index.items():
             paper_id = self.papers[paper_index]
-            reviewer_list = []
-            for reviewer_index in reviewer_indices:
-                reviewer_id = self.reviewers[reviewer_index]
-                entry = {
-                    "aggregate_score": self.aggregate_score_matrix[
-                        (paper_index, reviewer_index)
-                    ],
-                    "user": reviewer_id,
+            scores = self.sparse_aggregate_score_matrix.values_at(
+                np.full(len(reviewer_indices), paper_index), reviewer_indices
+            )
+            alternates_by_forum[paper_id] = [
+                {
+                    "aggregate_score": score,
+                    "user": self.reviewers[reviewer_index],
                 }
-                reviewer_list.append(entry)
-            alternates_by_forum[paper_id] = reviewer_list
+                for reviewer_index, score in zip(reviewer_indices, scores)
+            ]
         return alternates_by_forum
@@ -588,6 +588,10 @@ class ConfigNoteInterfaceV1(BaseConfigNoteInterface):
         self.bad_match_thresholds = self.config_note.content.get(
             "perturbedmaximization_bad_match_thresholds", [0.1, 0.3, 0.5]
         )
+        self.lp_backend = self.config_note.content.get("lp_backend", "gurobi")
+        self.time_limit = self.config_note.content.get("fairir_time_limit")
+        if self.time_limit is not None:
+            self.time_limit = float(self.time_limit)
 
         # Lazy variables
         self._reviewers = None
@@ -791,6 +795,10 @@ class ConfigNoteInterfaceV2(BaseConfigNoteInterface):
         self.bad_match_thresholds = self.config_note.content.get(
             "perturbedmaximization_bad_match_thresholds", [0.1, 0.3, 0.5]
         )
+        self.lp_backend = self.config_note.content.get("lp_backend", "gurobi")
+        self.time_limit = self.config_note.content.get("fairir_time_limit")
+        if self.time_limit is not None:
+            self.time_limit = float(self.time_limit)
 
         # Lazy variables
         self._reviewers = None
@@ -5,6 +5,8 @@ import argparse
 
 from gurobipy import *
 
+from .threads import thread_budget
+
 
 class Basic(object):
     """Paper matching formulated as a linear program."""
@@ -38,6 +40,7 @@ class Basic(object):
         self.m = Model("%s: basic matcher" % str(self.id))
         self.solution = None
         self.m.setParam('OutputFlag', 0)
+        self.m.setParam('Threads', thread_budget())
 
         # Primal vars.
         start = time.time()
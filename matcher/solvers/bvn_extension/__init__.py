@@ -1,6 +1,141 @@
 """
 A C extension that implements a sampling algorithm based on the Birkhoff-von Neumann
 theorem, used in randomized_solver.
+
+The extension keeps no global state and CFFI releases the GIL while it runs, so
+samples can be drawn in parallel threads.
 """
 
-from _bvn_extension.lib import run_bvn
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from _bvn_extension import ffi
+from _bvn_extension.lib import run_bvn_batch
+
+
+def sample_sparse_assignments(
+    paper_indices,
+    reviewer_indices,
+    integer_flows,
+    num_paps,
+    num_revs,
+    one,
+    num_samples,
+    seeds=None,
+    num_threads=1,
+):
+    """
+    Draw `num_samples` independent deterministic assignments from a fractional
+    assignment given by its nonzero cells: parallel arrays of paper indices,
+    reviewer indices and flows scaled to integers, `one` standing for 1.
+
+    `seeds` is either a sequence of one seed per sample, or an int (or None)
+    seeding the numpy generator that draws them. Samples are split into
+    `num_threads` batches sampled in parallel threads.
+
+    Returns a boolean #samples by #cells matrix, True for the cells chosen by
+    each sample.
+    """
+    paper_indices = np.array(paper_indices, dtype=np.intc)
+    reviewer_indices = np.array(reviewer_indices, dtype=np.intc)
+    flows = np.array(integer_flows, dtype=np.intc)
+    subsets = np.ones(num_revs, dtype=np.intc)
+
+    if seeds is None or np.isscalar(seeds):
+        seeds = np.random.default_rng(seeds).integers(
+            0, 2**32, size=num_samples
+        )
+    seeds = np.array(seeds, dtype=np.uintc)
+    if len(seeds) != num_samples:
+        raise ValueError(
+            "Expected {} seeds, got {}".format(num_samples, len(seeds))
+        )
+
+    samples = np.zeros((num_samples, len(flows)), dtype=np.intc)
+
+    def sample_batch(batch):
+        run_bvn_batch(
+            ffi.from_buffer("int[]", paper_indices),
+            ffi.from_buffer("int[]", reviewer_indices),
+            ffi.from_buffer("int[]", flows),
+            len(flows),
+            ffi.from_buffer("int[]", subsets),
+            num_paps,
+            num_revs,
+            one,
+            batch.stop - batch.start,
+            ffi.from_buffer("unsigned int[]", seeds[batch]),
+            ffi.from_buffer("int[]", samples[batch]),
+        )
+
+    bounds = np.linspace(0, num_samples, max(1, num_threads) + 1).astype(int)
+    batches = [
+        slice(start, stop)
+        for start, stop in zip(bounds[:-1], bounds[1:])
+        if stop > start
+    ]
+    if len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+            list(executor.map(sample_batch, batches))
+    else:
+        for batch in batches:
+            sample_batch(batch)
+
+    return samples.astype(bool)
+
+
+def sample_sparse_assignment(
+    paper_indices,
+    reviewer_indices,
+    integer_flows,
+    num_paps,
+    num_revs,
+    one,
+    seed=None,
+):
+    """
+    Sample a deterministic assignment from a fractional assignment given by its
+    nonzero cells: parallel arrays of paper indices, reviewer indices and flows
+    scaled to integers, `one` standing for 1.
+
+    Returns the paper indices and reviewer indices of the sampled pairs.
+    """
+    paper_indices = np.asarray(paper_indices)
+    reviewer_indices = np.asarray(reviewer_indices)
+
+    sampled = sample_sparse_assignments(
+        paper_indices,
+        reviewer_indices,
+        integer_flows,
+        num_paps,
+        num_revs,
+        one,
+        1,
+        seeds=seed,
+    )[0]
+    return paper_indices[sampled], reviewer_indices[sampled]
+
+
+def sample_integer_assignment(integer_assignment_matrix, one, seed=None):
+    """
+    Sample a deterministic assignment from a #papers by #reviewers fractional
+    assignment whose entries are scaled to integers, `one` standing for 1.
+
+    Only the nonzero cells are handed to the sampler, and the sampled 0/1
+    assignment is returned as an integer matrix.
+    """
+    num_paps, num_revs = np.shape(integer_assignment_matrix)
+    paper_indices, reviewer_indices = np.nonzero(integer_assignment_matrix)
+
+    sampled_papers, sampled_reviewers = sample_sparse_assignment(
+        paper_indices,
+        reviewer_indices,
+        np.asarray(integer_assignment_matrix)[paper_indices, reviewer_indices],
+        num_paps,
+        num_revs,
+        one,
+        seed=seed,
+    )
+
+    assignment = np.zeros((num_paps, num_revs), dtype=np.intc)
+    assignment[sampled_papers, sampled_reviewers] = 1
+    return assignment
@@ -7,7 +7,8 @@ from cffi import FFI
 ffibuilder = FFI()
 
 header = (
-    "int run_bvn(int* flows, int* subsets, int nrevs, int npaps, int one_);"
+    "int run_bvn_batch(int* paps, int* revs, int* flows, int nnz, int* subsets,"
+    " int npaps, int nrevs, int one_, int nsamples, unsigned int* seeds, int* samples);"
 )
 ffibuilder.cdef(header)
 ffibuilder.set_source(
@@ -0,0 +1,71 @@
+"""
+Helpers for restricting the flow-based solvers to a small set of candidate
+reviewer-paper pairs, and for certifying that an optimum found on the pruned
+graph is also optimal for the full graph.
+
+A pair is a candidate if the reviewer is among the top k reviewers of the paper,
+or the paper is among the top k papers of the reviewer. Solvers start from a
+small k and double it whenever the pruned problem turns out to be infeasible.
+"""
+
+import numpy as np
+from .core import SolverException
+
+
+def top_k_candidates(score_matrix, k, eligible=None):
+    """
+    Return a boolean #papers by #reviewers matrix that is True for every pair
+    ranked among the k highest scores of its row (paper) or of its column (reviewer).
+
+    Pairs outside the boolean matrix `eligible` are never candidates.
+    """
+    num_papers, num_reviewers = np.shape(score_matrix)
+    if eligible is None:
+        eligible = np.ones((num_papers, num_reviewers), dtype=bool)
+
+    if k >= num_papers or k >= num_reviewers:
+        return eligible.copy()
+
+    ranked_scores = np.where(eligible, score_matrix, -np.inf)
+    candidates = np.zeros((num_papers, num_reviewers), dtype=bool)
+
+    best_reviewers = np.argpartition(-ranked_scores, k - 1, axis=1)[:, :k]
+    np.put_along_axis(candidates, best_reviewers, True, axis=1)
+
+    best_papers = np.argpartition(-ranked_scores, k - 1, axis=0)[:k, :]
+    np.put_along_axis(candidates, best_papers, True, axis=0)
+
+    return candidates & eligible
+
+
+def covers_all_pairs(k, shape):
+    """Whether top-k pruning with this k keeps every pair of a matrix of this shape."""
+    return k >= min(shape)
+
+
+def residual_potentials(num_nodes, tails, heads, capacities, costs, flows):
+    """
+    Compute node potentials (the flow duals) of an optimal min-cost flow.
+
+    The potentials are shortest-path distances in the residual graph from a
+    virtual root connected to every node, found with a vectorized Bellman-Ford.
+    Every residual arc (u, v) then has a non-negative reduced cost
+    cost + potential[u] - potential[v].
+    """
+    forward = flows < capacities
+    backward = flows > 0
+    starts = np.concatenate([tails[forward], heads[backward]])
+    ends = np.concatenate([heads[forward], tails[backward]])
+    lengths = np.concatenate([costs[forward], -costs[backward]])
+
+    potentials = np.zeros(num_nodes, dtype=np.int64)
+    for _ in range(num_nodes + 1):
+        relaxed = potentials.copy()
+        np.minimum.at(relaxed, ends, potentials[starts] + lengths)
+        if np.array_equal(relaxed, potentials):
+            return potentials
+        potentials = relaxed
+
+    raise SolverException(
+        "Residual graph has a negative cycle, the flow is not optimal"
+    )
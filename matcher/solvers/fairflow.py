@@ -1,9 +1,9 @@
-from collections import defaultdict
 from ortools.graph.python import min_cost_flow
 import numpy as np
 import uuid
 import time
 from .core import SolverException
+from .candidates import top_k_candidates, covers_all_pairs
 import logging
 
 
@@ -39,6 +39,9 @@ class FairFlow(object):
         allow_zero_score_assignments=False,
         solution=None,
         logger=logging.getLogger(__name__),
+        candidate_k=None,
+        makespan_tol=1e-3,
+        makespan_bracket=None,
     ):
         """
         Initialize a makespan flow matcher
@@ -50,6 +53,13 @@ class FairFlow(object):
         :param allow_zero_score_assignments: bool to allow pairs with zero affinity in the solution.
             unknown matching scores default to 0. set to True to allow zero (unknown) affinity in solution.
         :param solution: a matrix of assignments (same shape as encoder.affinity_matrix)
+        :param candidate_k: if set, the assignment networks only contain pairs where the reviewer is among the
+            top-k reviewers of the paper or the paper is among the top-k papers of the reviewer. k is doubled
+            whenever a network has no solution.
+        :param makespan_tol: the makespan search stops once the gap between the highest successful and the
+            lowest failed makespan is within this fraction of the makespan upper bound.
+        :param makespan_bracket: optional (lower, upper) guesses for the makespan, e.g. from a previous run on
+            the same venue, used to start the makespan search.
 
         :return: initialized makespan matcher.
         """
@@ -107,6 +117,11 @@ class FairFlow(object):
                 )
             )
 
+        self.candidate_k = candidate_k
+        self.candidates = self._candidates()
+        self.makespan_tol = makespan_tol
+        self.makespan_bracket = makespan_bracket
+
         self.max_affinities = np.max(self.affinity_matrix)
         self.big_c = 10000
         self.bigger_c = self.big_c**2
@@ -118,6 +133,8 @@ class FairFlow(object):
         self.costs = []
         self.source = self.num_reviewers + self.num_papers
         self.sink = self.num_reviewers + self.num_papers + 1
+        # reviewer -> paper assignment network, built on first use.
+        self.assignment_mcf = None
         self.solved = False
         self.logger.debug("End Init FairFlow")
 
@@ -144,6 +161,18 @@ class FairFlow(object):
 
         self.logger.debug("Finished checking graph inputs")
 
+    def _candidates(self):
+        """Boolean matrix (same shape as self.affinity_matrix) of the pairs used in assignment networks."""
+        if self.candidate_k is None:
+            return np.ones(self.affinity_matrix.shape, dtype=bool)
+
+        eligible = self.constraint_matrix.T == 0
+        if not self.allow_zero_score_assignments:
+            eligible &= self.affinity_matrix != 0
+        return top_k_candidates(
+            self.affinity_matrix.T, self.candidate_k, eligible=eligible.T
+        ).T
+
     def objective_val(self):
         """Get the objective value of the RAP."""
         return np.sum(self.sol_as_mat() * self.orig_affinities)
@@ -174,12 +203,11 @@ class FairFlow(object):
             A 3-tuple of paper ids.
         """
         paper_scores = np.sum(self.solution * self.affinity_matrix, axis=0)
-        g1 = np.where(paper_scores >= self.makespan)[0]
-        g2 = np.intersect1d(
-            np.where(self.makespan > paper_scores),
-            np.where(paper_scores >= self.makespan - self.max_affinities),
-        )
-        g3 = np.where(self.makespan - self.max_affinities > paper_scores)[0]
+        in_g1 = paper_scores >= self.makespan
+        in_g3 = paper_scores < self.makespan - self.max_affinities
+        g1 = np.flatnonzero(in_g1)
+        g2 = np.flatnonzero(~in_g1 & ~in_g3)
+        g3 = np.flatnonzero(in_g3)
 
         return g1, g2, g3
 
@@ -192,10 +220,10 @@ class FairFlow(object):
         Returns:
             A tuple of rows and columns of the
         """
-        mask = (self.solution - 1.0) * -self.big_c
-        tmp = (mask + self.affinity_matrix).astype("float")
-        worst_revs = np.argmin(tmp, axis=0)
-        return worst_revs[papers], papers
+        # unassigned reviewers get a large penalty so that they are never picked.
+        penalty = (1.0 - self.solution[:, papers]) * self.big_c
+        worst_revs = np.argmin(self.affinity_matrix[:, papers] + penalty, axis=0)
+        return worst_revs, papers
 
     def _construct_and_solve_validifier_network(self):
         """Construct a network to make an invalid solution valid.
@@ -219,14 +247,7 @@ class FairFlow(object):
                 self.demands - np.sum(self.solution, axis=0), 0
             )
             if flow > 0:
-                self._construct_graph_and_solve(
-                    self.num_reviewers,
-                    self.num_papers,
-                    rev_caps,
-                    pap_caps,
-                    self.affinity_matrix,
-                    flow,
-                )
+                self._construct_graph_and_solve(rev_caps, pap_caps, flow)
 
         # Now compute the residual flow that must be routed so that each paper
         # is sufficiently reviewed. Also compute residual maximums and demands.
@@ -234,14 +255,7 @@ class FairFlow(object):
         rev_caps = self.maximums - np.sum(self.solution, axis=1)
         pap_caps = np.maximum(self.demands - np.sum(self.solution, axis=0), 0)
         flow = np.sum(pap_caps)
-        self._construct_graph_and_solve(
-            self.num_reviewers,
-            self.num_papers,
-            rev_caps,
-            pap_caps,
-            self.affinity_matrix,
-            flow,
-        )
+        self._construct_graph_and_solve(rev_caps, pap_caps, flow)
 
         # Finally, check validity and return.
         if not (np.all(np.sum(self.solution, axis=0) == self.demands)):
@@ -280,137 +294,94 @@ class FairFlow(object):
         Returns:
             None -- modifies the internal min_cost_flow network.
         """
-        # Must convert to python ints first.
-        g1 = [int(x) for x in g1]
-        g2 = [int(x) for x in g2]
-        g3 = [int(x) for x in g3]
-
+        n_rev, n_pap = self.num_reviewers, self.num_papers
+        dummy_offset = n_rev + n_pap + 2
         pap_scores = np.sum(self.solution * self.affinity_matrix, axis=0)
+        ms_lb = self.makespan - self.max_affinities
 
-        # First construct edges between the source and each pap in g1.
-        self._refresh_internal_vars()
-        for i in range(np.size(g1)):
-            self.start_inds.append(self.source)
-            self.end_inds.append(self.num_reviewers + g1[i])
-            self.caps.append(1)
-            self.costs.append(0)
-
-        # Next construct the sink node and edges to each paper in g3.
-        papers_needing_no_assignments = 0
-        for i in range(np.size(g3)):
-            if not self.demands[g3[i]]:
-                continue
-            self.start_inds.append(self.num_reviewers + g3[i])
-            self.end_inds.append(self.sink)
-            edge_capacity = 1
-            self.caps.append(edge_capacity)
-            self.costs.append(0)
-            papers_needing_no_assignments += 1 - edge_capacity
-
-        # For each paper in g2, create a dummy node the restricts the flow to
-        # that paper to 1.
-        for pap2 in g2:
-            self.start_inds.append(
-                self.num_reviewers + self.num_papers + 2 + pap2
-            )
-            self.end_inds.append(self.num_reviewers + pap2)
-            self.caps.append(1)
-            self.costs.append(0)
+        # pairs a reviewer may be newly assigned to.
+        assignable = (self.solution == 0.0) & (self.constraint_matrix.T == 0.0)
+        if not self.allow_zero_score_assignments:
+            assignable &= self.affinity_matrix != 0.0
 
         # For each assignment in the g1 group, reverse the flow.
-        revs, paps1 = np.nonzero(self.solution[:, g1])
-        assignment_to_give = set()
-        added = set()
-        pg2_to_minaff = defaultdict(lambda: np.inf)  # min incoming affinity.
-        for i in range(np.size(revs)):
-            rev = int(revs[i])
-            pap = g1[paps1[i]]
-            assert self.solution[rev, pap] == 1.0
-            self.start_inds.append(self.num_reviewers + pap)
-            self.end_inds.append(rev)
-            self.caps.append(1)
-            self.costs.append(0)
-            assignment_to_give.add(rev)
-
-            # and now connect this reviewer to each dummy paper associate with
-            # a paper in g2 if that rev not already been assigned to that paper.
-            if rev not in added:
-                for pap2 in g2:
-                    if (
-                        self.solution[rev, pap2] == 0.0
-                        and self.constraint_matrix[pap2, rev] == 0.0
-                    ):
-                        rp_aff = self.affinity_matrix[rev, pap2]
-                        if self.allow_zero_score_assignments or rp_aff != 0.0:
-                            self.start_inds.append(rev)
-                            self.end_inds.append(
-                                self.num_reviewers + self.num_papers + 2 + pap2
-                            )
-                            pg2_to_minaff[pap2] = min(
-                                pg2_to_minaff[pap2], rp_aff
-                            )
-
-                            self.caps.append(1)
-                            self.costs.append(0)
-                added.add(rev)
+        g1_revs, g1_paps = np.nonzero(self.solution[:, g1])
+        g1_paps = g1[g1_paps]
+        from_g1 = np.zeros(n_rev, dtype=bool)
+        from_g1[g1_revs] = True
+
+        # and now connect each of these reviewers to the dummy paper associated
+        # with each paper in g2 that reviewer has not been assigned to.
+        to_g2 = assignable[:, g2] & from_g1[:, np.newaxis]
+        dummy_revs, dummy_paps = np.nonzero(to_g2)
+        dummy_paps = g2[dummy_paps]
+        # min incoming affinity of each paper in g2.
+        g2_min_in = np.min(
+            np.where(to_g2, self.affinity_matrix[:, g2], np.inf),
+            axis=0,
+            initial=np.inf,
+        )
+
         # For each paper in g2, reverse the flow to assigned revs only if the
         # reversal, plus the min edge coming in from G1 wouldn't violate ms.
-        revs, paps2 = np.nonzero(self.solution[:, g2])
-        for i in range(np.size(revs)):
-            rev = int(revs[i])
-            pap = g2[paps2[i]]
-            pap_score = pap_scores[pap]
-            assert self.solution[rev, pap] == 1.0
-            min_in = pg2_to_minaff[pap]
-            rp_aff = self.affinity_matrix[rev, pap]
-            # lower bound on new paper score.
-            lower_bound = pap_score + min_in - rp_aff
-            ms_satisfied = (self.makespan - self.max_affinities) <= lower_bound
-            if min_in < np.inf and ms_satisfied:
-                self.start_inds.append(self.num_reviewers + pap)
-                self.end_inds.append(rev)
-                self.caps.append(1)
-                self.costs.append(0)
-                assignment_to_give.add(rev)
-
-        # For each reviewer, connect them to a paper in g3 if not assigned.
-        for rev in assignment_to_give:
-            for pap3 in g3:
-                if (
-                    self.solution[rev, pap3] == 0.0
-                    and self.constraint_matrix[pap3, rev] == 0.0
-                ):
-                    rp_aff = self.affinity_matrix[rev, pap3]
-                    if self.allow_zero_score_assignments or rp_aff != 0.0:
-                        self.start_inds.append(rev)
-                        self.end_inds.append(self.num_reviewers + pap3)
-                        self.caps.append(1)
-                        lb = self.makespan - self.max_affinities
-                        pap_score = pap_scores[pap3]
-                        # give a bigger reward if assignment would improve group.
-                        if rp_aff + pap_score >= lb:
-                            self.costs.append(
-                                int(-1.0 - self.bigger_c * rp_aff)
-                            )
-                        else:
-                            self.costs.append(int(-1.0 - self.big_c * rp_aff))
-
-        flow = int(
-            min(np.size(g3) - papers_needing_no_assignments, np.size(g1))
+        g2_revs, g2_cols = np.nonzero(self.solution[:, g2])
+        g2_paps = g2[g2_cols]
+        # lower bound on new paper score.
+        lower_bound = (
+            pap_scores[g2_paps]
+            + g2_min_in[g2_cols]
+            - self.affinity_matrix[g2_revs, g2_paps]
         )
-        self.supplies = np.zeros(self.num_reviewers + self.num_papers + 2)
+        reversible = (g2_min_in[g2_cols] < np.inf) & (ms_lb <= lower_bound)
+        g2_revs, g2_paps = g2_revs[reversible], g2_paps[reversible]
+
+        # Connect each reviewer that may be unassigned to each paper in g3
+        # it may be assigned to.
+        assignment_to_give = from_g1.copy()
+        assignment_to_give[g2_revs] = True
+        to_g3 = assignable[:, g3] & assignment_to_give[:, np.newaxis]
+        g3_revs, g3_paps = np.nonzero(to_g3)
+        g3_paps = g3[g3_paps]
+        g3_aff = self.affinity_matrix[g3_revs, g3_paps]
+        # give a bigger reward if assignment would improve group.
+        g3_costs = np.where(
+            g3_aff + pap_scores[g3_paps] >= ms_lb,
+            -1.0 - self.bigger_c * g3_aff,
+            -1.0 - self.big_c * g3_aff,
+        ).astype(np.int64)
+
+        # Source to each paper in g1, each paper in g3 (that needs reviews) to
+        # the sink, and for each paper in g2 a dummy node that restricts the
+        # flow to that paper to 1.
+        sink_paps = g3[np.asarray(self.demands)[g3] > 0]
+        arcs = [
+            (np.full(len(g1), self.source), n_rev + g1, 0),
+            (n_rev + sink_paps, np.full(len(sink_paps), self.sink), 0),
+            (dummy_offset + g2, n_rev + g2, 0),
+            (n_rev + g1_paps, g1_revs, 0),
+            (dummy_revs, dummy_offset + dummy_paps, 0),
+            (n_rev + g2_paps, g2_revs, 0),
+            (g3_revs, n_rev + g3_paps, g3_costs),
+        ]
+        self.start_inds = np.concatenate([tails for tails, _, _ in arcs]).astype(np.int64)
+        self.end_inds = np.concatenate([heads for _, heads, _ in arcs]).astype(np.int64)
+        self.caps = np.ones(len(self.start_inds), dtype=np.int64)
+        self.costs = np.concatenate(
+            [np.broadcast_to(costs, len(tails)) for tails, _, costs in arcs]
+        ).astype(np.int64)
+
+        flow = int(min(np.size(g3), np.size(g1)))
+        self.supplies = np.zeros(self.num_reviewers + self.num_papers + 2, dtype=np.int64)
         self.supplies[self.source] = flow
         self.supplies[self.sink] = -flow
 
-        for i in range(len(self.start_inds)):
+        if len(self.start_inds):
             self.min_cost_flow.add_arcs_with_capacity_and_unit_cost(
-                self.start_inds[i],
-                self.end_inds[i],
-                self.caps[i],
-                self.costs[i],
+                self.start_inds, self.end_inds, self.caps, self.costs
             )
-        for i in range(len(self.supplies)):
-            self.min_cost_flow.set_nodes_supplies(i, int(self.supplies[i]))
+        self.min_cost_flow.set_nodes_supplies(
+            np.arange(len(self.supplies)), self.supplies
+        )
 
     def solve_ms_improvement(self):
         """Reassign reviewers to improve the makespan.
@@ -423,38 +394,38 @@ class FairFlow(object):
         """
         solver_status = self.min_cost_flow.solve()
         if solver_status == self.min_cost_flow.OPTIMAL:
-            num_un = 0
-            for arc in range(self.min_cost_flow.num_arcs()):
-                # Can ignore arcs leading out of source or into sink.
-                if (
-                    self.min_cost_flow.tail(arc) != self.source
-                    and self.min_cost_flow.head(arc) != self.sink
-                ):
-                    if self.min_cost_flow.flow(arc) > 0:
-                        # flow goes from tail to head
-                        head = self.min_cost_flow.head(arc)
-                        tail = self.min_cost_flow.tail(arc)
-                        if head >= self.num_reviewers + self.num_papers + 2:
-                            # this is an edge that restricts flow to a paper
-                            pap = head - (
-                                self.num_reviewers + self.num_papers + 2
-                            )
-                            rev = tail
-                            assert self.solution[rev, pap] == 0.0
-                            self.solution[rev, pap] = 1.0
-                        elif tail >= self.num_reviewers + self.num_papers + 2:
-                            continue
-                        elif head >= self.num_reviewers:
-                            pap = head - self.num_reviewers
-                            rev = tail
-                            assert self.solution[rev, pap] == 0.0
-                            self.solution[rev, pap] = 1.0
-                            num_un += 1
-                        else:
-                            rev = head
-                            pap = tail - self.num_reviewers
-                            assert self.solution[rev, pap] == 1.0
-                            self.solution[rev, pap] = 0.0
+            # arcs are numbered in the order they were added, so they line up
+            # with self.start_inds and self.end_inds.
+            tails = np.array(self.start_inds, dtype=np.int64)
+            heads = np.array(self.end_inds, dtype=np.int64)
+            flows = self.min_cost_flow.flows(np.arange(len(tails)))
+            # Can ignore arcs leading out of source or into sink.
+            used = (flows > 0) & (tails != self.source) & (heads != self.sink)
+            tails, heads = tails[used], heads[used]
+
+            # flow goes from tail to head
+            dummy_offset = self.num_reviewers + self.num_papers + 2
+            # reviewer -> dummy node restricting the flow to a paper in g2
+            to_dummy = heads >= dummy_offset
+            # reviewer -> paper in g3
+            to_paper = (
+                (tails < self.num_reviewers)
+                & (heads >= self.num_reviewers)
+                & (heads < self.source)
+            )
+            # paper -> reviewer, unassigns the reviewer
+            to_reviewer = heads < self.num_reviewers
+
+            assign_revs = np.concatenate([tails[to_dummy], tails[to_paper]])
+            assign_paps = np.concatenate(
+                [heads[to_dummy] - dummy_offset, heads[to_paper] - self.num_reviewers]
+            )
+            unassign_revs = heads[to_reviewer]
+            unassign_paps = tails[to_reviewer] - self.num_reviewers
+            assert np.all(self.solution[assign_revs, assign_paps] == 0.0)
+            assert np.all(self.solution[unassign_revs, unassign_paps] == 1.0)
+            self.solution[assign_revs, assign_paps] = 1.0
+            self.solution[unassign_revs, unassign_paps] = 0.0
             self.valid = False
         else:
             raise SolverException(
@@ -528,7 +499,7 @@ class FairFlow(object):
             self._construct_and_solve_validifier_network()
 
         g1, g2, g3 = self._grp_paps_by_ms()
-        old_g1, old_g2, old_g3 = set(g1), set(g2), set(g3)
+        old_g3 = g3
         if np.size(g1) > 0 and np.size(g3) > 0:
             self._refresh_internal_vars()
             # Unassign the worst reviewer from each paper in g3.
@@ -554,107 +525,208 @@ class FairFlow(object):
         else:
             return np.size(g1), np.size(g3)
 
-    def _construct_graph_and_solve(self, n_rev, n_pap, _caps, _covs, ws, flow):
+    def _build_assignment_network(self):
+        """Build the reviewer -> paper assignment network.
+
+        The network holds an arc from the source to each reviewer, an arc for
+        each pair that may be assigned and an arc from each paper to the sink,
+        in that order. The arcs and their costs depend only on the affinities,
+        the constraints and the candidate pairs, so the network is built once
+        and _construct_graph_and_solve only updates capacities and supplies.
+        """
+        n_rev, n_pap = self.num_reviewers, self.num_papers
+
+        # a constraint of 0 means there's no constraint, so add an arc normally
+        # a constraint of 1 means that this user was explicitly assigned to this paper. We do not support positive constraints right now, so, do not add an arc
+        # a constraint of anything other that 0 or 1 essentially indicates a conflict, so do not add an arc
+        eligible = self.candidates & (self.constraint_matrix.T == 0)
+        if not self.allow_zero_score_assignments:
+            eligible &= self.affinity_matrix != 0
+        self.pair_revs, self.pair_paps = np.nonzero(eligible)
+        # Costs must be integers. Also, we have affinities so make the "costs" negative affinities.
+        pair_costs = (
+            -1.0 - self.big_c * self.affinity_matrix[self.pair_revs, self.pair_paps]
+        ).astype(np.int64)
+
+        tails = np.concatenate(
+            [
+                np.full(n_rev, self.source),
+                self.pair_revs,
+                n_rev + np.arange(n_pap),
+            ]
+        )
+        heads = np.concatenate(
+            [
+                np.arange(n_rev),
+                n_rev + self.pair_paps,
+                np.full(n_pap, self.sink),
+            ]
+        )
+        costs = np.concatenate(
+            [np.zeros(n_rev, dtype=np.int64), pair_costs, np.zeros(n_pap, dtype=np.int64)]
+        )
+
+        self.assignment_mcf = min_cost_flow.SimpleMinCostFlow()
+        self.assignment_mcf.add_arcs_with_capacity_and_unit_cost(
+            tails.astype(np.int64),
+            heads.astype(np.int64),
+            np.zeros(len(tails), dtype=np.int64),
+            costs,
+        )
+        self.pair_arcs = n_rev + np.arange(len(self.pair_revs))
+
+    def _construct_graph_and_solve(self, _caps, _covs, flow):
         """Solve min-cost-flow.
 
         Args:
-            n_rev - (int) number of reviewers (sources)
-            n_pap - (int) number of papers (sinks)
             _caps - (array of ints) capacities for each reviewer
             _covs - (array of ints) demands for each paper
-            ws - (matrix) affinities between reviewers and papers.
             flow - (int) total flow from revs to paps (some of demands)
 
         Returns:
             None -- but sets self.solution to be a binary matrix containing the
             assignment of reviewers to papers.
         """
-        source = n_rev + n_pap
-        sink = n_rev + n_pap + 1
-
-        mcf = min_cost_flow.SimpleMinCostFlow()
-
-        # edges from source to reviewers.
-        for i in range(n_rev):
-            if int(_caps[i]) > 0:
-                mcf.add_arcs_with_capacity_and_unit_cost(source, i, int(_caps[i]), 0)
-
-        # edges from reviewers to papers.
-        for i in range(n_rev):
-            for j in range(n_pap):
-                arc_cap = 1
-                if self.solution[i, j] == 1:
-                    continue
-
-                edge_constraint = self.constraint_matrix[(j, i)]
-
-                # a constraint of 0 means there's no constraint, so apply the cost as normal, so add an arc normally
-                # a constraint of 1 means that this user was explicitly assigned to this paper. We do not support positive constraints right now, so, do not add an arc
-                # a constraint of anything other that 0 or 1 essentially indicates a conflict, so do not add an arc
-                if edge_constraint == 0 and (
-                    self.allow_zero_score_assignments or ws[i, j] != 0
-                ):
-                    # Costs must be integers. Also, we have affinities so make the "costs" negative affinities.
-                    mcf.add_arcs_with_capacity_and_unit_cost(
-                        i,
-                        n_rev + j,
-                        int(arc_cap),
-                        int(-1.0 - self.big_c * ws[i, j]),
-                    )
-
-        # edges from papers to sink.
-        for j in range(n_pap):
-            if int(_covs[j]) > 0:
-                mcf.add_arcs_with_capacity_and_unit_cost(
-                    n_rev + j, sink, int(_covs[j]), 0
-                )
-
-        supplies = np.zeros(n_rev + n_pap + 2)
-        supplies[source] = int(flow)
-        supplies[sink] = int(-flow)
-
-        # set Node supply for this MCF.
-        for i in range(len(supplies)):
-            mcf.set_nodes_supplies(i, int(supplies[i]))
+        if self.assignment_mcf is None:
+            self._build_assignment_network()
+        mcf = self.assignment_mcf
+
+        # pairs that are already assigned get no capacity.
+        pair_caps = 1 - self.solution[self.pair_revs, self.pair_paps]
+        caps = np.concatenate(
+            [np.maximum(_caps, 0), pair_caps, np.maximum(_covs, 0)]
+        ).astype(np.int64)
+        mcf.set_arc_capacities(np.arange(mcf.num_arcs()), caps)
+
+        supplies = np.zeros(self.num_reviewers + self.num_papers + 2, dtype=np.int64)
+        supplies[self.source] = int(flow)
+        supplies[self.sink] = int(-flow)
+        mcf.set_nodes_supplies(np.arange(len(supplies)), supplies)
 
         # Solve.
         solver_status = mcf.solve()
         if solver_status == mcf.OPTIMAL:
-            for arc in range(mcf.num_arcs()):
-                # Can ignore arcs leading out of source or into sink.
-                if mcf.tail(arc) != source and mcf.head(arc) != sink:
-                    if mcf.flow(arc) > 0:
-                        rev = mcf.tail(arc)
-                        pap = mcf.head(arc) - n_rev
-                        assert self.solution[rev, pap] == 0.0
-                        self.solution[rev, pap] = 1.0
+            assigned = mcf.flows(self.pair_arcs) > 0
+            revs, paps = self.pair_revs[assigned], self.pair_paps[assigned]
+            assert np.all(self.solution[revs, paps] == 0.0)
+            self.solution[revs, paps] = 1.0
             self.solved = True
+        elif self.candidate_k is not None and not covers_all_pairs(
+            self.candidate_k, self.affinity_matrix.shape
+        ):
+            self.candidate_k *= 2
+            self.logger.debug(
+                "Pruned network has no solution, growing candidate_k to {}".format(
+                    self.candidate_k
+                )
+            )
+            self.candidates = self._candidates()
+            self.assignment_mcf = None
+            self._construct_graph_and_solve(_caps, _covs, flow)
         else:
             raise SolverException(
                 "Solver could not find a solution. Try (1) increasing max papers (2) adding more reviewers or (3) using only more recent history for computing conflicts in the Paper Matching Setup to reduce conflicts."
             )
 
-    def find_ms(self):
+    def makespan_upper_bound(self):
+        """Upper bound of the makespans for which the search can succeed.
+
+        A makespan T succeeds only if every paper scores at least
+        T - max affinity, and a paper scores at most the sum of its best allowed
+        affinities.
+        """
+        bound = np.max(self.affinity_matrix) * np.max(self.demands)
+        if self.num_papers == 0 or self.num_reviewers == 0:
+            return bound
+        demands = np.minimum(np.asarray(self.demands, dtype=int), self.num_reviewers)
+        # only the max(demands) best allowed affinities of each paper are sorted
+        k = int(np.max(demands))
+        negated = np.where(self.constraint_matrix.T == 0, -self.affinity_matrix, 0.0)
+        if 0 < k < self.num_reviewers:
+            negated.partition(k - 1, axis=0)
+        best_first = -np.sort(negated[:k], axis=0)
+        top_scores = np.vstack(
+            [np.zeros(self.num_papers), np.cumsum(best_first, axis=0)]
+        )
+        max_paper_scores = top_scores[demands, np.arange(self.num_papers)]
+        return min(bound, np.min(max_paper_scores) + self.max_affinities)
+
+    def _score_quantum(self, cells_per_block=10**6):
+        """Spacing of the paper score levels, or None if the affinities are not on a decimal grid.
+
+        Paper scores are sums of affinities, so if all affinities are multiples
+        of 10^-d, so are all paper scores and the makespan bounds they are
+        compared with. The affinities are checked in blocks of rows of about
+        `cells_per_block` cells, so only one block is scaled at a time.
+        """
+        block_size = max(1, cells_per_block // max(1, self.num_papers))
+        decimals = 0
+        start = 0
+        while start < self.num_reviewers:
+            scaled = self.affinity_matrix[start : start + block_size] * 10**decimals
+            if np.allclose(scaled, np.round(scaled), rtol=0.0, atol=1e-6):
+                start += block_size
+            else:
+                # try the next grid from the first block again
+                decimals += 1
+                start = 0
+                if decimals == 7:
+                    return None
+        return 10.0**-decimals
+
+    def find_ms(self, mn=None, mx=None):
         """Find the highest possible makespan.
 
         Perform a binary search on the makespan value. Solve the RAP with each
         makespan value and return the solution corresponding to the makespan
         which achieves the largest minimum paper score.
 
+        The search runs at most 10 probes on the bracket [0, upper bound],
+        trying the guesses mx and then mn first if they are given and still
+        inside the bracket. It stops early once the bracket is narrower than
+        makespan_tol times the upper bound, or once every probe inside it would
+        group the papers like an end that was already tried: when the
+        affinities lie on a decimal grid, makespans between two adjacent paper
+        score levels give the same groups.
+
         Args:
-            None
+            mn - a guess of a successful makespan (optional, checked before use).
+            mx - a guess of the highest successful makespan (optional, checked
+                 before use). The search goes above it if it succeeds.
 
         Return:
             Highest feasible makespan value found.
         """
-        mn = 0.0
-        mx = np.max(self.affinity_matrix) * np.max(self.demands)
-        ms = (mx - mn) / 2.0
-        self.makespan = ms
+        upper_bound = self.makespan_upper_bound()
+        trials = [guess for guess in [mx, mn] if guess is not None]
+        mn, mx = 0.0, upper_bound
+        tol = self.makespan_tol * upper_bound
+        quantum = self._score_quantum()
+        mx_tried = False
         best = None
         best_worst_pap_score = 0.0
 
+        def level(ms):
+            return np.ceil(ms / quantum - 1e-9)
+
+        def next_trial():
+            # guesses that the bracket has not ruled out yet, then bisection
+            while trials:
+                ms = trials.pop(0)
+                if mn < ms < mx:
+                    return ms
+            return mn + (mx - mn) / 2.0
+
         for i in range(10):
+            if mx - mn <= tol or (
+                quantum is not None and level(mx) - level(mn) <= int(mx_tried)
+            ):
+                self.logger.debug(
+                    "#info FairFlow:bracket [%s, %s] cannot be narrowed further" % (mn, mx)
+                )
+                break
+            ms = next_trial()
+            self.makespan = ms
             self.logger.debug("#info FairFlow:ITERATION %s ms %s" % (i, ms))
             try:
                 s1, s3 = self.try_improve_ms()
@@ -707,11 +779,9 @@ class FairFlow(object):
                 best = ms
                 best_worst_pap_score = worst_pap_score
                 mn = ms
-                ms += (mx - ms) / 2.0
             else:
                 mx = ms
-                ms -= (ms - mn) / 2.0
-            self.makespan = ms
+                mx_tried = True
             self.solution = self.starter_solution.copy()
         self.logger.debug("#info FairFlow:Best found %s" % best)
         self.logger.debug(
@@ -737,7 +807,7 @@ class FairFlow(object):
         """
 
         self._validate_input_range()
-        ms = self.find_ms()
+        ms = self.find_ms(*(self.makespan_bracket or (None, None)))
         self.makespan = ms
         s1, s3 = self.try_improve_ms()
         can_improve = s3 > 0
@@ -6,17 +6,19 @@ import math
 import json
 import psutil
 from .core import SolverException
+from .lp_backends import make_backend, OPTIMAL, INFEASIBLE, TIME_LIMIT
 
 from .basic_gurobi import Basic
-from gurobipy import *
 from scipy import sparse
-from itertools import product
 
 class FairIR(Basic):
     """Fair paper matcher via iterative relaxation.
 
     """
 
+    # Lowest relative makespan search tolerance, above float resolution
+    MIN_MAKESPAN_TOL = 1e-9
+
     def __init__(
         self,
         minimums,
@@ -26,6 +28,12 @@ class FairIR(Basic):
         thresh=0.0,
         ##thresh=0.005, ## default value for NeurIPS
         allow_zero_score_assignments=False,
+        lazy_constraints=False,
+        lp_backend="gurobi",
+        makespan_tol=1e-3,
+        makespan_bracket=None,
+        time_limit=None,
+        mip_gap=1e-4,
         logger=logging.getLogger(__name__)
         ):
         """Initialize.
@@ -40,6 +48,19 @@ class FairIR(Basic):
             weights (stored in encoder) - the affinity matrix (np.array) of papers to reviewers.
                    Rows correspond to reviewers and columns correspond to
                    papers.
+            lazy_constraints - if True, start from the load and coverage constraints only
+                  and add the makespan and attribute constraints violated by the LP
+                  solution before re-solving, until none are violated.
+            lp_backend - the LP solver, "gurobi" or "highs" (see lp_backends).
+            makespan_tol - the makespan search stops once the gap between the highest
+                  feasible and lowest infeasible makespan is within this fraction of
+                  the makespan upper bound.
+            makespan_bracket - optional (lower, upper) guesses for the makespan, e.g. the
+                  makespan of a FairFlow solution, used to start the makespan search.
+            time_limit - optional wall clock budget of solve, in seconds. The makespan
+                  search stops after half of it, and once a fifth of it is left the
+                  remaining fractional assignments are rounded with a MIP.
+            mip_gap - relative MIP gap of the rounding MIP used when time runs out.
 
             Returns:
                 initialized makespan matcher.
@@ -63,22 +84,13 @@ class FairIR(Basic):
             reviewer_idxs = sparse_weights.row
             paper_idxs = sparse_weights.col
         else:
-            weights_list = [0] * np.size(weights)
-            reviewer_idxs, paper_idxs = [], []
-            for t in list(product(range(np.size(weights, axis=0)), range(np.size(weights, axis=1)))):
-                reviewer_idxs.append(t[0])
-                paper_idxs.append(t[1])
-
-        self.papers_by_reviewer = {r: [] for r in reviewer_idxs}
-        self.reviewers_by_paper = {p: [] for p in paper_idxs}
-        self.weights_by_rp = {}
-        self.rp_to_lp_idx = {r: {} for r in reviewer_idxs}
-        for w, r, p in zip(weights_list, reviewer_idxs, paper_idxs):
-            self.weights_by_rp[(r, p)] = w
-            
-        for r, p in zip(reviewer_idxs, paper_idxs):
-            self.papers_by_reviewer[r].append(p)
-            self.reviewers_by_paper[p].append(r)
+            reviewer_idxs, paper_idxs = np.indices(np.shape(weights)).reshape(2, -1)
+            weights_list = np.zeros(len(reviewer_idxs))
+
+        # One LP variable per (reviewer, paper) pair, in reviewer-major order
+        self.var_reviewers = np.asarray(reviewer_idxs, dtype=np.int64)
+        self.var_papers = np.asarray(paper_idxs, dtype=np.int64)
+        self.var_weights = np.asarray(weights_list, dtype=float)
 
         self.logger = logger
         self.n_rev = np.size(weights, axis=0)
@@ -100,14 +112,11 @@ class FairIR(Basic):
         }]
         '''
 
-        # Build set of forced tuples (r, p)
-        forced_list = []
-        for r in self.papers_by_reviewer.keys():
-            for p in self.papers_by_reviewer[r]:
-                if forced_matrix[r, p] == 1:
-                    forced_list.append(
-                        (r, p)
-                    )
+        # Forced (r, p) pairs, as a mask over the LP variables and counted per paper
+        forced_vars = forced_matrix[self.var_reviewers, self.var_papers] == 1
+        self.forced_per_paper = np.bincount(
+            self.var_papers[forced_vars], minlength=self.n_pap
+        )
 
         if not self.allow_zero_score_assignments:
             # Find reviewers with no non-zero affinity edges after constraints are applied and remove their load_lb
@@ -129,12 +138,17 @@ class FairIR(Basic):
 
         self._log_and_profile('Setting up model')
         self.id = uuid.uuid4()
-        self.m = Model("%s : FairIR" % str(self.id))
-        self.m.setParam('Threads', 50)
+        self.m = make_backend(lp_backend, "%s : FairIR" % str(self.id))
         self.makespan = thresh
         self.solution = None
-
-        self.m.setParam('OutputFlag', 0)
+        self.lazy_constraints = lazy_constraints
+        self.makespan_tol = makespan_tol
+        self.makespan_bracket = makespan_bracket
+        self.time_limit = time_limit
+        self.mip_gap = mip_gap
+        self.deadline = None
+        self.makespan_achieved = None
+        self._top_weights = None
 
         self.load_ub_name = 'lib'
         self.load_lb_name = 'llb'
@@ -142,117 +156,194 @@ class FairIR(Basic):
         self.ms_constr_prefix = 'ms'
         self.round_constr_prefix = 'round'
 
-        # primal variables
+        # primal variables (forced assignments are fixed to 1)
         start = time.time()
-        self.lp_vars = []
-        self.r_to_lp_idx = {}
-        for rev_idx, i in enumerate(self.papers_by_reviewer.keys()):
-            self.lp_vars.append([])
-            papers = self.papers_by_reviewer[i]
-            self.r_to_lp_idx[i] = rev_idx
-            for idx, j in enumerate(papers):
-                self.rp_to_lp_idx[i][j] = idx
-                self.lp_vars[rev_idx].append(self.m.addVar(ub=1.0,
-                                                     name=self.var_name(i, j)))
-        self.m.update()
+        num_vars = len(self.var_reviewers)
+        self.m.add_variables(forced_vars.astype(float), np.ones(num_vars))
+
+        # the variables of the i-th reviewer with variables start at reviewer_starts[i]
+        reviewer_starts = np.flatnonzero(
+            np.diff(self.var_reviewers, prepend=-1)
+        )
+        self.reviewer_starts = reviewer_starts
         self._log_and_profile('#info FairIR:Time to add vars %s' % (time.time() - start))
 
         start = time.time()
         # set the objective
-        obj = LinExpr()
-        for rev_idx, i in enumerate(self.papers_by_reviewer.keys()):
-            papers = self.papers_by_reviewer[i]
-            for paper_idx, j in enumerate(papers):
-                obj += self.weights[i][j] * self.lp_vars[rev_idx][paper_idx]
-        self.m.setObjective(obj, GRB.MAXIMIZE)
+        self.m.set_objective(self.var_weights, maximize=True)
         self._log_and_profile('#info FairIR:Time to set obj %s' % (time.time() - start))
 
         start = time.time()
+        self.name_to_constraint = {}
+        # attribute constraints not added to the model yet (lazy mode only)
+        self.pending_attr_constraints = []
+        var_idxs = np.arange(num_vars)
+        ones = np.ones(num_vars)
+        # rows: reviewers with at least one variable
+        lp_reviewers = self.var_reviewers[reviewer_starts]
+        reviewer_rows = sparse.csr_matrix(
+            (ones, (np.searchsorted(lp_reviewers, self.var_reviewers), var_idxs)),
+            shape=(len(lp_reviewers), num_vars)
+        )
+        # rows: papers
+        self.paper_rows = sparse.csr_matrix(
+            (ones, (self.var_papers, var_idxs)), shape=(self.n_pap, num_vars)
+        )
+        # rows: papers, weighted by affinity
+        self.weighted_paper_rows = sparse.csr_matrix(
+            (self.var_weights, (self.var_papers, var_idxs)), shape=(self.n_pap, num_vars)
+        )
+
         # load upper bound constraints.
-        for r_idx, r in enumerate(self.papers_by_reviewer.keys()):
-            load = self.loads[r]
-            self.m.addConstr(sum(self.lp_vars[r_idx]) <= load,
-                             self.lub_constr_name(r))
+        self._add_constraints(
+            reviewer_rows, '<', np.array(self.loads, dtype=float)[lp_reviewers],
+            [self.lub_constr_name(r) for r in lp_reviewers]
+        )
 
         # load load bound constraints.
         if self.loads_lb is not None:
-            for r_idx, r in enumerate(self.papers_by_reviewer.keys()):
-                load = self.loads_lb[r]
-                self.m.addConstr(sum(self.lp_vars[r_idx]) >= load,
-                                 self.llb_constr_name(r))
+            self._add_constraints(
+                reviewer_rows, '>', np.array(self.loads_lb, dtype=float)[lp_reviewers],
+                [self.llb_constr_name(r) for r in lp_reviewers]
+            )
 
         # coverage constraints.
-        for p, cov in enumerate(self.coverages):
-            reviewers = self.reviewers_by_paper[p]
-            self.m.addConstr(sum([self.lp_vars[self.r_to_lp_idx[i]][self._paper_number_to_lp_idx(i, p)]
-                                  for i in reviewers]) == cov,
-                             self.cov_constr_name(p))
+        self._add_constraints(
+            self.paper_rows, '=', np.array(self.coverages, dtype=float),
+            [self.cov_constr_name(p) for p in range(self.n_pap)]
+        )
 
         self._log_and_profile('#info FairIR:Time to set loads and coverage %s' % (time.time() - start))
 
-        # forced assignment constraints.
-        for forced in forced_list:
-            reviewer, paper = forced[0], forced[1]
-            self.fix_assignment(self.r_to_lp_idx[reviewer], self._paper_number_to_lp_idx(reviewer, paper), 1)
-
         # attribute constraints.
         if self.attr_constraints is not None:
             self._log_and_profile(f"Attribute constraints detected")
+            coverages = np.asarray(self.coverages)
+            self._member_rows_by_group = {}
             for constraint_dict in self.attr_constraints:
                 constraint_start = time.time()
                 name, bound, comparator, members = constraint_dict['name'], constraint_dict['bound'], constraint_dict['comparator'], constraint_dict['members']
-                for p in range(self.n_pap):
-                    reviewers = self.reviewers_by_paper[p]
-                    overlap = set(reviewers).intersection(set(members))
-
-                    # Check number of forced assignments and adjust bounds
-                    num_forced = 0
-                    for forced in forced_list:
-                        if p == forced[1]:
-                            num_forced += 1
-
-                    remaining_demand = self.coverages[p] - num_forced
-
-                    if comparator == '==':
-                        adj_bound = bound if remaining_demand >= bound else remaining_demand
-                        self.m.addConstr(sum([self.lp_vars[self.r_to_lp_idx[i]][self._paper_number_to_lp_idx(i, p)]
-                                    for i in overlap]) == adj_bound,
-                                    self.attr_constr_name(name, p))
-                    elif comparator == '>=':
-                        adj_bound = bound if remaining_demand >= bound else remaining_demand
-                        self.m.addConstr(sum([self.lp_vars[self.r_to_lp_idx[i]][self._paper_number_to_lp_idx(i, p)]
-                                    for i in overlap]) >= adj_bound,
-                                    self.attr_constr_name(name, p))
-                    elif comparator == '<=':
-                        adj_bound = bound if num_forced <= bound else min(bound + num_forced, self.coverages[p])
-                        self.m.addConstr(sum([self.lp_vars[self.r_to_lp_idx[i]][self._paper_number_to_lp_idx(i, p)]
-                                    for i in overlap]) <= adj_bound,
-                                    self.attr_constr_name(name, p))
+                if comparator not in self.attr_senses:
+                    continue
+                # Adjust bounds by the number of forced assignments of each paper
+                num_forced = self.forced_per_paper
+                remaining_demand = coverages - num_forced
+                if comparator == '==' or comparator == '>=':
+                    adj_bounds = np.where(remaining_demand >= bound, bound, remaining_demand)
+                elif comparator == '<=':
+                    adj_bounds = np.where(num_forced <= bound, bound, np.minimum(bound + num_forced, coverages))
+
+                # row p sums the variables of paper p whose reviewer is a member
+                self._add_attribute_constraints(
+                    self._member_rows(members), self.attr_senses[comparator], adj_bounds.astype(float),
+                    [self.attr_constr_name(name, p) for p in range(self.n_pap)]
+                )
                 # self._log_and_profile(f"Time to add {len(members)} {name} constraints: {time.time() - constraint_start}")
 
-                ## Don't call it for every consraint iteration
-                ## self.m.update()
-
         # makespan constraints.
-        for p in range(self.n_pap):
-            reviewers = self.reviewers_by_paper[p]
-            self.m.addConstr(sum([self.lp_vars[self.r_to_lp_idx[i]][self._paper_number_to_lp_idx(i, p)] * self.weights[i][p]
-                                  for i in reviewers]) >= self.makespan,
-                             self.ms_constr_name(p))
-        self.m.update()
+        # makespan_papers - papers whose makespan constraint is in effect
+        # makespan_added - papers whose makespan constraint is in the model
+        self.makespan_papers = np.ones(self.n_pap, dtype=bool)
+        self.makespan_added = np.zeros(self.n_pap, dtype=bool)
+        if not self.lazy_constraints:
+            self._add_makespan_constraints(np.arange(self.n_pap))
         self._log_and_profile('#info FairIR:Time to add all constraints %s' % (time.time() - start))
 
-        # Store constraints
-        self.name_to_constraint = {}
-        for c in self.m.getConstrs():
-            self.name_to_constraint[c.ConstrName] = c
+    attr_senses = {'==': '=', '>=': '>', '<=': '<'}
+
+    def _add_constraints(self, rows, sense, rhs, names):
+        """Add the constraints `rows` @ x (sense) `rhs`, one per row, named `names`."""
+        constraints = self.m.add_constraints(rows, sense, rhs, names)
+        self.name_to_constraint.update(zip(names, constraints))
+
+    def _add_attribute_constraints(self, rows, sense, rhs, names):
+        """Add the attribute constraints, or keep them pending in lazy mode."""
+        if self.lazy_constraints:
+            self.pending_attr_constraints.append(
+                (rows, sense, rhs, np.array(names), np.zeros(len(names), dtype=bool))
+            )
+        else:
+            self._add_constraints(rows, sense, rhs, names)
+
+    def _member_rows(self, members):
+        """Paper rows restricted to the variables of the given reviewers, shared by constraints on the same group."""
+        key = frozenset(members)
+        if key not in self._member_rows_by_group:
+            is_member = np.zeros(self.n_rev, dtype=bool)
+            is_member[list(key)] = True
+            self._member_rows_by_group[key] = self.paper_rows.multiply(
+                is_member[self.var_reviewers]
+            ).tocsr()
+        return self._member_rows_by_group[key]
+
+    def _add_makespan_constraints(self, papers):
+        """Add the makespan constraints of the given papers for the current makespan."""
+        self._add_constraints(
+            self.weighted_paper_rows[papers], '>', np.full(len(papers), float(self.makespan)),
+            [self.ms_constr_name(p) for p in papers]
+        )
+        self.makespan_added[papers] = True
 
-    def _paper_number_to_lp_idx(self, rev_num, paper_num):
-        papers = self.papers_by_reviewer[rev_num]
-        try:
-            return self.rp_to_lp_idx[rev_num][paper_num]
-        except:
-            raise SolverException(f"No score between paper {paper_num} and reviewer {rev_num}")
+    def _add_violated_constraints(self):
+        """Add the pending constraints violated by the current LP solution.
+
+        Returns:
+            The number of constraints added.
+        """
+        x = self.m.values()
+        tol = self.m.feasibility_tol
+        num_added = 0
+
+        pending = self.makespan_papers & ~self.makespan_added
+        if pending.any():
+            violated = np.flatnonzero(pending & (self.weighted_paper_rows @ x < self.makespan - tol))
+            self._add_makespan_constraints(violated)
+            num_added += len(violated)
+
+        for rows, sense, rhs, names, added in self.pending_attr_constraints:
+            lhs = rows @ x
+            if sense == '<':
+                violated = lhs > rhs + tol
+            elif sense == '>':
+                violated = lhs < rhs - tol
+            else:
+                violated = np.abs(lhs - rhs) > tol
+            violated = np.flatnonzero(violated & ~added)
+            self._add_constraints(rows[violated], sense, rhs[violated], names[violated].tolist())
+            added[violated] = True
+            num_added += len(violated)
+
+        return num_added
+
+    def _optimize(self, reserve=0.0):
+        """Optimize the model, adding violated constraints and re-solving in lazy mode.
+
+        Solves are limited to the time left before the deadline, if any, minus
+        `reserve` seconds kept for the phases that follow.
+        """
+        time_limit = None if self.deadline is None else self._time_left() - reserve
+        self.m.optimize(time_limit=time_limit, mip_gap=self.mip_gap)
+        while self.lazy_constraints and self.m.status() == OPTIMAL:
+            num_added = self._add_violated_constraints()
+            if num_added == 0:
+                break
+            self._log_and_profile('#info FairIR:Added %s violated constraints' % num_added)
+            time_limit = None if self.deadline is None else self._time_left() - reserve
+            self.m.optimize(time_limit=time_limit, mip_gap=self.mip_gap)
+
+    def _time_left(self):
+        """Seconds left before the deadline of solve (infinite without a time limit)."""
+        if self.deadline is None:
+            return np.inf
+        return self.deadline - time.time()
+
+    def _add_pending_constraints(self):
+        """Add all the makespan and attribute constraints not added yet in lazy mode."""
+        self._add_makespan_constraints(np.flatnonzero(self.makespan_papers & ~self.makespan_added))
+        for rows, sense, rhs, names, added in self.pending_attr_constraints:
+            pending = np.flatnonzero(~added)
+            self._add_constraints(rows[pending], sense, rhs[pending], names[pending].tolist())
+            added[pending] = True
 
     def _log_and_profile(self, log_message=""):
         conv = 1e9
@@ -315,33 +406,31 @@ class FairIR(Basic):
             Nothing.
         """
         self._log_and_profile('#info FairIR:CHANGE_MAKESPAN call')
-        for c in self.m.getConstrs():
-            if c.getAttr("ConstrName").startswith(self.ms_constr_prefix):
-                self.m.remove(c)
-                # self.m.update()
-
         self.makespan = new_makespan
 
-        if new_makespan != 0.0: ## Only add them back if the new makespan is non zero
-            for p in range(self.n_pap):
-                reviewers = self.reviewers_by_paper[p]
-                constraint_name = self.ms_constr_prefix + str(p)
-                if existing_makespans and constraint_name not in existing_makespans:
-                    continue
-                self.m.addConstr(sum([self.lp_vars[self.r_to_lp_idx[i]][self._paper_number_to_lp_idx(i, p)] * self.weights[i][p]
-                                    for i in reviewers]) >= new_makespan,
-                                self.ms_constr_prefix + str(p))
-            self.m.update()
+        self.makespan_papers[:] = new_makespan != 0.0 ## Only add them back if the new makespan is non zero
+        if existing_makespans:
+            existing_makespans = set(existing_makespans)
+            self.makespan_papers &= [self.ms_constr_name(p) in existing_makespans for p in range(self.n_pap)]
+
+        # Constraints that stay in the model only get a new right hand side, so the
+        # next optimize warm starts from the current basis
+        dropped = np.flatnonzero(self.makespan_added & ~self.makespan_papers)
+        self.m.remove_constraints([self.name_to_constraint.pop(self.ms_constr_name(p)) for p in dropped])
+        self.makespan_added[dropped] = False
+        kept = [self.name_to_constraint[self.ms_constr_name(p)] for p in np.flatnonzero(self.makespan_added)]
+        self.m.set_rhs(kept, [float(new_makespan)] * len(kept))
+
+        if not self.lazy_constraints:
+            self._add_makespan_constraints(np.flatnonzero(self.makespan_papers & ~self.makespan_added))
         self._log_and_profile('#info RETURN FairIR:CHANGE_MAKESPAN call')
 
     def sol_as_mat(self):
         self._log_and_profile('#info FairIR:SOL_AS_MAT call')
-        if self.m.status == GRB.OPTIMAL or self.m.status == GRB.SUBOPTIMAL:
+        if self.m.status() == OPTIMAL:
             self.solved = True
             solution = np.zeros((self.n_rev, self.n_pap))
-            for v in self.m.getVars():
-                i, j = self.indices_of_var(v)
-                solution[i, j] = v.x
+            solution[self.var_reviewers, self.var_papers] = self.m.values()
             self.solution = solution
             return solution
         else:
@@ -352,53 +441,55 @@ class FairIR(Basic):
     def integral_sol_found(self, precalculated=None):
         self._log_and_profile('#info FairIR:INTEGRAL_SOL_FOUND call')
         """Return true if all lp variables are integral."""
-        sol = self.sol_as_dict() if precalculated is None else precalculated
-        return all(sol[self.var_name(i, j)] == 1.0 or
-                   sol[self.var_name(i, j)] == 0.0
-                   for i in self.papers_by_reviewer.keys() for j in self.papers_by_reviewer[i])
+        sol = self.m.values() if precalculated is None else precalculated
+        return bool(np.all((sol == 1.0) | (sol == 0.0)))
 
     def fix_assignment(self, i, j, val):
         """Round the variable x_ij to val."""
-        self.lp_vars[i][j].ub = val
-        self.lp_vars[i][j].lb = val
-        
-    def fix_assignment_to_one_with_constraints(self, i, j, integral_assignments):
-        """Round the variable x_ij to 1 if the attribute constraints are obeyed : i - reviewer, j - paper"""
-        # NOTE
-        ## FIRST check integral assignments only - these should correspond to the true assignments
-        ## SECOND check lb == 1 or ub == 0 to check for assignments
-        if self.attr_constraints is not None:
-            for constraint_dict in self.attr_constraints:
-                bound, comparator, members =  constraint_dict['bound'], constraint_dict['comparator'], constraint_dict['members']
-                s = sum([integral_assignments[k][j] for k in members]) + 1 ## s = current total + 1 more assignment
+        self.fix_assignments([self.reviewer_starts[i] + j], val)
 
-                # If leq constraint and adding 1 does not violate the bound, fix assignment
-                if comparator == '<=' and s < bound:
-                    self.fix_assignment(i, j, 1.0)
-                    integral_assignments[i][j] = 1.0
-        else:
-            self.fix_assignment(i, j, 1.0)
-            integral_assignments[i][j] = 1.0
-
-    def fix_assignment_to_zero_with_constraints(self, i, j, integral_assignments):
-        """Round the variable x_ij to 1 if the attribute constraints are obeyed : i - reviewer, j - paper"""
-        # NOTE
-        ## FIRST check integral assignments only - these should correspond to the true assignments
-        ## SECOND check lb == 1 or ub == 0 to check for assignments
-        if self.attr_constraints is not None:
-            for constraint_dict in self.attr_constraints:
-                bound, comparator, members =  constraint_dict['bound'], constraint_dict['comparator'], constraint_dict['members']
-                s = sum([integral_assignments[k][j] for k in members]) + 1 ## s = current total + 1 more assignment
+    def fix_assignments(self, var_idxs, vals):
+        """Round the variables at positions var_idxs to vals, in one bound update."""
+        self.m.set_bounds(var_idxs, lb=vals, ub=vals)
 
-                # If geq or eq constraint and the bound is already satisfied, allow assignment to be 0
-                if (comparator == '==' or comparator == '>=') and s >= bound:
-                    self.fix_assignment(i, j, 0.0)
-                    integral_assignments[i][j] = 0.0
-        else:
-            self.fix_assignment(i, j, 0.0)
-            integral_assignments[i][j] = 0.0
+    def _sorted_top_weights(self):
+        """Return the max(coverages) highest affinities of each paper, best first.
 
-    def find_ms(self):
+        Only these rows are sorted, after partitioning the weights. The result is
+        computed once and shared by makespan_upper_bound and makespan_guess.
+        """
+        if self._top_weights is None:
+            k = min(int(np.max(self.coverages, initial=0)), self.n_rev)
+            if 0 < k < self.n_rev:
+                top = np.partition(-self.weights, k - 1, axis=0)[:k]
+            else:
+                top = -self.weights[:k]
+            self._top_weights = -np.sort(top, axis=0)
+        return self._top_weights
+
+    def makespan_upper_bound(self):
+        """Return the smallest, over papers, sum of the affinities of a paper's best reviewers.
+
+        A paper with coverage c cannot get more than the sum of its c highest
+        affinities, so no makespan above this value is feasible.
+        """
+        best_first = self._sorted_top_weights()
+        cumulative = np.vstack([np.zeros(self.n_pap), np.cumsum(best_first, axis=0)])
+        coverages = np.minimum(self.coverages, self.n_rev)
+        return float(np.min(cumulative[coverages, np.arange(self.n_pap)])) if self.n_pap else 0.0
+
+    def makespan_guess(self):
+        """Return a cheap guess of the makespan: the smallest, over papers, coverage
+        times the affinity of the paper's c-th best reviewer, c being its coverage.
+        """
+        best_first = self._sorted_top_weights()
+        if self.n_pap == 0 or len(best_first) == 0:
+            return 0.0
+        coverages = np.minimum(self.coverages, self.n_rev)
+        kth_best = best_first[np.maximum(coverages - 1, 0), np.arange(self.n_pap)]
+        return float(np.min(coverages * kth_best))
+
+    def find_ms(self, mn=None, mx=None):
         self._log_and_profile('#info FairIR:FIND_MS call')
         """Find an the highest possible makespan.
 
@@ -406,35 +497,77 @@ class FairIR(Basic):
         makespan LP without the integrality constraint. If we can find a
         fractional value to one of these LPs, then we can round it.
 
+        The search tries the upper guess if given, then makespan_upper_bound if the
+        upper guess was feasible, then the lower guess, and bisects until the bracket
+        is narrower than makespan_tol (at least MIN_MAKESPAN_TOL) times
+        makespan_upper_bound. Only the right hand sides of the makespan constraints
+        change between solves, so each solve warm starts from the previous basis.
+
         Args:
-            None
+            mn - a guess of a feasible makespan (optional, checked before use).
+            mx - a guess of the highest feasible makespan (optional, checked before
+                 use). The search goes above it if it is feasible.
 
         Return:
             Highest feasible makespan value found.
         """
-        mn = 0.0
-        mx = np.max(self.weights) * np.max(self.coverages)
-        ms = mx
+        upper_bound = self.makespan_upper_bound()
+        lower_guess = self.makespan_guess() if mn is None else mn
+        # makespan_upper_bound is rarely feasible, so it is only tried above a
+        # feasible upper guess
+        upper_guess = None if mx is None else min(mx, upper_bound)
+        trials = [lower_guess] if upper_guess is None else [upper_guess, lower_guess]
+        mn, mx = 0.0, upper_bound
         best = None
-        self.change_makespan(ms)
-        start = time.time()
-        self.m.optimize()
-        self._log_and_profile('#info FairIR:Time to solve %s' % (time.time() - start))
-        for i in range(10):
+
+        def feasible(ms):
+            """Whether makespan ms is feasible, None if the solve ran out of time."""
+            self.change_makespan(ms)
+            start = time.time()
+            self._optimize(reserve=search_reserve)
+            self._log_and_profile('#info FairIR:Time to solve %s' % (time.time() - start))
+            if self.m.status() == INFEASIBLE:
+                return False
+            if self.m.status() == TIME_LIMIT:
+                return None
+            assert(self.m.status() == OPTIMAL)
+            return True
+
+        # The search may use half of the time budget
+        search_reserve = 0.0 if self.time_limit is None else self.time_limit / 2.0
+
+        def out_of_time():
+            return self.deadline is not None and self._time_left() < search_reserve
+
+        def next_trial():
+            # Guesses that the bracket has not ruled out yet, then bisection
+            while trials:
+                ms = trials.pop(0)
+                if mn < ms <= mx and ms not in tried:
+                    return ms
+            return mn + (mx - mn) / 2.0
+
+        # Bisection can not narrow the bracket below float resolution
+        tol = max(self.makespan_tol, self.MIN_MAKESPAN_TOL) * upper_bound
+        tried = set()
+        i = 0
+        while mx - mn > tol and not out_of_time():
+            ms = next_trial()
+            tried.add(ms)
             self._log_and_profile('#info FairIR:ITERATION %s ms %s' % (i, ms))
-            if self.m.status == GRB.INFEASIBLE:
-                mx = ms
-                ms -= (ms - mn) / 2.0
-            else:
+            is_feasible = feasible(ms)
+            if is_feasible is None:
+                self._log_and_profile('#info FairIR:FIND_MS out of time')
+                break
+            elif is_feasible:
                 assert(best is None or ms >= best)
-                assert(self.m.status == GRB.OPTIMAL)
+                if ms == upper_guess:
+                    trials.insert(0, upper_bound)
                 best = ms
                 mn = ms
-                ms += (mx - ms) / 2.0
-            self.change_makespan(ms)
-            start = time.time()
-            self.m.optimize()
-            self._log_and_profile('#info FairIR:Time to solve %s' % (time.time() - start))
+            else:
+                mx = ms
+            i += 1
         self._log_and_profile(f'#info RETURN FairIR:FIND_MS call ms={best}')
 
         if best is None:
@@ -455,25 +588,28 @@ class FairIR(Basic):
             itr - the number of iterations of binary search for the makespan.
             log_file - the string path to the log file.
 
+        With a time_limit, the best integral assignment found before the deadline is
+        returned, and makespan_achieved is the smallest paper affinity it achieves. A
+        SolverException is raised if no integral assignment is found in time.
+
         Returns:
             The solution as a matrix.
         """
+        self.deadline = None if self.time_limit is None else time.time() + self.time_limit
         self._validate_input_range()
         if self.makespan <= 0:
             self._log_and_profile('#info FairIR: searching for fairness threshold')
-            ms = self.find_ms()
+            ms = self.find_ms(*(self.makespan_bracket or (None, None)))
         else:
             self._log_and_profile('#info FairIR: config fairness threshold: %s' % self.makespan)
             ms = self.makespan
         self.change_makespan(ms)
         self.round_fraction_iteration()
 
-        sol = {}
-        for v in self.m.getVars():
-            sol[v.varName] = v.x
-
-        self._log_and_profile('#info RETURN FairIR:SOLVE call')
-        return self.sol_as_mat().transpose()
+        solution = self.sol_as_mat()
+        self.makespan_achieved = float(np.min(np.sum(solution * self.weights, axis=0))) if self.n_pap else 0.0
+        self._log_and_profile('#info RETURN FairIR:SOLVE call makespan=%s' % self.makespan_achieved)
+        return solution.transpose()
 
     def sol_as_dict(self):
         self._log_and_profile('#info FairIR:SOL_AS_DICT call')
@@ -488,17 +624,18 @@ class FairIR(Basic):
         Returns:
             A dictionary from var_name to value (either 0 or 1)
         """
-        if self.m.status == GRB.OPTIMAL or self.m.status == GRB.SUBOPTIMAL:
+        if self.m.status() == OPTIMAL:
             self.solved = True
-            _sol = {}
-            for v in self.m.getVars():
-                _sol[v.varName] = v.x
-            return _sol
+            names = (
+                self.var_name(i, j)
+                for i, j in zip(self.var_reviewers.tolist(), self.var_papers.tolist())
+            )
+            return dict(zip(names, self.m.values().tolist()))
         else:
             raise Exception(
                 'You must have solved the model optimally or suboptimally '
                 'before calling this function.\nSTATUS %s\tMAKESPAN %f' % (
-                    self.m.status, self.makespan))
+                    self.m.status(), self.makespan))
 
     def round_fractional(self, integral_assignments, count=0):
         self._log_and_profile('#info FairIR:ROUND_FRACTIONAL call: %s' % count)
@@ -524,14 +661,18 @@ class FairIR(Basic):
         """
 
         start = time.time()
-        self.m.optimize()
+        # A slow LP must still leave round_with_mip its fifth of the time budget
+        self._optimize(reserve=0.0 if self.time_limit is None else self.time_limit / 5.0)
 
         self._log_and_profile('#info FairIR:Time to solve %s' % (time.time() - start))
 
-        if self.m.status != GRB.OPTIMAL and self.m.status != GRB.SUBOPTIMAL:
+        if self.m.status() == TIME_LIMIT:
+            self._log_and_profile('#info FairIR: The rounding LP ran out of time.')
+            return False
+
+        if self.m.status() != OPTIMAL:
             # TODO: Dump more information
-            self.m.computeIIS()
-            self.m.write("model.ilp")
+            self.m.write_infeasibility_report()
             self._log_and_profile('#info FairIR: The program is infeasible - check the model.ilp file for the problematic constraints.')
             return False
             #assert False, '%s\t%s' % (self.m.status, self.makespan)
@@ -539,76 +680,77 @@ class FairIR(Basic):
         # Check that the constraints are obeyed when fetching sol
         # attribute constraints.
         self._log_and_profile('Checking if attribute constraints exist')
-        sol = self.sol_as_dict()
+        sol = self.m.values()
 
         if self.integral_sol_found(precalculated=sol):
             return True
         else:
-            frac_assign_p = {}
-            frac_assign_r = {}
-            fractional_vars = []
+            # Find fractional vars.
+            current = integral_assignments[self.var_reviewers, self.var_papers]
+            to_zero = (sol == 0.0) & (current != 0.0)
+            to_one = (sol == 1.0) & (current != 1.0)
+            fractional = (sol != 0.0) & (sol != 1.0)
 
-            fixed, frac = 0, 0
+            to_fix = np.flatnonzero(to_zero | to_one)
+            self.fix_assignments(to_fix, sol[to_fix])
+            integral_assignments[self.var_reviewers[to_fix], self.var_papers[to_fix]] = sol[to_fix]
+            integral_assignments[self.var_reviewers[fractional], self.var_papers[fractional]] = sol[fractional]
+            fixed, frac = len(to_fix), np.count_nonzero(fractional)
 
-            # Find fractional vars.
-            for rev_idx, i in enumerate(self.papers_by_reviewer.keys()):
-                papers = self.papers_by_reviewer[i]
-                for paper_idx, j in enumerate(papers):
-                    if j not in frac_assign_p:
-                        frac_assign_p[j] = []
-                    if i not in frac_assign_r:
-                        frac_assign_r[i] = []
-
-                    if sol[self.var_name(i, j)] == 0.0 and integral_assignments[i][j] != 0.0:
-                        #self.fix_assignment_to_zero_with_constraints(i, j, integral_assignments)
-                        self.fix_assignment(rev_idx, paper_idx, 0.0)
-                        integral_assignments[i][j] = 0.0
-                        fixed += 1
-
-                    elif sol[self.var_name(i, j)] == 1.0 and integral_assignments[i][j] != 1.0:
-                        #self.fix_assignment_to_one_with_constraints(i, j, integral_assignments)
-                        self.fix_assignment(rev_idx, paper_idx, 1.0)
-                        integral_assignments[i][j] = 1.0
-                        fixed += 1
-
-                    elif sol[self.var_name(i, j)] != 1.0 and sol[self.var_name(i, j)] != 0.0:
-                        frac_assign_p[j].append(
-                            (i, j, sol[self.var_name(i, j)])
-                        )
-                        frac_assign_r[i].append(
-                            (i, j, sol[self.var_name(i, j)])
-                        )
-
-                        fractional_vars.append((i, j, sol[self.var_name(i, j)]))
-                        integral_assignments[i][j] = sol[self.var_name(i, j)]
-                        frac += 1
-                
             self._log_and_profile(f'#info FairIR:ROUND_FRACTIONAL END O(RP) loop\nfixed={fixed}, frac={frac}')
 
             # First try to elim a makespan constraint.
-            removed = False
-            self._log_and_profile(f'#info FairIR:ROUND_FRACTIONAL Relaxing local fairness n_papers={len(frac_assign_p.keys())}')
-            for (paper, frac_vars) in frac_assign_p.items():
-                if len(frac_vars) == 2 or len(frac_vars) == 3:
-                    try: ## Pass on KeyError, trying to remove a constraint that was already removed
-                        self.m.remove(self.name_to_constraint[self.ms_constr_name(paper)])
-                        del self.name_to_constraint[self.ms_constr_name(paper)]
-                        removed = True
-                    except KeyError:
-                        pass
-                    except Exception as e:
-                        raise e
-
-            self.m.update()
+            frac_per_paper = np.bincount(self.var_papers[fractional], minlength=self.n_pap)
+            self._log_and_profile(f'#info FairIR:ROUND_FRACTIONAL Relaxing local fairness n_papers={np.count_nonzero(frac_per_paper)}')
+            relaxed = ((frac_per_paper == 2) | (frac_per_paper == 3)) & self.makespan_papers
+            self.makespan_papers &= ~relaxed
+            relaxed &= self.makespan_added
+            self.m.remove_constraints([self.name_to_constraint.pop(self.ms_constr_name(p)) for p in np.flatnonzero(relaxed)])
+            self.makespan_added &= ~relaxed
 
             self._log_and_profile('#info RETURN FairIR:ROUND_FRACTIONAL call')
             return False
-        
+
+    def round_with_mip(self):
+        """Round the variables that are not fixed yet by solving a MIP until the deadline.
+
+        The MIP gets half of the time left. If it finds no integral solution in time,
+        the makespan constraints are dropped and the first feasible integral solution
+        found in the rest of the time is kept. The variables are then fixed to the
+        integral solution and the LP is re-solved. No solve runs past the deadline.
+
+        Returns:
+            True if an integral solution was found.
+        """
+        self._log_and_profile('#info FairIR:ROUND_WITH_MIP call')
+        if self.lazy_constraints:
+            self._add_pending_constraints()
+        self.m.set_binary(True)
+        self.m.optimize(time_limit=self._time_left() / 2.0, mip_gap=self.mip_gap)
+        if not self.m.has_solution():
+            self._log_and_profile('#info FairIR:ROUND_WITH_MIP no solution in time, dropping fairness')
+            self.change_makespan(0.0)
+            self.m.optimize(time_limit=self._time_left(), solution_limit=1)
+
+        found = self.m.has_solution()
+        if found:
+            sol = np.round(self.m.values())
+        self.m.set_binary(False)
+        if found:
+            self.fix_assignments(np.arange(len(sol)), sol)
+            self.m.optimize(time_limit=self._time_left())
+        self._log_and_profile('#info RETURN FairIR:ROUND_WITH_MIP call')
+        return found and self.m.status() == OPTIMAL
+
     def round_fraction_iteration(self):
         integral_assignments = np.ones((self.n_rev, self.n_pap), dtype=np.float16) * -1
         demand = sum(self.coverages)
         previous_assigned = -1
+        solved = False
         for count in range(50):
+            # Keep a fifth of the time budget to round what is left with a MIP
+            if self.deadline is not None and self._time_left() < self.time_limit / 5.0:
+                break
             solved = self.round_fractional(integral_assignments, count)
             num_assigned = np.count_nonzero(integral_assignments == 1)
 
@@ -618,13 +760,20 @@ class FairIR(Basic):
             BACKOFF = 0.1
             if not solved and previous_assigned >= 0 and (previous_assigned <= num_assigned and previous_assigned >= int(0.95 * num_assigned)):
                 ms = self.makespan * (1 - BACKOFF)
-                existing_constraints = [name for name in self.name_to_constraint.keys() if name.startswith(self.ms_constr_prefix)]
+                existing_constraints = [self.ms_constr_name(p) for p in np.flatnonzero(self.makespan_papers)]
                 self._log_and_profile(f"#info PROGRESS STALLED RELAXING FAIRNESS {self.makespan} -> {ms} on {len(existing_constraints)} Papers")
                 self.change_makespan(ms, existing_makespans=existing_constraints)
             previous_assigned = num_assigned
 
             if solved:
                 return
-        
+
+        if self.deadline is not None:
+            if self.round_with_mip():
+                return
+            raise SolverException(
+                "Solver could not find a solution within the time limit of {} seconds.".format(self.time_limit)
+            )
+
         if not solved:
             raise Exception("Solver could not find a solution. Try (1) increasing max papers (2) adding more reviewers or (3) using only more recent history for computing conflicts in the Paper Matching Setup to reduce conflicts.")
@@ -1,6 +1,6 @@
+import heapq
 import math
 import numpy as np
-from sortedcontainers import SortedList
 import time
 import uuid
 from .core import SolverException
@@ -111,6 +111,7 @@ class FairSequence(object):
         self.best_revs = np.argsort(-1 * self.affinity_matrix, axis=0)
         self.max_affinity = np.max(self.affinity_matrix)
         self.safe_mode = True
+        self._bundle_cache_key = None
 
         self.solved = False
         self.logger.debug("End Init FairSequence")
@@ -150,12 +151,36 @@ class FairSequence(object):
                 "You must have executed solve() before calling this function"
             )
 
-    def _is_valid_assignment(self, r, p, dict_alloc, previous_attained_scores):
+    def _bundle_values(self, p, dict_alloc):
+        """Value of paper p's bundle to every paper: the sum and the max over its reviewers.
+
+        _select_next_paper checks several reviewers against the same bundle, so the
+        values of the last bundle are cached.
+        """
+        key = (p, tuple(dict_alloc[p]))
+        if self._bundle_cache_key != key:
+            bundle_affin = self.affinity_matrix[dict_alloc[p], :]
+            if len(dict_alloc[p]):
+                self._bundle_cache = (
+                    np.sum(bundle_affin, axis=0),
+                    np.max(bundle_affin, axis=0),
+                )
+            else:
+                self._bundle_cache = (
+                    np.zeros(self.num_papers),
+                    np.full(self.num_papers, -np.inf),
+                )
+            self._bundle_cache_key = key
+        return self._bundle_cache
+
+    def _is_valid_assignment(
+        self, r, p, dict_alloc, previous_attained_scores, attained_values
+    ):
         """Ensure that we can assign reviewer r to paper p without breaking WEF1.
 
         We have to check any paper p_prime that has chosen a reviewer which is worth
-        less to it than the value of r to p_prime. If p_prime has only chosen better
-        reviewers, then it will necessarily be WEF1.
+        less to it than the value of r (or another reviewer of p) to p_prime. If
+        p_prime has only chosen better reviewers, then it will necessarily be WEF1.
 
         Args:
             r - (int) the id of the reviewer we want to add
@@ -163,50 +188,83 @@ class FairSequence(object):
             dict_alloc - (dict) the current allocation, maps papers to lists of reviewers
             previous_attained_scores - (1d numpy array) maps each paper to the lowest affinity
                                         for any reviewer it has been assigned
+            attained_values - (1d numpy array) maps each paper to the sum of the affinities
+                                        of the reviewers it has been assigned
 
         Returns:
             True if r can be assigned to p without violating WEF1, False otherwise.
         """
-        papers_to_check_against = set()
-        for rev in dict_alloc[p] + [r]:
-            papers_to_check_against |= set(
-                np.where(
-                    previous_attained_scores < self.affinity_matrix[rev, :]
-                )[0].tolist()
+        bundle_sum, bundle_max = self._bundle_values(p, dict_alloc)
+        r_affin = self.affinity_matrix[r, :]
+        max_affin = np.maximum(bundle_max, r_affin)
+        papers_to_check_against = np.flatnonzero(
+            previous_attained_scores < max_affin
+        )
+
+        # p_prime's value for p's bundle, if we add r and remove the max value, then divide by p's demand
+        other = (
+            bundle_sum[papers_to_check_against]
+            + r_affin[papers_to_check_against]
+            - max_affin[papers_to_check_against]
+        ) / self.demands[p]
+
+        # p_prime's value for own bundle, divided by p_prime's demand
+        curr = (
+            attained_values[papers_to_check_against]
+            / self.demands[papers_to_check_against]
+        )
+
+        # check wef1, other and curr are close as in math.isclose
+        close = np.abs(other - curr) <= 1e-9 * np.maximum(
+            np.abs(other), np.abs(curr)
+        )
+        return not np.any((other > curr) & ~close)
+
+    def _is_removed(self, r, p, current_reviewer_maximums):
+        """Whether reviewer r can never again be assigned to paper p."""
+        return (
+            current_reviewer_maximums[r] <= 0
+            or self.constraint_matrix[r, p] != 0
+            or (
+                math.isclose(self.affinity_matrix[r, p], 0)
+                and not self.allow_zero_score_assignments
             )
+        )
 
-        for p_prime in papers_to_check_against:
-            # p_prime's value for p's bundle, if we add r and remove the max value, then divide by p_prime's demand
-            p_alloc_r = dict_alloc[p] + [r]
-            p_alloc_r_affin = self.affinity_matrix[
-                p_alloc_r, [p_prime] * len(p_alloc_r)
-            ].tolist()
-            other = sum(p_alloc_r_affin)
-            max_val = max(p_alloc_r_affin)
-            other -= max_val
-            other /= self.demands[p]
-
-            # p_prime's value for own bundle, divided by p_prime's demand
-            p_prime_alloc = dict_alloc[p_prime]
-            p_prime_affin = self.affinity_matrix[
-                p_prime_alloc, [p_prime] * len(p_prime_alloc)
-            ].tolist()
-            curr = sum(p_prime_affin)
-            curr /= self.demands[p_prime]
-
-            # check wef1
-            if other > curr and not math.isclose(other, curr):
-                return False
-
-        return True
+    def _advance_cursor(self, p, matrix_alloc, cursors, current_reviewer_maximums):
+        """Move paper p's cursor past reviewers it cannot be assigned, and return
+        the affinity of the reviewer it then points to (-inf if there is none).
+
+        Reviewers that can no longer be assigned stay so, and assigned reviewers stay
+        assigned outside of trades (which reset the cursor), so cursors only move forward.
+        """
+        while cursors[p] < self.num_reviewers:
+            r = self.best_revs[cursors[p], p]
+            if not (
+                matrix_alloc[r, p]
+                or self._is_removed(r, p, current_reviewer_maximums)
+            ):
+                return self.affinity_matrix[r, p]
+            cursors[p] += 1
+        return -np.inf
+
+    def _push_paper(self, p, paper_heap, heap_versions, paper_priorities, best_remaining):
+        """Add paper p to the heap with its current key, invalidating its previous entry."""
+        heap_versions[p] += 1
+        heapq.heappush(
+            paper_heap, (paper_priorities[p], -best_remaining, p, heap_versions[p])
+        )
 
     def _select_next_paper(
         self,
         matrix_alloc,
         dict_alloc,
-        best_revs_map,
+        cursors,
+        paper_heap,
+        heap_versions,
         current_reviewer_maximums,
         previous_attained_scores,
+        attained_values,
         paper_priorities,
     ):
         """Select the next paper to be assigned a reviewer
@@ -214,55 +272,77 @@ class FairSequence(object):
         Each paper i has priority |A_i|/k_i, where A_i is the set of reviewers already
         assigned to paper i, and k_i is the total demand of paper i. The
         paper with lowest priority is chosen, with ties broken by selecting the paper which
-        will select a reviewer with the highest affinity.
+        will select a reviewer with the highest affinity (and then the lowest paper id).
         For rationale, please see:
         Weighted Envy-Freeness in Indivisible Item Allocation by Chakraborty et al. 2020 and
         I Will Have Order! Optimizing Orders for Fair Reviewer Assignment by Payan and Zick 2022.
 
+        Papers are taken from a heap keyed by (priority, -affinity of the best remaining
+        reviewer), so only papers whose best remaining reviewer could beat the current
+        choice are looked at. Keys only grow between trades, so entries are updated lazily
+        when they reach the top of the heap.
+
         Args:
             matrix_alloc - (2d numpy array) the assignment of reviewers to papers
             dict_alloc - (dict) the current allocation, maps papers to lists of reviewers
-            best_revs_map - (dict) maps from papers to lists of reviewers in decreasing affinity order
+            cursors - (1d numpy array) maps each paper to the position in its column of
+                                        self.best_revs before which no reviewer can be assigned to it
+            paper_heap - (list) heap of tuples (priority, -best remaining affinity, paper_id, version)
+            heap_versions - (1d numpy array) maps each paper to the version of its current heap entry
             current_reviewer_maximums - (1d numpy array) number of papers a reviewer can still be assigned
             previous_attained_scores - (1d numpy array) maps each paper to the lowest affinity
                                         for any reviewer it has been assigned
-            paper_priorities - (SortedList) list of tuples (priority, paper_id), sorted by increasing priority
+            attained_values - (1d numpy array) maps each paper to the sum of the affinities
+                                        of the reviewers it has been assigned
+            paper_priorities - (1d numpy array) maps each paper to its priority
 
         Returns:
-            The index of the next paper to assign a reviewer, the index of the reviewer,
-            and the updated map to the best remaining reviewers per paper.
+            The index of the next paper to assign a reviewer and the index of the reviewer.
         """
-        min_priority = paper_priorities[0][0]
-        choice_set = paper_priorities.irange(
-            minimum=(min_priority, -1), maximum=(min_priority, self.num_papers)
-        )
-
         next_paper = None
         next_rev = None
         next_mg = -10000
 
-        for _, p in choice_set:
-            removal_set = []
-            for r in best_revs_map[p]:
-                if (
-                    current_reviewer_maximums[r] <= 0
-                    or self.constraint_matrix[r, p] != 0
-                    or (
-                        math.isclose(self.affinity_matrix[r, p], 0)
-                        and not self.allow_zero_score_assignments
-                    )
+        def beats(affinity, p):
+            return affinity > next_mg or (
+                affinity == next_mg and next_paper is not None and p < next_paper
+            )
+
+        min_priority = None
+        popped = []
+        while paper_heap:
+            priority, neg_best, p, version = paper_heap[0]
+            if version != heap_versions[p]:
+                heapq.heappop(paper_heap)
+                continue
+            best_remaining = self._advance_cursor(
+                p, matrix_alloc, cursors, current_reviewer_maximums
+            )
+            if best_remaining != -neg_best:
+                heapq.heappop(paper_heap)
+                self._push_paper(
+                    p, paper_heap, heap_versions, paper_priorities, best_remaining
+                )
+                continue
+
+            if min_priority is None:
+                min_priority = priority
+            if priority > min_priority or not beats(best_remaining, p):
+                break
+            popped.append(heapq.heappop(paper_heap))
+
+            for idx in range(cursors[p], self.num_reviewers):
+                r = self.best_revs[idx, p]
+                if matrix_alloc[r, p] or self._is_removed(
+                    r, p, current_reviewer_maximums
                 ):
-                    removal_set.append(r)
-                elif matrix_alloc[r, p] > 0.5:
-                    # We don't want to remove this reviewer from consideration forever, but
-                    # we also cannot currently assign them again.
-                    pass
-                elif self.affinity_matrix[r, p] > next_mg:
+                    continue
+                elif beats(self.affinity_matrix[r, p], p):
                     # This agent might be the greedy choice.
                     # Check if this is a valid assignment, then make it the greedy choice if so.
                     # If not a valid assignment, go to the next reviewer for this agent.
                     if not self.safe_mode or self._is_valid_assignment(
-                        r, p, dict_alloc, previous_attained_scores
+                        r, p, dict_alloc, previous_attained_scores, attained_values
                     ):
                         next_paper = p
                         next_rev = r
@@ -272,12 +352,9 @@ class FairSequence(object):
                     # This agent cannot be the greedy choice
                     break
 
-            for r in removal_set:
-                best_revs_map[p].remove(r)
-
-            if next_mg == self.max_affinity:
-                return next_paper, next_rev, best_revs_map
-        return next_paper, next_rev, best_revs_map
+        for entry in popped:
+            heapq.heappush(paper_heap, entry)
+        return next_paper, next_rev
 
     def _find_trade(
         self, matrix_alloc, current_reviewer_maximums, paper_priorities
@@ -289,18 +366,16 @@ class FairSequence(object):
         Args:
             matrix_alloc - (2d numpy array) the assignment of reviewers to papers
             current_reviewer_maximums - (1d numpy array) number of papers a reviewer can still be assigned
-            paper_priorities - (SortedList) list of tuples (priority, paper_id), sorted by increasing priority
+            paper_priorities - (1d numpy array) maps each paper to its priority
 
         Returns:
             A sequence [(-1, p), (r1, p1), (r2, p2), ... (rn, -1)]
             such that we can transfer the reviewers to the left, p is a paper that needs
             a new reviewer, and rn is a reviewer that has an open reviewing slot.
         """
-        min_priority = paper_priorities[0][0]
-        choice_set = paper_priorities.irange(
-            minimum=(min_priority, -1), maximum=(min_priority, self.num_papers)
-        )
-        choice_set = [p[1] for p in choice_set]
+        choice_set = np.flatnonzero(
+            paper_priorities == np.min(paper_priorities)
+        ).tolist()
         available_reviewers = np.where(current_reviewer_maximums > 0)[
             0
         ].tolist()
@@ -444,15 +519,16 @@ class FairSequence(object):
         dict_alloc = {p: list() for p in range(self.num_papers)}
         maximums_copy = self.maximums.copy()
 
-        best_revs_map = {}
-        for p in range(self.num_papers):
-            best_revs_map[p] = self.best_revs[:, p].tolist()
+        cursors = np.zeros(self.num_papers, dtype=int)
+        heap_versions = np.zeros(self.num_papers, dtype=int)
+        paper_priorities = np.zeros(self.num_papers)
+        paper_heap = [
+            (0.0, -self.max_affinity, p, 0) for p in range(self.num_papers)
+        ]
 
         previous_attained_scores = np.ones(self.num_papers) * 1000
-
-        paper_priorities = SortedList(
-            [(0.0, p) for p in range(self.num_papers)]
-        )
+        attained_values = np.zeros(self.num_papers)
+        self._bundle_cache_key = None
 
         remaining_demand = np.sum(self.demands)
         required_for_min = np.copy(self.minimums)
@@ -475,12 +551,15 @@ class FairSequence(object):
                     % (time.time() - start)
                 )
 
-            next_paper, next_rev, best_revs_map = self._select_next_paper(
+            next_paper, next_rev = self._select_next_paper(
                 matrix_alloc,
                 dict_alloc,
-                best_revs_map,
+                cursors,
+                paper_heap,
+                heap_versions,
                 maximums_copy,
                 previous_attained_scores,
+                attained_values,
                 paper_priorities,
             )
 
@@ -491,6 +570,9 @@ class FairSequence(object):
                     self.affinity_matrix[next_rev, next_paper],
                     previous_attained_scores[next_paper],
                 )
+                attained_values[next_paper] += self.affinity_matrix[
+                    next_rev, next_paper
+                ]
             else:
                 if self.safe_mode:
                     raise PickingSequenceException(
@@ -525,10 +607,23 @@ class FairSequence(object):
                                 assert r1 in dict_alloc[p1]
                                 matrix_alloc[r1, p1] = 0
                                 dict_alloc[p1].remove(r1)
+                                attained_values[p1] -= self.affinity_matrix[r1, p1]
 
                             # add the new reviewer
                             matrix_alloc[r2, p1] = 1
                             dict_alloc[p1].append(r2)
+                            attained_values[p1] += self.affinity_matrix[r2, p1]
+
+                            # p1 may be assigned r1 again, so its cursor must start over
+                            if r1 != -1:
+                                cursors[p1] = 0
+                                self._push_paper(
+                                    p1,
+                                    paper_heap,
+                                    heap_versions,
+                                    paper_priorities,
+                                    self.max_affinity,
+                                )
 
                         # This will be used for updating maximums_copy and paper_priorities.
                         next_rev = trading_path[-1][0]
@@ -545,12 +640,17 @@ class FairSequence(object):
                 required_for_min[next_rev] -= 1
                 demand_required_for_min -= 1
 
-            paper_priorities.remove((paper_priorities[0][0], next_paper))
-            paper_priorities.add(
-                (
-                    len(dict_alloc[next_paper]) / self.demands[next_paper],
-                    next_paper,
-                )
+            paper_priorities[next_paper] = (
+                len(dict_alloc[next_paper]) / self.demands[next_paper]
+            )
+            self._push_paper(
+                next_paper,
+                paper_heap,
+                heap_versions,
+                paper_priorities,
+                self._advance_cursor(
+                    next_paper, matrix_alloc, cursors, maximums_copy
+                ),
             )
 
             if (
@@ -0,0 +1,335 @@
+"""
+Linear and convex quadratic program backends of the FairIR and
+PerturbedMaximization solvers.
+
+A backend holds one model over a vector x of continuous variables with bounds.
+Constraints are added in blocks of rows, A @ x (sense) rhs with sense one of
+'<', '>' or '=', and adding a block returns one handle per row. The handles are
+used to change the right hand sides of rows or to remove them. The objective
+is linear @ x + quadratic @ x**2, for a vector `quadratic`.
+
+Two backends are available: "gurobi", which needs a Gurobi license, and
+"highs", which uses the open-source HiGHS solver through the highspy package.
+"""
+
+import numpy as np
+import gurobipy as gp
+from scipy import sparse
+from .core import SolverException
+from .threads import thread_budget
+
+try:
+    import highspy
+except ImportError:
+    highspy = None
+
+OPTIMAL = "optimal"
+INFEASIBLE = "infeasible"
+TIME_LIMIT = "time_limit"
+OTHER = "other"
+
+
+class GurobiBackend:
+    """LP/QP backend on a Gurobi model."""
+
+    feasibility_tol = 1e-6
+
+    def __init__(self, name=""):
+        self.model = gp.Model(name)
+        self.model.setParam("OutputFlag", 0)
+        self.model.setParam("Threads", thread_budget())
+        self.x = None
+
+    def add_variables(self, lb, ub, names=None):
+        """Create the variables x, bounded by the arrays `lb` and `ub`."""
+        kwargs = {} if names is None else {"name": names}
+        self.x = self.model.addMVar(len(lb), lb=lb, ub=ub, **kwargs)
+
+    def set_bounds(self, indices, lb=None, ub=None):
+        """Change the bounds of the variables at `indices`."""
+        if len(indices) == 0:
+            return
+        variables = self.x[np.asarray(indices)]
+        if lb is not None:
+            variables.LB = lb
+        if ub is not None:
+            variables.UB = ub
+
+    def set_objective(self, linear, quadratic=None, maximize=False):
+        """Set the objective linear @ x + quadratic @ x**2."""
+        self.model.setMObjective(
+            None if quadratic is None else sparse.diags(quadratic),
+            linear,
+            0.0,
+            sense=gp.GRB.MAXIMIZE if maximize else gp.GRB.MINIMIZE,
+        )
+
+    def add_constraints(self, rows, sense, rhs, names=None):
+        """Add the constraints `rows` @ x (sense) `rhs`, returning a handle per row."""
+        kwargs = {} if names is None else {"name": names}
+        return self.model.addMConstr(
+            rows, self.x, sense, np.asarray(rhs, dtype=float), **kwargs
+        ).tolist()
+
+    def remove_constraints(self, handles):
+        self.model.remove(list(handles))
+
+    def set_rhs(self, handles, rhs):
+        if len(handles) > 0:
+            self.model.setAttr("RHS", list(handles), list(rhs))
+
+    def set_binary(self, binary):
+        """Make all variables binary (True) or continuous (False)."""
+        self.x.VType = gp.GRB.BINARY if binary else gp.GRB.CONTINUOUS
+
+    def num_constraints(self):
+        self.model.update()
+        return self.model.NumConstrs
+
+    def optimize(self, time_limit=None, mip_gap=None, solution_limit=None):
+        GRB = gp.GRB
+        self.model.setParam(
+            "TimeLimit",
+            GRB.INFINITY if time_limit is None else max(time_limit, 0.0),
+        )
+        if mip_gap is not None:
+            self.model.setParam("MIPGap", mip_gap)
+        self.model.setParam(
+            "SolutionLimit",
+            GRB.MAXINT if solution_limit is None else solution_limit,
+        )
+        self.model.optimize()
+
+    def status(self):
+        GRB = gp.GRB
+        status = self.model.status
+        if status in [GRB.OPTIMAL, GRB.SUBOPTIMAL]:
+            return OPTIMAL
+        # the variables are bounded, so the model cannot be unbounded
+        if status in [GRB.INFEASIBLE, GRB.INF_OR_UNBD]:
+            return INFEASIBLE
+        if status == GRB.TIME_LIMIT:
+            return TIME_LIMIT
+        return OTHER
+
+    def has_solution(self):
+        return self.model.SolCount > 0
+
+    def values(self):
+        return self.x.X
+
+    def write_infeasibility_report(self):
+        """Write an irreducible infeasible subsystem to model.ilp."""
+        self.model.computeIIS()
+        self.model.write("model.ilp")
+
+
+class HighsBackend:
+    """
+    LP/QP backend on a HiGHS model (highspy package).
+
+    HiGHS solves QPs with an active-set method, which is much slower than
+    Gurobi's barrier on large QPs with many fractional variables.
+    """
+
+    feasibility_tol = 1e-7
+
+    def __init__(self, name=""):
+        if highspy is None:
+            raise SolverException(
+                "The highs backend requires the highspy package"
+            )
+
+        self.model = highspy.Highs()
+        self.model.setOptionValue("output_flag", False)
+        self.model.setOptionValue("threads", thread_budget())
+        self.num_variables = 0
+        # Rows get an increasing id when they are added. Removing rows shifts the
+        # positions of the rows after them, _row_ids holds the id of each row.
+        self._row_ids = np.zeros(0, dtype=np.int64)
+        self._row_senses = np.zeros(0, dtype="<U1")
+        self._next_row_id = 0
+
+    def add_variables(self, lb, ub, names=None):
+        self.num_variables = len(lb)
+        self._lb = np.broadcast_to(lb, self.num_variables).astype(float)
+        self._ub = np.broadcast_to(ub, self.num_variables).astype(float)
+        self.model.addCols(
+            self.num_variables,
+            np.zeros(self.num_variables),
+            self._lb,
+            self._ub,
+            0,
+            np.zeros(0, dtype=np.int32),
+            np.zeros(0, dtype=np.int32),
+            np.zeros(0),
+        )
+
+    def set_bounds(self, indices, lb=None, ub=None):
+        indices = np.asarray(indices, dtype=np.int32)
+        if len(indices) == 0:
+            return
+        if lb is not None:
+            self._lb[indices] = lb
+        if ub is not None:
+            self._ub[indices] = ub
+        self.model.changeColsBounds(
+            len(indices), indices, self._lb[indices], self._ub[indices]
+        )
+
+    def set_objective(self, linear, quadratic=None, maximize=False):
+        n = self.num_variables
+        self.model.changeColsCost(
+            n, np.arange(n, dtype=np.int32), np.asarray(linear, dtype=float)
+        )
+        # HiGHS minimizes linear @ x + x @ Q @ x / 2
+        if quadratic is None:
+            diagonal = np.zeros(0, dtype=np.int32)
+            values = np.zeros(0)
+        else:
+            diagonal = np.flatnonzero(quadratic).astype(np.int32)
+            values = 2.0 * np.asarray(quadratic, dtype=float)[diagonal]
+        starts = np.searchsorted(diagonal, np.arange(n + 1)).astype(np.int32)
+        self.model.passHessian(
+            n,
+            len(diagonal),
+            highspy.HessianFormat.kTriangular,
+            starts,
+            diagonal,
+            values,
+        )
+        self.model.changeObjectiveSense(
+            highspy.ObjSense.kMaximize
+            if maximize
+            else highspy.ObjSense.kMinimize
+        )
+
+    @staticmethod
+    def _row_bounds(sense, rhs):
+        rhs = np.asarray(rhs, dtype=float)
+        lower = np.where(sense == "<", -np.inf, rhs)
+        upper = np.where(sense == ">", np.inf, rhs)
+        return lower, upper
+
+    def add_constraints(self, rows, sense, rhs, names=None):
+        rows = rows.tocsr()
+        num_rows = rows.shape[0]
+        lower, upper = self._row_bounds(np.full(num_rows, sense), rhs)
+        self.model.addRows(
+            num_rows,
+            lower,
+            upper,
+            rows.nnz,
+            rows.indptr[:-1].astype(np.int32),
+            rows.indices.astype(np.int32),
+            rows.data.astype(float),
+        )
+        handles = np.arange(self._next_row_id, self._next_row_id + num_rows)
+        self._next_row_id += num_rows
+        self._row_ids = np.concatenate([self._row_ids, handles])
+        self._row_senses = np.concatenate(
+            [self._row_senses, np.full(num_rows, sense)]
+        )
+        return handles.tolist()
+
+    def _positions(self, handles):
+        return np.searchsorted(
+            self._row_ids, np.asarray(handles, dtype=np.int64)
+        )
+
+    def remove_constraints(self, handles):
+        if len(handles) == 0:
+            return
+        positions = self._positions(handles)
+        self.model.deleteRows(len(positions), positions.astype(np.int32))
+        self._row_ids = np.delete(self._row_ids, positions)
+        self._row_senses = np.delete(self._row_senses, positions)
+
+    def set_rhs(self, handles, rhs):
+        if len(handles) == 0:
+            return
+        positions = self._positions(handles)
+        lower, upper = self._row_bounds(self._row_senses[positions], rhs)
+        # highspy has no bulk row bound update
+        for position, low, up in zip(
+            positions.tolist(), lower.tolist(), upper.tolist()
+        ):
+            self.model.changeRowBounds(position, low, up)
+
+    def set_binary(self, binary):
+        n = self.num_variables
+        integrality = (
+            highspy.HighsVarType.kInteger
+            if binary
+            else highspy.HighsVarType.kContinuous
+        )
+        self.model.changeColsIntegrality(
+            n, np.arange(n, dtype=np.int32), np.array([integrality] * n)
+        )
+
+    def num_constraints(self):
+        return self.model.getNumRow()
+
+    def optimize(self, time_limit=None, mip_gap=None, solution_limit=None):
+        self.model.setOptionValue(
+            "time_limit",
+            np.inf if time_limit is None else max(time_limit, 0.0),
+        )
+        if mip_gap is not None:
+            self.model.setOptionValue("mip_rel_gap", mip_gap)
+        self.model.setOptionValue(
+            "mip_max_improving_sols",
+            2147483647 if solution_limit is None else solution_limit,
+        )
+        self.model.run()
+
+    def status(self):
+        HighsModelStatus = highspy.HighsModelStatus
+        status = self.model.getModelStatus()
+        if status == HighsModelStatus.kOptimal:
+            return OPTIMAL
+        # the variables are bounded, so the model cannot be unbounded
+        if status in [
+            HighsModelStatus.kInfeasible,
+            HighsModelStatus.kUnboundedOrInfeasible,
+        ]:
+            return INFEASIBLE
+        if status == HighsModelStatus.kTimeLimit:
+            return TIME_LIMIT
+        return OTHER
+
+    def has_solution(self):
+        return (
+            self.model.getInfo().primal_solution_status
+            == highspy.kSolutionStatusFeasible
+        )
+
+    def values(self):
+        """The solution, values within feasibility_tol of an integer rounded to it.
+
+        HiGHS can return e.g. 1e-10 for a variable at its bound of 0, which callers
+        comparing values with 0 and 1 would take as fractional.
+        """
+        x = np.array(self.model.getSolution().col_value)
+        rounded = np.round(x)
+        near = np.abs(x - rounded) <= self.feasibility_tol
+        x[near] = rounded[near]
+        return x
+
+    def write_infeasibility_report(self):
+        """Write the infeasible model to model.lp."""
+        self.model.writeModel("model.lp")
+
+
+BACKENDS = {"gurobi": GurobiBackend, "highs": HighsBackend}
+
+
+def make_backend(name, model_name=""):
+    """Create an empty model of the backend with the given name."""
+    if name not in BACKENDS:
+        raise SolverException(
+            "Unknown LP backend {}, choose from {}".format(
+                name, list(BACKENDS)
+            )
+        )
+    return BACKENDS[name](model_name)
@@ -12,6 +12,16 @@ except that the "num_reviews" argument is replaced by "minimums" and "maximums".
         integer representing the minimum/maximum number of reviews a reviewer
         should be assigned.
 
+If "single_pass" is True, minimums and maximums are instead encoded in one
+min-cost-flow graph (see the "minimums" argument of SimpleSolver), which is
+solved once. This builds one graph instead of two, and finds the cheapest
+assignment among those that meet all minimums rather than fixing the
+minimum-load assignments first.
+
+If "candidate_k" is set, both SimpleSolvers only consider top-k candidate pairs,
+and `optimality_certified` reports whether both pruned solutions are provably
+optimal for their full graphs.
+
 """
 import numpy as np
 import logging
@@ -32,6 +42,8 @@ class MinMaxSolver:
         allow_zero_score_assignments=False,
         logger=logging.getLogger(__name__),
         limit_matrix=None,
+        candidate_k=None,
+        single_pass=False,
     ):
 
         self.minimums = minimums
@@ -68,6 +80,9 @@ class MinMaxSolver:
             for rev_id in bad_affinity_reviewers:
                 self.minimums[rev_id] = 0
 
+        self.candidate_k = candidate_k
+        self.single_pass = single_pass
+        self.optimality_certified = None
         self.solved = False
         self.flow_matrix = None
         self.optimal_cost = None
@@ -97,10 +112,48 @@ class MinMaxSolver:
 
         self.logger.debug("Finished checking graph inputs")
 
+    def _solve_single_pass(self):
+        """Computes the solution of one SimpleSolver with minimum and maximum loads"""
+        start_time = time.time()
+        self.logger.debug("MinMax Solver started at={}".format(start_time))
+        solver = SimpleSolver(
+            self.maximums,
+            self.demands,
+            self.cost_matrix,
+            self.constraint_matrix,
+            allow_zero_score_assignments=self.allow_zero_score_assignments,
+            logger=self.logger,
+            limit_matrix=self.limit_matrix,
+            candidate_k=self.candidate_k,
+            minimums=self.minimums,
+        )
+        self.flow_matrix = solver.solve()
+        stop_time = time.time()
+        self.logger.debug(
+            "MinMax Solver finished at {} and took {} seconds".format(
+                stop_time, stop_time - start_time
+            )
+        )
+
+        # as in the two-pass solve, there is no solution if any minimum load can not be met.
+        minimums_met = bool(
+            np.all(np.sum(self.flow_matrix, axis=0) >= np.array(self.minimums))
+        )
+        self.solved = solver.solved and minimums_met
+        self.optimality_certified = solver.optimality_certified
+
+        self.optimal_cost = solver.cost
+        self.cost = np.sum(self.flow_matrix * self.cost_matrix)
+
+        return self.flow_matrix
+
     def solve(self):
         """Computes combined solution of two SimpleSolvers"""
         self._validate_input_range()
 
+        if self.single_pass:
+            return self._solve_single_pass()
+
         start_time = time.time()
         self.logger.debug("Min Solver started at={}".format(start_time))
         minimum_solver = SimpleSolver(
@@ -112,6 +165,7 @@ class MinMaxSolver:
             logger=self.logger,
             strict=False,
             limit_matrix=self.limit_matrix,
+            candidate_k=self.candidate_k,
         )  # strict=False prevents errors from being thrown for supply/demand mismatch
         minimum_result = minimum_solver.solve()
         stop_time = time.time()
@@ -140,6 +194,7 @@ class MinMaxSolver:
             allow_zero_score_assignments=self.allow_zero_score_assignments,
             logger=self.logger,
             limit_matrix=adjusted_limits,
+            candidate_k=self.candidate_k,
         )
 
         maximum_result = maximum_solver.solve()
@@ -151,6 +206,11 @@ class MinMaxSolver:
         )
 
         self.solved = minimum_solver.solved and maximum_solver.solved
+        if self.candidate_k is not None:
+            self.optimality_certified = (
+                minimum_solver.optimality_certified
+                and maximum_solver.optimality_certified
+            )
 
         self.optimal_cost = (
             minimum_solver.min_cost_flow.optimal_cost()
@@ -3,17 +3,17 @@ A paper-reviewer assignment solver that aims to trade off between the total
 affinity score and the randomness of the assignment. The solver is based on
 the algorithm described in Xu et al 2023.
 
-The solver relies on the Gurobi optimizer to solve convex quadratic programs
-that arise in the assignment problem, and the CFFI library to interface with
-a sampling program written in C.
+The solver relies on the Gurobi optimizer (or HiGHS, see lp_backends) to solve
+convex quadratic programs that arise in the assignment problem, and the CFFI
+library to interface with a sampling program written in C.
 """
 
 import logging
 import numpy as np
-import gurobipy as gp
-from cffi import FFI
+from scipy import sparse
 from .core import SolverException
-from .bvn_extension import run_bvn
+from .lp_backends import make_backend, OPTIMAL
+from .bvn_extension import sample_integer_assignment
 from .minmax_solver import MinMaxSolver
 
 class PerturbedMaximizationSolver:
@@ -24,10 +24,13 @@ class PerturbedMaximizationSolver:
         demands,
         encoder,
         allow_zero_score_assignments=False,
+        lp_backend="gurobi",
         logger=logging.getLogger(__name__),
     ):
         """
         Initialize the solver with the given encoder and constraints.
+        `lp_backend` names the solver of the linear and quadratic programs,
+        "gurobi" or "highs" (see lp_backends).
         """
         
         self.logger = logger
@@ -36,6 +39,7 @@ class PerturbedMaximizationSolver:
         # Store the inputs
         self.num_paps, self.num_revs = encoder.cost_matrix.shape
         self.allow_zero_score_assignments = allow_zero_score_assignments
+        self.lp_backend = lp_backend
         self.encoder = encoder
 
         self.minimums = minimums
@@ -78,43 +82,21 @@ class PerturbedMaximizationSolver:
         self.sampled_assignment_cost = None
         self.alternate_probability_matrix = None
 
+        # All solves share one model with the same variables and demand and
+        #     load constraints. Between solves, only the variable upper bounds,
+        #     the objective and the bad-match constraints change.
+        self._build_model()
+
         # Compute the deterministic max-affinity assignment ingoring probability limits
         #     This is used to compute the fraction of the optimal score achieved 
         #     by the randomized assignment. We use the Gurobi optimizer to solve 
         #     the deterministic assignment problem as a linear program.
         self.logger.debug("[PerturbedMaximization]: Computing the optimal "
                           "deterministic assignment ...")
-        solver = gp.Model()
-        solver.setParam('OutputFlag', 0)
-        # Initialize assignment matrix and objective function
-        objective  = 0.0
-        assignment = [[0.0 for j in range(self.num_revs)] for i in range(self.num_paps)]
-        for i in range(self.num_paps):
-            for j in range(self.num_revs):
-                if self.constraint_matrix[i][j] == -1:
-                    x = solver.addVar(lb=0, ub=0, name=f"{i} {j}")
-                elif self.constraint_matrix[i][j] == 1:
-                    x = solver.addVar(lb=1, ub=1, name=f"{i} {j}")
-                else:
-                    x = solver.addVar(lb=0, ub=1, name=f"{i} {j}")
-                assignment[i][j] = x
-                objective += x * self.cost_matrix[i][j]
-        solver.setObjective(objective, gp.GRB.MINIMIZE)
-        # Add constraints
-        for i in range(self.num_paps):
-            assigned = 0.0
-            for j in range(self.num_revs):
-                assigned += assignment[i][j]
-            solver.addConstr(assigned == self.demands[i])
-        for j in range(self.num_revs):
-            load = 0.0
-            for i in range(self.num_paps):
-                load += assignment[i][j]
-            solver.addConstr(load >= self.minimums[j])
-            solver.addConstr(load <= self.maximums[j])
-        # Run the Gurobi solver
-        solver.optimize()
-        if solver.status != gp.GRB.OPTIMAL:
+        self._model.set_objective(self._costs)
+        # Run the LP solver
+        self._model.optimize()
+        if self._model.status() != OPTIMAL:
             self.deterministic_assignment_solved = False
             self.logger.debug(
                 "[PerturbedMaximization]: ERROR: Deterministic assignment infeasible"
@@ -122,9 +104,7 @@ class PerturbedMaximizationSolver:
             raise SolverException("Deterministic assignment infeasible")
         # Compute properties of the deterministic assignment
         self.deterministic_assignment_solved = True
-        self.deterministic_assignment_matrix = np.array([
-            [assignment[i][j].x for j in range(self.num_revs)] for i in range(self.num_paps)
-        ])
+        self.deterministic_assignment_matrix = self._read_assignment()
         self.deterministic_assignment_cost = self._compute_expected_cost(
             self.deterministic_assignment_matrix
         )
@@ -140,40 +120,10 @@ class PerturbedMaximizationSolver:
         if len(self.bad_match_thresholds) != 0:
             self.logger.debug("[PerturbedMaximization]: Computing the fractional "
                               "assignment without perturbation ...")
-            solver = gp.Model()
-            solver.setParam('OutputFlag', 0)
-            # Initialize assignment matrix and objective function
-            objective  = 0.0
-            assignment = [
-                [0.0 for j in range(self.num_revs)] for i in range(self.num_paps)
-            ]
-            for i in range(self.num_paps):
-                for j in range(self.num_revs):
-                    if self.constraint_matrix[i][j] == -1:
-                        x = solver.addVar(lb=0, ub=0, name=f"{i} {j}")
-                    elif self.constraint_matrix[i][j] == 1:
-                        x = solver.addVar(lb=1, ub=1, name=f"{i} {j}")
-                    else:
-                        x = solver.addVar(lb=0, ub=self.prob_limit_matrix[i][j], 
-                                          name=f"{i} {j}")
-                    assignment[i][j] = x
-                    objective += x * self.cost_matrix[i][j]
-            solver.setObjective(objective, gp.GRB.MINIMIZE)
-            # Add constraints
-            for i in range(self.num_paps):
-                assigned = 0.0
-                for j in range(self.num_revs):
-                    assigned += assignment[i][j]
-                solver.addConstr(assigned == self.demands[i])
-            for j in range(self.num_revs):
-                load = 0.0
-                for i in range(self.num_paps):
-                    load += assignment[i][j]
-                solver.addConstr(load >= self.minimums[j])
-                solver.addConstr(load <= self.maximums[j])
-            # Run the Gurobi solver
-            solver.optimize()
-            if solver.status != gp.GRB.OPTIMAL:
+            self._set_upper_bounds(self.prob_limit_matrix)
+            # Run the LP solver
+            self._model.optimize()
+            if self._model.status() != OPTIMAL:
                 self.fractional_assignment_solved = False
                 self.logger.debug(
                     "[PerturbedMaximization]: ERROR: Fractional assignment without "
@@ -182,9 +132,7 @@ class PerturbedMaximizationSolver:
                 raise SolverException(
                     "Fractional assignment without perturbation infeasible"
                 )
-            self.no_perturbation_assignment_matrix = np.array([
-                [assignment[i][j].x for j in range(self.num_revs)] for i in range(self.num_paps)
-            ])
+            self.no_perturbation_assignment_matrix = self._read_assignment()
             self.logger.debug("[PerturbedMaximization]: Finished computing the "
                               "fractional assignment without perturbation")
                           
@@ -369,31 +317,14 @@ class PerturbedMaximizationSolver:
         # Round the fractional assignment matrix to integers to a certain precision
         # in order to use the sampling program in C. See also the RandomizedSolver.
         self.precision = 1000000
-        self.rounded_assignment_matrix = np.zeros(
-            (self.num_paps, self.num_revs), dtype=int
-        )
-        for i in range(self.num_paps):
-            for j in range(self.num_revs):
-                self.rounded_assignment_matrix[i][j] = np.round(
-                    self.fractional_assignment_matrix[i][j] * self.precision
-                )
-
-        # Construct CFFI interface to use the sampling extension in C
-        ffi = FFI()
-        F = self.rounded_assignment_matrix.flatten()
-        Fbuf = ffi.new("int[]", self.num_paps * self.num_revs)
-        for i in range(F.size):
-            Fbuf[i] = F[i]
-        Sbuf = ffi.new("int[]", self.num_revs)
-        for i in range(self.num_revs):
-            Sbuf[i] = 1
-        run_bvn(Fbuf, Sbuf, self.num_paps, self.num_revs, self.precision)
-
-        # Obtain the sampled assignment matrix and compute properties
-        self.sampled_assignment_matrix = np.zeros((self.num_paps, self.num_revs))
-        for i in range(F.size):
-            coords = np.unravel_index(i, (self.num_paps, self.num_revs))
-            self.sampled_assignment_matrix[coords] = Fbuf[i]
+        self.rounded_assignment_matrix = np.round(
+            self.fractional_assignment_matrix * self.precision
+        ).astype(int)
+
+        # Sample with the extension in C
+        self.sampled_assignment_matrix = sample_integer_assignment(
+            self.rounded_assignment_matrix, self.precision
+        ).astype(float)
         self.sampled_assignment_cost = self._compute_expected_cost(self.sampled_assignment_matrix)
         sampled_cost_ratio = 1.0
         if self.deterministic_assignment_cost != 0:
@@ -416,12 +347,61 @@ class PerturbedMaximizationSolver:
                           f"score {-self.sampled_assignment_cost:.6f}, "
                           f"{sampled_cost_ratio:.2%} of the deterministic score")
     
+    def _build_model(self):
+        """
+        Build the LP model with one variable per paper-reviewer pair that is
+        not a conflict, and the paper demand and reviewer load constraints.
+        Variables are bounded by 1 (and fixed to 1 for pairs that must be
+        assigned) until _set_upper_bounds is called. The variables are ordered
+        as self._variable_papers and self._variable_reviewers.
+        """
+        papers, reviewers = np.nonzero(self.constraint_matrix != -1)
+        self._variable_papers, self._variable_reviewers = papers, reviewers
+        self._forced = self.constraint_matrix[papers, reviewers] == 1
+        self._costs = self.cost_matrix[papers, reviewers].astype(float)
+
+        self._model = make_backend(self.lp_backend)
+        self._model.add_variables(self._forced.astype(float), np.ones(len(papers)))
+        self._bad_match_constraints = []
+
+        # Paper demands and reviewer loads are sums over the rows and columns
+        variable_indices = np.arange(len(papers))
+        ones = np.ones(len(papers))
+        paper_sums = sparse.csr_matrix(
+            (ones, (papers, variable_indices)), shape=(self.num_paps, len(papers))
+        )
+        reviewer_sums = sparse.csr_matrix(
+            (ones, (reviewers, variable_indices)), shape=(self.num_revs, len(papers))
+        )
+        self._model.add_constraints(paper_sums, '=', self.demands)
+        self._model.add_constraints(reviewer_sums, '>', self.minimums)
+        self._model.add_constraints(reviewer_sums, '<', self.maximums)
+
+    def _set_upper_bounds(self, upper_bounds):
+        """
+        Bound the variables by the #papers by #reviewers matrix `upper_bounds`,
+        except for the pairs that must be assigned.
+        """
+        self._model.set_bounds(
+            np.arange(len(self._forced)),
+            ub=np.where(
+                self._forced,
+                1.0,
+                upper_bounds[self._variable_papers, self._variable_reviewers],
+            ),
+        )
+
+    def _read_assignment(self):
+        """
+        Read the values of the variables of the solved model into a #papers by
+        #reviewers matrix.
+        """
+        assignment_matrix = np.zeros((self.num_paps, self.num_revs))
+        assignment_matrix[self._variable_papers, self._variable_reviewers] = self._model.values()
+        return assignment_matrix
+
     def _compute_expected_cost(self, assignment):
-        expected_cost = 0.0
-        for i in range(self.num_paps):
-            for j in range(self.num_revs):
-                expected_cost += assignment[i][j] * self.cost_matrix[i][j]
-        return expected_cost
+        return np.sum(assignment * self.cost_matrix)
 
     def solve(self):
         """
@@ -434,60 +414,32 @@ class PerturbedMaximizationSolver:
             "[PerturbedMaximization]: Solving the fractional assignment ..."
         )
 
-        # Solve the fractional assignment problem using Gurobi
+        # Solve the fractional assignment problem using the LP backend
         #    The objective function is total preturbed score of each paper-reviewer
         #    pair. Let the marginal probability of reviewer j being assigned to paper
         #    i be x_ij. The objective function is sum_{i,j} c_ij * (x_ij - p * x_ij^2).
-        #    The convex quadratic program is solved using Gurobi.
-        solver = gp.Model()
-        solver.setParam('OutputFlag', 0)
-        # Initialize assignment matrix and objective function
-        objective  = 0.0
-        assignment = [[0.0 for j in range(self.num_revs)] for i in range(self.num_paps)]
-        for i in range(self.num_paps):
-            for j in range(self.num_revs):
-                if self.constraint_matrix[i][j] == -1:
-                    x = solver.addVar(lb=0, ub=0, name=f"{i} {j}")
-                elif self.constraint_matrix[i][j] == 1:
-                    x = solver.addVar(lb=1, ub=1, name=f"{i} {j}")
-                else:
-                    x = solver.addVar(lb=0, ub=self.prob_limit_matrix[i][j], 
-                                      name=f"{i} {j}")
-                assignment[i][j] = x
-                objective += (x - self.perturbation * x * x) * self.cost_matrix[i][j]
-        solver.setObjective(objective, gp.GRB.MINIMIZE)
-        # Add constraints
-        for i in range(self.num_paps):
-            assigned = 0.0
-            for j in range(self.num_revs):
-                assigned += assignment[i][j]
-            solver.addConstr(assigned == self.demands[i])
-        for j in range(self.num_revs):
-            load = 0.0
-            for i in range(self.num_paps):
-                load += assignment[i][j]
-            solver.addConstr(load >= self.minimums[j])
-            solver.addConstr(load <= self.maximums[j])
+        #    The convex quadratic program is solved using Gurobi or HiGHS.
+        self._set_upper_bounds(self.prob_limit_matrix)
+        self._model.set_objective(self._costs, -self.perturbation * self._costs)
+        self._model.remove_constraints(self._bad_match_constraints)
+        self._bad_match_constraints = []
         for threshold in self.bad_match_thresholds:
             no_perturbation_bad_matches = np.sum(
                 self.no_perturbation_assignment_matrix * (self.cost_matrix > threshold)
             )
-            bad_matches = 0.0
-            for i in range(self.num_paps):
-                for j in range(self.num_revs):
-                    bad_matches += assignment[i][j] * (self.cost_matrix[i][j] > threshold)
-            solver.addConstr(bad_matches <= no_perturbation_bad_matches)
-        # Run the Gurobi solver
-        solver.optimize()
-        if solver.status != gp.GRB.OPTIMAL:
+            bad_matches = sparse.csr_matrix((self._costs > threshold).astype(float))
+            self._bad_match_constraints += self._model.add_constraints(
+                bad_matches, '<', [no_perturbation_bad_matches]
+            )
+        # Run the QP solver
+        self._model.optimize()
+        if self._model.status() != OPTIMAL:
             self.solved = False
-            self.logger.debug("[PerturbedMaximization]: Gurobi solver failed")
+            self.logger.debug("[PerturbedMaximization]: QP solver failed")
             return None
         # Compute properties of the fractional assignment
         self.solved = True
-        self.fractional_assignment_matrix = np.array([
-            [assignment[i][j].x for j in range(self.num_revs)] for i in range(self.num_paps)
-        ])
+        self.fractional_assignment_matrix = self._read_assignment()
         self.fractional_assignment_cost = self._compute_expected_cost(self.fractional_assignment_matrix)
         self.logger.debug(
             "[PerturbedMaximization]: Finished solving the fractional assignment "
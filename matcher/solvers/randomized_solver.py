@@ -14,9 +14,8 @@ are maintained even if all alternates are used.
 
 from .minmax_solver import MinMaxSolver
 from .core import SolverException
-from .bvn_extension import run_bvn
+from .bvn_extension import sample_integer_assignment
 from ortools.linear_solver import pywraplp
-from cffi import FFI
 import logging
 import numpy as np
 from itertools import product
@@ -271,22 +270,9 @@ class RandomizedSolver:
             self.solved
         ), "Solver not solved. Run self.solve() before sampling."
 
-        # construct CFFI interface to the sampling extension in C
-        ffi = FFI()
-        F = self.integer_fractional_assignment_matrix.flatten()
-        Fbuf = ffi.new("int[]", self.num_paps * self.num_revs)
-        for i in range(F.size):
-            Fbuf[i] = F[i]
-        Sbuf = ffi.new("int[]", self.num_revs)
-        for i in range(self.num_revs):
-            Sbuf[i] = 1
-
-        run_bvn(Fbuf, Sbuf, self.num_paps, self.num_revs, self.one)
-
-        self.flow_matrix = np.zeros((self.num_paps, self.num_revs))
-        for i in range(F.size):
-            coords = np.unravel_index(i, (self.num_paps, self.num_revs))
-            self.flow_matrix[coords] = Fbuf[i]
+        self.flow_matrix = sample_integer_assignment(
+            self.integer_fractional_assignment_matrix, self.one
+        ).astype(float)
 
         self.cost = np.sum(self.flow_matrix * self.cost_matrix)
 
@@ -37,6 +37,22 @@ SimpleSolver is initialized with the following arguments:
         a #papers by #reviewers numpy array representing the limit on the flow
         between that reviewer and paper (usually 1)
 
+    "candidate_k":
+        None (default) or a positive integer. If set, only builds arcs for
+        pairs where the reviewer is among the top-k reviewers of the paper or
+        the paper is among the top-k papers of the reviewer (forced pairs are
+        always kept). k is doubled until the pruned problem is feasible, and
+        after solving, `optimality_certified` tells whether the pruned optimum
+        is provably optimal for the full problem.
+
+    "minimums":
+        None (default) or a list of length #reviewers. If set, "num_reviews"
+        are treated as maximum loads, and each reviewer's source arc is split
+        into an arc of capacity minimum, carrying a bonus larger than any
+        difference in assignment cost, and an arc for the rest of the load.
+        A single solve then meets as many minimum loads as possible before
+        minimizing cost.
+
 
 Node is a namedtuple that is used to represent nodes in the graph:
 
@@ -62,6 +78,7 @@ import logging
 import numpy as np
 from ortools.graph.python import min_cost_flow
 from .core import SolverException
+from .candidates import top_k_candidates, covers_all_pairs, residual_potentials
 
 Node = namedtuple("Node", ["number", "index", "supply"])
 
@@ -79,6 +96,8 @@ class SimpleSolver:
         logger=logging.getLogger(__name__),
         strict=True,
         limit_matrix=None,
+        candidate_k=None,
+        minimums=None,
     ):
 
         self.logger = logger
@@ -90,19 +109,20 @@ class SimpleSolver:
         self.constraint_matrix = constraint_matrix
         self.flow_matrix = np.zeros(np.shape(self.cost_matrix))
         self.num_reviews = num_reviews
+        self.minimums = minimums
         self.demands = demands
         self.num_papers = np.size(cost_matrix, axis=0)
         self.num_reviewers = np.size(cost_matrix, axis=1)
         self.current_offset = 0
         if limit_matrix is None:
             limit_matrix = np.ones(np.shape(self.cost_matrix), dtype=np.int64)
+        self.limit_matrix = np.asarray(limit_matrix)
+        self.candidate_k = candidate_k
+        self.pruned_pairs = np.zeros(np.shape(self.cost_matrix), dtype=bool)
+        self.optimality_certified = None
 
         self._check_inputs(strict)
 
-        self.start_nodes = []
-        self.end_nodes = []
-        self.capacities = []
-        self.costs = []
         self.node_by_number = {}
 
         total_supply = min(sum(self.num_reviews), sum(self.demands))
@@ -124,43 +144,68 @@ class SimpleSolver:
         self.reviewer_node_by_index = {n.index: n for n in self.reviewer_nodes}
         self.paper_node_by_index = {n.index: n for n in self.paper_nodes}
 
+        self.construct_graph()
+
+    def construct_graph(self):
+        """
+        Adds all edges of the graph, restricted to candidate pairs if `candidate_k` is set,
+        and constructs the OR-Tools solver from them.
+        """
+        self.start_nodes = np.zeros(0, dtype=np.int64)
+        self.end_nodes = np.zeros(0, dtype=np.int64)
+        self.capacities = np.zeros(0, dtype=np.int64)
+        self.costs = np.zeros(0, dtype=np.int64)
+
+        reviewer_numbers = np.array(
+            [n.number for n in self.reviewer_nodes], dtype=np.int64
+        )
+        paper_numbers = np.array(
+            [n.number for n in self.paper_nodes], dtype=np.int64
+        )
+
+        arc_papers, arc_reviewers, arc_costs = self._eligible_arcs()
+
         # -- Add Edges --
 
         # connect the source node to all reviewer nodes.
-        for r_node in self.reviewer_nodes:
-            capacity = self.num_reviews[r_node.index]
-            self.add_edge(self.source_node, r_node, capacity, cost=0)
-
-        for r_node in self.reviewer_nodes:
-            for p_node in self.paper_nodes:
-
-                coordinates = (p_node.index, r_node.index)
-                arc_cost = int(self.cost_matrix[coordinates])
-                arc_constraint = self.constraint_matrix[coordinates]
-
-                # a constraint of 0 means there's no constraint, so apply the cost as normal
-                # a constraint of 1 means that this user was explicitly assigned to this paper
-                # a constraint of anything other that 0 or 1 essentially indicates a conflict, so do not add an arc
-                if arc_constraint == 0 and (
-                    self.allow_zero_score_assignments or arc_cost != 0
-                ):
-                    self.add_edge(
-                        r_node, p_node, limit_matrix[coordinates], arc_cost
-                    )
-                elif arc_constraint == 1:
-                    # TODO: this should be handled as a hard constraint
-                    arc_cost = self._least_cost() - 1
-                    self.add_edge(
-                        r_node,
-                        p_node,
-                        limit_matrix[coordinates],
-                        int(arc_cost),
-                    )
+        if self.minimums is None:
+            self.add_edges(
+                np.full(self.num_reviewers, self.source_node.number),
+                reviewer_numbers,
+                self.num_reviews,
+                np.zeros(self.num_reviewers, dtype=np.int64),
+            )
+        else:
+            self.add_edges(
+                np.full(self.num_reviewers, self.source_node.number),
+                reviewer_numbers,
+                self.minimums,
+                np.full(
+                    self.num_reviewers, -self._minimum_load_bonus(arc_costs)
+                ),
+            )
+            self.add_edges(
+                np.full(self.num_reviewers, self.source_node.number),
+                reviewer_numbers,
+                np.subtract(self.num_reviews, self.minimums),
+                np.zeros(self.num_reviewers, dtype=np.int64),
+            )
+
+        # connect reviewer nodes to paper nodes.
+        self.add_edges(
+            reviewer_numbers[arc_reviewers],
+            paper_numbers[arc_papers],
+            self.limit_matrix[arc_papers, arc_reviewers],
+            arc_costs,
+        )
 
         # connect paper nodes to the sink node.
-        for p_node in self.paper_nodes:
-            capacity = self.demands[p_node.index]
-            self.add_edge(p_node, self.sink_node, capacity, cost=0)
+        self.add_edges(
+            paper_numbers,
+            np.full(self.num_papers, self.sink_node.number),
+            self.demands,
+            np.zeros(self.num_papers, dtype=np.int64),
+        )
 
         self.construct_solver()
 
@@ -213,6 +258,28 @@ class SimpleSolver:
                 )
             )
 
+        if self.minimums is not None:
+            if not len(self.minimums) == num_reviewers:
+                raise SolverException(
+                    "minimums must be same length ({}) as number of reviewers ({})".format(
+                        len(self.minimums), num_reviewers
+                    )
+                )
+            if np.any(np.array(self.minimums) > np.array(self.num_reviews)):
+                raise SolverException(
+                    "minimums may not be greater than num_reviews"
+                )
+
+        if self.candidate_k is not None and not (
+            isinstance(self.candidate_k, (int, np.integer))
+            and self.candidate_k > 0
+        ):
+            raise SolverException(
+                "candidate_k must be a positive integer, not {}".format(
+                    self.candidate_k
+                )
+            )
+
         self.logger.debug("Finished checking graph inputs")
 
     def _check_graph_integrity(self):
@@ -237,15 +304,99 @@ class SimpleSolver:
                 )
             )
 
-        if any([not isinstance(i, int) for i in self.capacities]):
-            raise SolverException(
-                "capacities list may not contain integers of type numpy.int64"
+        for name, values in [
+            ("capacities", self.capacities),
+            ("costs", self.costs),
+        ]:
+            if not np.issubdtype(values.dtype, np.integer):
+                raise SolverException(
+                    "{} array must contain integers, not {}".format(
+                        name, values.dtype
+                    )
+                )
+
+    def _eligible_arcs(self):
+        """
+        Computes the reviewer-paper arcs of the graph from the cost and constraint matrices.
+
+        Returns aligned arrays of paper indices, reviewer indices and integer arc costs,
+        ordered reviewer by reviewer.
+        """
+        # cast costs to integers by truncation, as int() would,
+        # because SimpleMinCostFlow only accepts integer costs.
+        arc_costs = np.trunc(self.cost_matrix).astype(np.int64)
+
+        # a constraint of 0 means there's no constraint, so apply the cost as normal
+        # a constraint of 1 means that this user was explicitly assigned to this paper
+        # a constraint of anything other that 0 or 1 essentially indicates a conflict, so do not add an arc
+        unconstrained = self.constraint_matrix == 0
+        if not self.allow_zero_score_assignments:
+            unconstrained &= arc_costs != 0
+        forced = self.constraint_matrix == 1
+
+        if self.candidate_k is not None:
+            candidates = top_k_candidates(
+                -arc_costs, self.candidate_k, eligible=unconstrained
             )
+            self.pruned_pairs = unconstrained & ~candidates
+            unconstrained = candidates
 
-        if any([not isinstance(i, int) for i in self.costs]):
-            raise SolverException(
-                "costs list may not contain integers of type numpy.int64"
+        if forced.any():
+            # TODO: this should be handled as a hard constraint
+            arc_costs[forced] = int(self._least_cost() - 1)
+
+        # transpose so that arcs are grouped by reviewer
+        arc_reviewers, arc_papers = np.nonzero((unconstrained | forced).T)
+        return arc_papers, arc_reviewers, arc_costs[arc_papers, arc_reviewers]
+
+    def _minimum_load_bonus(self, arc_costs):
+        """
+        The negative cost placed on minimum-load arcs. Moving one unit of flow onto a
+        minimum-load arc must outweigh any change in the total cost of the assignment arcs.
+        """
+        total_supply = self.source_node.supply
+        cost_spread = int(np.max(arc_costs, initial=0)) - int(
+            np.min(arc_costs, initial=0)
+        )
+        return total_supply * cost_spread + 1
+
+    def _certify_candidates(self, flows):
+        """
+        Check whether the optimal flow on the pruned graph is also optimal for the full graph.
+
+        Computes the flow duals (node potentials) of the pruned solution. If no pruned pair
+        has a negative reduced cost under these potentials, adding the pruned arcs back
+        cannot create a negative cycle in the residual graph, so the flow stays optimal.
+        """
+        potentials = residual_potentials(
+            self.current_offset,
+            self.start_nodes,
+            self.end_nodes,
+            self.capacities,
+            self.costs,
+            flows,
+        )
+        reviewer_potentials = potentials[
+            [n.number for n in self.reviewer_nodes]
+        ]
+        paper_potentials = potentials[[n.number for n in self.paper_nodes]]
+
+        reduced_costs = (
+            np.trunc(self.cost_matrix)
+            + reviewer_potentials[np.newaxis, :]
+            - paper_potentials[:, np.newaxis]
+        )
+        violations = (
+            self.pruned_pairs
+            & (np.trunc(self.limit_matrix) > 0)
+            & (reduced_costs < 0)
+        )
+        self.logger.debug(
+            "{} pruned pairs could improve the solution".format(
+                np.count_nonzero(violations)
             )
+        )
+        return not violations.any()
 
     def _boundary_cost(self, boundary_function):
         """
@@ -304,13 +455,29 @@ class SimpleSolver:
         Edges are represented virtually by the presence of Node numbers in the aligned arrays
         `self.start_nodes` and `self.end_nodes`; there is no "Edge" object.
         """
-        self.start_nodes.append(start_node)
-        self.end_nodes.append(end_node)
+        self.add_edges(
+            [start_node.number], [end_node.number], [capacity], [cost]
+        )
 
-        # cast `capacity` to Python int because SimpleMinCostFlow can't handle other int types
-        # (e.g. numpy.int64)
-        self.capacities.append(int(capacity))
-        self.costs.append(cost)
+    def add_edges(self, start_numbers, end_numbers, capacities, costs):
+        """
+        Adds a batch of "edges" between the Node numbers in `start_numbers` and `end_numbers`,
+        with the given capacities and costs. All four arguments must have the same length.
+        """
+        # cast `capacities` and `costs` to int64 because SimpleMinCostFlow can't handle
+        # other types (e.g. floats)
+        self.start_nodes = np.concatenate(
+            [self.start_nodes, np.asarray(start_numbers, dtype=np.int64)]
+        )
+        self.end_nodes = np.concatenate(
+            [self.end_nodes, np.asarray(end_numbers, dtype=np.int64)]
+        )
+        self.capacities = np.concatenate(
+            [self.capacities, np.asarray(capacities).astype(np.int64)]
+        )
+        self.costs = np.concatenate(
+            [self.costs, np.asarray(costs).astype(np.int64)]
+        )
 
     def construct_solver(self):
         """
@@ -320,16 +487,52 @@ class SimpleSolver:
 
         self.min_cost_flow = min_cost_flow.SimpleMinCostFlow()
 
-        for arc_index in range(len(self.start_nodes)):
+        if len(self.start_nodes):
             self.min_cost_flow.add_arcs_with_capacity_and_unit_cost(
-                self.start_nodes[arc_index].number,
-                self.end_nodes[arc_index].number,
-                self.capacities[arc_index],
-                self.costs[arc_index],
+                self.start_nodes,
+                self.end_nodes,
+                self.capacities,
+                self.costs,
             )
 
-        for node in self.node_by_number.values():
-            self.min_cost_flow.set_nodes_supplies(node.number, node.supply)
+        nodes = list(self.node_by_number.values())
+        self.min_cost_flow.set_nodes_supplies(
+            np.array([node.number for node in nodes], dtype=np.int64),
+            np.array([node.supply for node in nodes], dtype=np.int64),
+        )
+
+        # map Node numbers to matrix indices (-1 for nodes outside the matrices),
+        # so that solutions can be read out with array indexing.
+        self.reviewer_index_by_number = np.full(
+            self.current_offset, -1, dtype=np.int64
+        )
+        self.paper_index_by_number = np.full(
+            self.current_offset, -1, dtype=np.int64
+        )
+        for n in self.reviewer_nodes:
+            self.reviewer_index_by_number[n.number] = n.index
+        for n in self.paper_nodes:
+            self.paper_index_by_number[n.number] = n.index
+
+    def _minimums_met(self):
+        """
+        Whether the flow found by the OR-Tools MinCostFlow solver meets every
+        reviewer's minimum load (always True without minimums).
+        """
+        if self.minimums is None:
+            return True
+        flows = self.min_cost_flow.flows(
+            np.arange(self.min_cost_flow.num_arcs())
+        )
+        reviewer_indices = self.reviewer_index_by_number[self.start_nodes]
+        paper_indices = self.paper_index_by_number[self.end_nodes]
+        is_assignment_arc = (reviewer_indices >= 0) & (paper_indices >= 0)
+        loads = np.bincount(
+            reviewer_indices[is_assignment_arc],
+            weights=flows[is_assignment_arc],
+            minlength=len(self.minimums),
+        )
+        return bool(np.all(loads >= np.asarray(self.minimums)))
 
     def solve(self):
         """
@@ -342,21 +545,48 @@ class SimpleSolver:
         ), "Solver not constructed. Run self.construct_solver() first."
         self.cost = 0
         solver_status = self.min_cost_flow.solve()
+        # minimum loads are only bonus arcs, so a pruned graph that can not
+        # meet them still solves OPTIMAL
+        while (
+            self.candidate_k is not None
+            and not covers_all_pairs(self.candidate_k, self.cost_matrix.shape)
+            and (
+                solver_status != self.min_cost_flow.OPTIMAL
+                or not self._minimums_met()
+            )
+        ):
+            self.candidate_k *= 2
+            self.logger.debug(
+                "Pruned graph has no solution, growing candidate_k to {}".format(
+                    self.candidate_k
+                )
+            )
+            self.construct_graph()
+            solver_status = self.min_cost_flow.solve()
+
         if solver_status == self.min_cost_flow.OPTIMAL:
             self.solved = True
-            for i in range(self.min_cost_flow.num_arcs()):
-                self.cost += self.min_cost_flow.flow(
-                    i
-                ) * self.min_cost_flow.unit_cost(i)
-                r_node = self.node_by_number[self.min_cost_flow.tail(i)]
-                p_node = self.node_by_number[self.min_cost_flow.head(i)]
-                flow = self.min_cost_flow.flow(i)
-
-                if (
-                    r_node in self.reviewer_nodes
-                    and p_node in self.paper_nodes
-                ):
-                    self.flow_matrix[p_node.index, r_node.index] = flow
+            # arcs are numbered in the order they were added,
+            # so they line up with self.start_nodes and self.end_nodes.
+            flows = self.min_cost_flow.flows(
+                np.arange(self.min_cost_flow.num_arcs())
+            )
+            reviewer_indices = self.reviewer_index_by_number[self.start_nodes]
+            paper_indices = self.paper_index_by_number[self.end_nodes]
+            is_assignment_arc = (reviewer_indices >= 0) & (paper_indices >= 0)
+
+            # only assignment arcs count towards the cost; the other arcs are free,
+            # except for the minimum-load bonus.
+            self.cost = int(
+                np.dot(flows[is_assignment_arc], self.costs[is_assignment_arc])
+            )
+            self.flow_matrix[
+                paper_indices[is_assignment_arc],
+                reviewer_indices[is_assignment_arc],
+            ] = flows[is_assignment_arc]
+
+            if self.candidate_k is not None:
+                self.optimality_certified = self._certify_candidates(flows)
         else:
             logging.debug("Solver status: {}".format(solver_status))
             self.solved = False
@@ -0,0 +1,81 @@
+"""
+Thread budget of a matching job.
+
+Several matching jobs can run on one host (e.g. one per Celery worker), so a
+solver must not size its thread pools by the number of cores of the host. The
+budget is the number of CPUs available to this process, the smaller of its CPU
+affinity and its cgroup CPU quota, times the share of them given to one job
+(environment variable MATCHER_JOB_CPU_SHARE, 1 by default). The environment
+variable MATCHER_THREADS sets the budget directly.
+
+LP solver models (Gurobi or HiGHS) take their thread count from the budget, and
+BLAS calls made while solving are limited to it with threadpoolctl.
+"""
+
+import math
+import os
+from contextlib import contextmanager
+from threadpoolctl import threadpool_limits
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_quota(root=CGROUP_ROOT):
+    """
+    Return the CPU quota of the cgroup of this process as a (fractional) number
+    of CPUs, or None if it is not limited.
+    """
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    fields = _read(os.path.join(root, "cpu.max"))
+    if fields is None:
+        # cgroup v1: quota is -1 if not limited
+        quota = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us"))
+        period = _read(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+        if quota is None or period is None:
+            return None
+        fields = quota + period
+
+    if len(fields) < 2 or fields[0] in ("max", "-1"):
+        return None
+    return int(fields[0]) / int(fields[1])
+
+
+def available_cpus(root=CGROUP_ROOT):
+    """Number of CPUs this process can run on, given its affinity and cgroup quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = cgroup_cpu_quota(root)
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def thread_budget():
+    """Number of threads a solver of this job may use."""
+    if os.environ.get("MATCHER_THREADS"):
+        return max(1, int(os.environ["MATCHER_THREADS"]))
+    share = float(os.environ.get("MATCHER_JOB_CPU_SHARE", 1.0))
+    return max(1, int(available_cpus() * share))
+
+
+@contextmanager
+def limit_blas_threads(num_threads=None):
+    """
+    Limit the threads of the BLAS libraries used by NumPy and SciPy to
+    `num_threads` (the thread budget by default) inside the context.
+    """
+    with threadpool_limits(
+        limits=num_threads or thread_budget(), user_api="blas"
+    ):
+        yield
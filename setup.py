@@ -33,10 +33,12 @@ setup(
         "gurobipy",
         "kombu>=5.3.0,<6.0",
         "psutil",
-        "scipy"
+        "scipy",
+        "threadpoolctl>=3",
     ],
     extras_require={
         "full": ["flower"],
+        "highs": ["highspy>=1.7"],
     },
     zip_safe=False,
 )
@@ -501,6 +501,59 @@ def test_specific_alternates(encoder_context):
     assert alternates == alternates_by_forum
 
 
+def test_encoder_alternates_ties(encoder_context):
+    """Ties at the last alternate's score are broken by reviewer index."""
+    papers, reviewers, matrix_shape = encoder_context(n_reviewers=6)
+
+    scores = np.array(
+        [
+            [0.5, 0.9, 0.5, 0.5, 0.2, 0.5],
+            [0.3, 0.3, 0.3, 0.3, 0.3, 0.3],
+            [0.1, 0.4, 0.4, 0.4, 0.4, 0.7],
+        ]
+    )
+    scores_by_type = {
+        "mock/-/score_edge": {
+            "edges": [
+                (papers[i], reviewers[j], scores[i, j])
+                for i, j in itertools.product(range(3), range(6))
+            ]
+        }
+    }
+
+    weight_by_type = {"mock/-/score_edge": 1}
+
+    constraints = []
+
+    encoder = Encoder(
+        reviewers, papers, constraints, scores_by_type, weight_by_type
+    )
+
+    mock_solution = np.zeros(matrix_shape)
+    mock_solution[0, 0] = 1
+    mock_solution[1, 1] = 1
+    mock_solution[2, 5] = 1
+
+    expected = {
+        "paper0": [(0.9, 1), (0.5, 2), (0.5, 3)],
+        "paper1": [(0.3, 0), (0.3, 2), (0.3, 3)],
+        "paper2": [(0.4, 1), (0.4, 2), (0.4, 3)],
+    }
+
+    # one block for all papers, and one block per paper
+    for cells_per_block in [10**7, 6]:
+        alternates_by_forum = encoder.decode_alternates(
+            mock_solution, 3, cells_per_block=cells_per_block
+        )
+        assert alternates_by_forum == {
+            forum: [
+                {"aggregate_score": score, "user": reviewers[j]}
+                for score, j in alternates
+            ]
+            for forum, alternates in expected.items()
+        }
+
+
 def test_encoder_no_reviewers(encoder_context):
     papers, reviewers, matrix_shape = encoder_context(n_reviewers=0)
 
@@ -547,3 +600,43 @@ def test_encoder_no_papers(encoder_context):
         )
 
     assert "Papers List can not be empty." == str(exc.value)
+
+
+def test_encoder_sparse_storage(encoder_context):
+    """Scores and constraints are stored as a default plus the differing cells."""
+    papers, reviewers, matrix_shape = encoder_context()
+
+    scores_by_type = {
+        "mock/-/score_edge": {
+            "default": 0.1,
+            "edges": [
+                (papers[0], reviewers[0], 0.5),
+                (papers[1], reviewers[2], 0.3),
+                (papers[1], reviewers[2], 0.9),
+                (papers[2], reviewers[3], 0.1),
+            ],
+        }
+    }
+
+    weight_by_type = {"mock/-/score_edge": 1}
+
+    constraints = [(papers[2], reviewers[1], -1)]
+
+    encoder = Encoder(
+        reviewers, papers, constraints, scores_by_type, weight_by_type
+    )
+
+    scores = encoder.score_matrices["mock/-/score_edge"]
+    assert scores.default == 0.1
+    # the repeated edge keeps its last value, the edge equal to the default is dropped
+    assert scores.offsets.nnz == 2
+
+    desired_scores = np.full(matrix_shape, 0.1)
+    desired_scores[0, 0] = 0.5
+    desired_scores[1, 2] = 0.9
+    assert np.allclose(encoder.aggregate_score_matrix, desired_scores)
+    assert np.allclose(encoder.cost_matrix, -100 * desired_scores)
+
+    assert encoder.sparse_constraint_matrix.offsets.nnz == 1
+    assert encoder.constraint_matrix[2, 1] == -1
+    assert np.count_nonzero(encoder.constraint_matrix) == 1
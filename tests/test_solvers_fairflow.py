@@ -626,3 +626,154 @@ def test_solver_fairflow_avoid_zero_scores_get_no_solution():
         SolverException, match=r".*Solver could not find a solution.*"
     ):
         res = solver.solve()
+
+
+def test_solver_fairflow_candidate_pruning():
+    """
+    Tests 20 papers, 15 reviewers with random affinities.
+    Reviewers review min: 1, max: 4 papers.
+    Each paper needs 2 reviews.
+    Purpose: Assert that pruning to top-1 candidate pairs (which is too small
+    to be feasible) grows k and still matches all demands and limits.
+    """
+    rng = np.random.default_rng(0)
+    aggregate_score_matrix = rng.random((20, 15))
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix))
+    constraint_matrix[rng.random(np.shape(aggregate_score_matrix)) < 0.1] = -1
+    demands = [2] * 20
+    solver = FairFlow(
+        [1] * 15,
+        [4] * 15,
+        demands,
+        encoder(aggregate_score_matrix, constraint_matrix),
+        candidate_k=1,
+    )
+    res = solver.solve()
+    assert solver.solved
+    assert solver.candidate_k > 1
+    assert_arrays(np.sum(res, axis=1), demands)
+    assert np.all(np.sum(res, axis=0) <= 4)
+    assert np.all(np.sum(res, axis=0) >= 1)
+    assert np.all(res[constraint_matrix == -1] == 0)
+
+
+def test_solver_fairflow_reuses_assignment_network():
+    """
+    Tests 12 papers, 10 reviewers with random affinities and conflicts.
+    Purpose: Assert that the assignment network is built once, has no arcs for
+    conflicted pairs, and is reused across the makespan search.
+    """
+    rng = np.random.default_rng(1)
+    aggregate_score_matrix = rng.random((12, 10))
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix))
+    constraint_matrix[rng.random(np.shape(aggregate_score_matrix)) < 0.2] = -1
+    demands = [2] * 12
+    solver = FairFlow(
+        [0] * 10,
+        [3] * 10,
+        demands,
+        encoder(aggregate_score_matrix, constraint_matrix),
+    )
+    builds = []
+    build = solver._build_assignment_network
+    solver._build_assignment_network = lambda: builds.append(1) or build()
+    res = solver.solve()
+    assert solver.solved
+    assert len(builds) == 1
+    assert (
+        solver.assignment_mcf.num_arcs()
+        == 10 + np.sum(constraint_matrix == 0) + 12
+    )
+    assert_arrays(np.sum(res, axis=1), demands)
+    assert np.all(res[constraint_matrix == -1] == 0)
+
+
+def test_solver_fairflow_paper_groups():
+    """
+    Tests 3 papers, 3 reviewers with a fixed assignment.
+    Purpose: Assert that papers are grouped by their score relative to the
+    makespan and that the worst assigned reviewer of each paper is found.
+    """
+    aggregate_score_matrix = np.array(
+        [[0.9, 0.8, 0.1], [0.5, 0.1, 0.2], [0.1, 0.2, 0.3]]
+    )
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix))
+    solver = FairFlow(
+        [0, 0, 0],
+        [2, 2, 2],
+        [2, 2, 2],
+        encoder(aggregate_score_matrix, constraint_matrix),
+    )
+    solver.solution = np.array(
+        [[1.0, 1.0, 0.0], [1.0, 0.0, 1.0], [0.0, 1.0, 1.0]]
+    )
+    # paper scores are 1.7, 0.7 and 0.5, the max affinity is 0.9
+    solver.makespan = 1.5
+    g1, g2, g3 = solver._grp_paps_by_ms()
+    assert g1.tolist() == [0]
+    assert g2.tolist() == [1]
+    assert g3.tolist() == [2]
+
+    worst_revs, papers = solver._worst_reviewer(np.array([0, 1, 2]))
+    assert worst_revs.tolist() == [1, 2, 1]
+    assert papers.tolist() == [0, 1, 2]
+
+
+def test_solver_fairflow_makespan_search_stops_early():
+    """
+    Tests 15 papers, 10 reviewers with affinities on a 0.1 grid.
+    Purpose: Assert that the makespan search stops once no paper score level
+    is left in its bracket, that a bracket around the makespan found
+    needs fewer probes for the same makespan, and that a low upper guess
+    does not cap the search.
+    """
+    rng = np.random.default_rng(2)
+    aggregate_score_matrix = np.round(rng.random((15, 10)), 1)
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix))
+    demands = [2] * 15
+
+    def probes(solver):
+        makespans = []
+        try_improve_ms = solver.try_improve_ms
+        solver.try_improve_ms = (
+            lambda: makespans.append(solver.makespan) or try_improve_ms()
+        )
+        return makespans
+
+    solver = FairFlow(
+        [0] * 10,
+        [3] * 10,
+        demands,
+        encoder(aggregate_score_matrix, constraint_matrix),
+    )
+    makespans = probes(solver)
+    ms = solver.find_ms()
+    num_probes = len(set(makespans))
+    assert ms > 0
+    assert num_probes < 10, num_probes
+
+    solver = FairFlow(
+        [0] * 10,
+        [3] * 10,
+        demands,
+        encoder(aggregate_score_matrix, constraint_matrix),
+        makespan_bracket=(ms, ms + 0.1),
+    )
+    makespans = probes(solver)
+    res = solver.solve()
+    assert len(set(makespans)) < num_probes
+    assert solver.makespan == ms
+    assert_arrays(np.sum(res, axis=1), demands)
+
+    # a successful upper guess does not cap the search: it ends in the same
+    # paper score level (0.1 apart) as the search without guesses
+    solver = FairFlow(
+        [0] * 10,
+        [3] * 10,
+        demands,
+        encoder(aggregate_score_matrix, constraint_matrix),
+        makespan_bracket=(None, ms / 2),
+    )
+    found = solver.find_ms(*solver.makespan_bracket)
+    assert found > ms / 2
+    assert np.ceil(found / 0.1 - 1e-9) == np.ceil(ms / 0.1 - 1e-9)
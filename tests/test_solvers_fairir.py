@@ -1,4 +1,5 @@
 from collections import namedtuple
+import time
 import pytest
 from matcher.core import SolverException
 import numpy as np
@@ -330,4 +331,232 @@ def test_solvers_fairir_custom_demands_paper_with_0_demand():
     res_A = solver_A.solve()
     assert res_A.shape == (3, 4)
     result = [assignments for assignments in np.sum(res_A, axis=1)]
-    assert_arrays(result, demands)
\ No newline at end of file
+    assert_arrays(result, demands)
+
+
+def test_solvers_fairir_lazy_constraints():
+    '''Test that lazily added attribute and makespan constraints give the same assignment as adding them upfront'''
+    aggregate_score_matrix_A = np.transpose(np.array([
+        [0.5, 0, 0],
+        [0, 0.5, 0],
+        [0, 0, 0.5],
+        [0.1, 0.1, 0.1]
+    ]))
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix_A))
+    attr_constraints = [{
+        'name': 'Seniority',
+        'comparator': '>=',
+        'bound': 1,
+        'members': [3]
+    }]
+    solver_A = FairIR(
+        [0,0,0,0],
+        [2,2,2,3],
+        [2,2,2],
+        encoder(aggregate_score_matrix_A, constraint_matrix, attr_constraints),
+        lazy_constraints=True
+    )
+    # only the 4 + 4 load and 3 coverage constraints are added upfront
+    assert solver_A.m.num_constraints() == 11
+    res_A = solver_A.solve()
+    print(res_A)
+    for paper_idx in range(3):
+        assert res_A[paper_idx][3] == 1
+
+    assert res_A[0][0] == 1
+    assert res_A[1][1] == 1
+    assert res_A[2][2] == 1
+    assert res_A.shape == (3,4)
+
+
+def test_solvers_fairir_find_ms():
+    '''Test that the makespan search finds the best makespan, also from a supplied bracket'''
+    aggregate_score_matrix_A = np.transpose(np.array([
+        [0.5, 0, 0],
+        [0, 0.5, 0],
+        [0, 0, 0.5],
+        [0.1, 0.1, 0.1]
+    ]))
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix_A))
+    solver_A = FairIR(
+        [0,0,0,0],
+        [2,2,2,3],
+        [2,2,2],
+        encoder(aggregate_score_matrix_A, constraint_matrix, None)
+    )
+    # each paper can get its 0.5 reviewer and reviewer[3]
+    assert solver_A.makespan_upper_bound() == pytest.approx(0.6)
+    # without a bracket, the search bisects up to the upper bound
+    assert solver_A.find_ms() == pytest.approx(0.6, rel=solver_A.makespan_tol)
+
+    # the search ends even with no tolerance
+    solver_C = FairIR(
+        [0,0,0,0],
+        [2,2,2,3],
+        [2,2,2],
+        encoder(aggregate_score_matrix_A, constraint_matrix, None),
+        makespan_tol=0
+    )
+    assert solver_C.find_ms() == pytest.approx(0.6)
+
+    solver_B = FairIR(
+        [0,0,0,0],
+        [2,2,2,3],
+        [2,2,2],
+        encoder(aggregate_score_matrix_A, constraint_matrix, None),
+        makespan_tol=0.01,
+        makespan_bracket=(0.2, 0.4)
+    )
+    # a feasible upper guess does not cap the search
+    assert solver_B.find_ms(*solver_B.makespan_bracket) == pytest.approx(0.6)
+    res_B = solver_B.solve()
+    assert res_B.shape == (3,4)
+
+
+def test_solvers_fairir_time_limit():
+    '''Test that a solve out of time rounds with a MIP, returns a valid assignment and the makespan it achieves'''
+    aggregate_score_matrix_A = np.transpose(np.array([
+        [0.5, 0, 0],
+        [0, 0.5, 0],
+        [0, 0, 0.5],
+        [0.1, 0.1, 0.1]
+    ]))
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix_A))
+    solver_A = FairIR(
+        [0,0,0,0],
+        [2,2,2,3],
+        [2,2,2],
+        encoder(aggregate_score_matrix_A, constraint_matrix, None),
+        time_limit=60
+    )
+    # iterative rounding never finishes, so the remaining variables are rounded by the MIP
+    solver_A.round_fractional = lambda integral_assignments, count=0: False
+    res_A = solver_A.solve()
+    print(res_A)
+    assert res_A.shape == (3,4)
+    assert_arrays(np.sum(res_A, axis=1), [2,2,2])
+    assert np.all(np.sum(res_A, axis=0) <= [2,2,2,3])
+    assert solver_A.makespan_achieved == pytest.approx(np.min(np.sum(res_A * aggregate_score_matrix_A, axis=1)))
+
+    # no solve runs past the deadline, even when no assignment is found
+    solver_B = FairIR(
+        [0,0,0,0],
+        [2,2,2,3],
+        [2,2,2],
+        encoder(aggregate_score_matrix_A, constraint_matrix, None),
+        time_limit=1e-6
+    )
+    with pytest.raises(SolverException):
+        solver_B.solve()
+
+
+def test_solvers_fairir_time_limit_slow_search():
+    '''Test that a makespan search LP that runs to its time limit leaves the MIP time to return an assignment'''
+    aggregate_score_matrix_A = np.transpose(np.array([
+        [0.5, 0, 0],
+        [0, 0.5, 0],
+        [0, 0, 0.5],
+        [0.1, 0.1, 0.1]
+    ]))
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix_A))
+    solver_A = FairIR(
+        [0,0,0,0],
+        [2,2,2,3],
+        [2,2,2],
+        encoder(aggregate_score_matrix_A, constraint_matrix, None),
+        time_limit=2
+    )
+    # the first search LP takes all the time it is given and is cut off
+    search_limits = []
+    optimize = solver_A.m.optimize
+    def slow_optimize(time_limit=None, **kwargs):
+        if not search_limits:
+            search_limits.append(time_limit)
+            time.sleep(time_limit)
+            time_limit = 0.0
+        optimize(time_limit=time_limit, **kwargs)
+    solver_A.m.optimize = slow_optimize
+    solver_A.round_fractional = lambda integral_assignments, count=0: False
+    res_A = solver_A.solve()
+    assert search_limits[0] <= 1.0
+    assert res_A.shape == (3,4)
+    assert_arrays(np.sum(res_A, axis=1), [2,2,2])
+    assert np.all(np.sum(res_A, axis=0) <= [2,2,2,3])
+
+
+def test_solvers_fairir_highs_backend():
+    '''Test that the HiGHS backend finds the same assignment as Gurobi'''
+    pytest.importorskip('highspy')
+    aggregate_score_matrix_A = np.transpose(np.array([
+        [0.5, 0, 0],
+        [0, 0.5, 0],
+        [0, 0, 0.5],
+        [0.1, 0.1, 0.1]
+    ]))
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix_A))
+    attr_constraints = [{
+        'name': 'Seniority',
+        'comparator': '>=',
+        'bound': 1,
+        'members': [3]
+    }]
+    results = []
+    for lp_backend in ['gurobi', 'highs']:
+        solver_A = FairIR(
+            [0,0,0,0],
+            [2,2,2,3],
+            [2,2,2],
+            encoder(aggregate_score_matrix_A, constraint_matrix, attr_constraints),
+            lp_backend=lp_backend
+        )
+        results.append(solver_A.solve())
+    assert_arrays(results[0].flatten(), results[1].flatten())
+
+
+def test_solvers_fairir_highs_backend_random():
+    '''Test that the HiGHS backend finds assignments as good as Gurobi's on random instances'''
+    pytest.importorskip('highspy')
+    for seed in range(40):
+        rng = np.random.default_rng(seed)
+        num_papers, num_reviewers = rng.integers(5, 20, size=2)
+        aggregate_score_matrix_A = rng.random((num_papers, num_reviewers))
+        constraint_matrix = np.zeros(np.shape(aggregate_score_matrix_A))
+        constraint_matrix[rng.random(np.shape(aggregate_score_matrix_A)) < 0.05] = -1
+        demands = [3] * num_papers
+        maximums = [int(np.ceil(sum(demands) / num_reviewers)) + 1] * num_reviewers
+        results = []
+        for lp_backend in ['gurobi', 'highs']:
+            solver_A = FairIR(
+                [0] * num_reviewers,
+                list(maximums),
+                demands,
+                encoder(aggregate_score_matrix_A, constraint_matrix, None),
+                lp_backend=lp_backend
+            )
+            try:
+                res_A = solver_A.solve()
+            except Exception:
+                results.append(None)
+                continue
+            results.append((np.sum(res_A * aggregate_score_matrix_A), solver_A.makespan_achieved))
+        # both backends fail on the same (infeasible) instances
+        assert (results[0] is None) == (results[1] is None)
+        if results[0] is not None:
+            assert results[1] == pytest.approx(results[0])
+
+
+def test_solvers_fairir_unknown_backend():
+    '''Test that an unknown LP backend is rejected'''
+    aggregate_score_matrix_A = np.transpose(np.array([
+        [0.5, 0, 0],
+        [0, 0.5, 0]
+    ]))
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix_A))
+    with pytest.raises(SolverException):
+        FairIR(
+            [0,0],
+            [2,2],
+            [1,1,1],
+            encoder(aggregate_score_matrix_A, constraint_matrix, None),
+            lp_backend='cplex'
+        )
@@ -917,3 +917,145 @@ def test_solvers_fairsequence_make_trades_2():
         ]
     )
     assert np.all(res_A == expected_solution)
+
+
+def test_solvers_fairsequence_wef1_check():
+    """
+    Tests 6 papers, 8 reviewers with random affinities and random partial allocations.
+    Purpose: Assert that the vectorized WEF1 check agrees with checking each paper
+    that may envy the new bundle one by one.
+    """
+    rng = np.random.default_rng(0)
+    aggregate_score_matrix = np.round(rng.random((6, 8)), 1)
+    demands = [1, 2, 3, 2, 3, 1]
+    solver = FairSequence(
+        [0] * 8,
+        [3] * 8,
+        demands,
+        encoder(
+            aggregate_score_matrix, np.zeros(np.shape(aggregate_score_matrix))
+        ),
+    )
+    affinity = solver.affinity_matrix
+
+    def is_valid(r, p, dict_alloc):
+        bundle = dict_alloc[p] + [r]
+        for p_prime in range(6):
+            own = affinity[dict_alloc[p_prime], p_prime]
+            # only papers that value a reviewer of the bundle above their worst own reviewer
+            if len(own) == 0 or np.max(affinity[bundle, p_prime]) <= np.min(
+                own
+            ):
+                continue
+            other = (
+                np.sum(affinity[bundle, p_prime])
+                - np.max(affinity[bundle, p_prime])
+            ) / demands[p]
+            if other > np.sum(own) / demands[p_prime] + 1e-9:
+                return False
+        return True
+
+    num_invalid = 0
+    for _ in range(100):
+        dict_alloc = {
+            p: rng.choice(
+                8, rng.integers(0, demands[p] + 1), replace=False
+            ).tolist()
+            for p in range(6)
+        }
+        previous_attained_scores = np.array(
+            [
+                np.min(affinity[dict_alloc[p], p], initial=1000)
+                for p in range(6)
+            ]
+        )
+        attained_values = np.array(
+            [np.sum(affinity[dict_alloc[p], p]) for p in range(6)]
+        )
+        p = rng.integers(0, 6)
+        r = rng.choice([r for r in range(8) if r not in dict_alloc[p]])
+        valid = is_valid(r, p, dict_alloc)
+        num_invalid += not valid
+        assert (
+            solver._is_valid_assignment(
+                r, p, dict_alloc, previous_attained_scores, attained_values
+            )
+            == valid
+        )
+    assert num_invalid > 0
+
+
+def test_solvers_fairsequence_select_next_paper():
+    """
+    Tests 7 papers, 6 reviewers with random affinities, without the WEF1 check.
+    Purpose: Assert that selecting papers from the heap picks, at every step, the paper
+    of lowest priority with the best remaining reviewer (ties to the lowest paper id).
+    """
+    rng = np.random.default_rng(1)
+    aggregate_score_matrix = np.round(rng.random((7, 6)), 1)
+    constraint_matrix = np.zeros(np.shape(aggregate_score_matrix))
+    constraint_matrix[rng.random(np.shape(aggregate_score_matrix)) < 0.1] = -1
+    demands = [2, 1, 3, 2, 2, 1, 3]
+    solver = FairSequence(
+        [0] * 6,
+        [3] * 6,
+        demands,
+        encoder(aggregate_score_matrix, constraint_matrix),
+    )
+    solver.safe_mode = False
+    affinity = solver.affinity_matrix
+
+    matrix_alloc = np.zeros(affinity.shape, dtype=bool)
+    dict_alloc = {p: list() for p in range(7)}
+    maximums = np.array(solver.maximums)
+    cursors = np.zeros(7, dtype=int)
+    heap_versions = np.zeros(7, dtype=int)
+    paper_priorities = np.zeros(7)
+    paper_heap = [(0.0, -solver.max_affinity, p, 0) for p in range(7)]
+
+    while True:
+        eligible = (
+            ~matrix_alloc
+            & (maximums[:, np.newaxis] > 0)
+            & (solver.constraint_matrix == 0)
+            & (affinity > 0)
+        )
+        candidates = [
+            (paper_priorities[p], -np.max(affinity[eligible[:, p], p]), p)
+            for p in range(7)
+            if np.any(eligible[:, p])
+        ]
+        next_paper, next_rev = solver._select_next_paper(
+            matrix_alloc,
+            dict_alloc,
+            cursors,
+            paper_heap,
+            heap_versions,
+            maximums,
+            np.ones(7) * 1000,
+            np.zeros(7),
+            paper_priorities,
+        )
+        if not candidates:
+            assert next_paper is None
+            break
+        _, neg_best, p = min(candidates)
+        assert next_paper == p
+        assert affinity[next_rev, next_paper] == -neg_best
+
+        matrix_alloc[next_rev, next_paper] = 1
+        dict_alloc[next_paper].append(next_rev)
+        maximums[next_rev] -= 1
+        paper_priorities[next_paper] = (
+            len(dict_alloc[next_paper]) / demands[next_paper]
+        )
+        solver._push_paper(
+            next_paper,
+            paper_heap,
+            heap_versions,
+            paper_priorities,
+            solver._advance_cursor(
+                next_paper, matrix_alloc, cursors, maximums
+            ),
+        )
+    assert np.sum(matrix_alloc) > 7
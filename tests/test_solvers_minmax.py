@@ -544,3 +544,163 @@ def test_solver_minmax_avoid_zero_scores_get_no_solution():
 
     res = solver.solve()
     assert solver.solved is False
+
+
+def test_solver_minmax_candidate_pruning():
+    """
+    Tests 40 papers, 30 reviewers with random costs.
+    Reviewers review min: 1, max: 4 papers.
+    Each paper needs 2 reviews.
+    Purpose: Assert that pruning to top-k candidate pairs finds a certified
+    solution with the same cost as the unpruned solver.
+    """
+    rng = np.random.default_rng(0)
+    cost_matrix = -np.round(rng.random((40, 30)) * 100)
+    constraint_matrix = np.zeros(np.shape(cost_matrix))
+    constraint_matrix[rng.random(np.shape(cost_matrix)) < 0.1] = -1
+
+    full_solver = MinMaxSolver(
+        [1] * 30,
+        [4] * 30,
+        [2] * 40,
+        encoder(cost_matrix, constraint_matrix),
+    )
+    full_solver.solve()
+    assert full_solver.optimality_certified is None
+
+    pruned_solver = MinMaxSolver(
+        [1] * 30,
+        [4] * 30,
+        [2] * 40,
+        encoder(cost_matrix, constraint_matrix),
+        candidate_k=4,
+    )
+    res = pruned_solver.solve()
+    assert pruned_solver.solved
+    assert res.shape == (40, 30)
+    assert np.all(np.sum(res, axis=1) == 2)
+    assert np.all(res[constraint_matrix == -1] == 0)
+    assert pruned_solver.optimality_certified
+    assert pruned_solver.cost == full_solver.cost
+
+
+def test_solver_minmax_single_pass():
+    """
+    Tests 40 papers, 30 reviewers with random costs.
+    Reviewers review min: 1, max: 4 papers.
+    Each paper needs 2 reviews.
+    Purpose: Assert that the single-pass formulation respects all loads and
+    demands, and finds a solution no worse than the two-pass solver.
+    """
+    rng = np.random.default_rng(0)
+    cost_matrix = -np.round(rng.random((40, 30)) * 100)
+    constraint_matrix = np.zeros(np.shape(cost_matrix))
+    constraint_matrix[rng.random(np.shape(cost_matrix)) < 0.1] = -1
+
+    two_pass_solver = MinMaxSolver(
+        [1] * 30,
+        [4] * 30,
+        [2] * 40,
+        encoder(cost_matrix, constraint_matrix),
+    )
+    two_pass_solver.solve()
+
+    single_pass_solver = MinMaxSolver(
+        [1] * 30,
+        [4] * 30,
+        [2] * 40,
+        encoder(cost_matrix, constraint_matrix),
+        single_pass=True,
+    )
+    res = single_pass_solver.solve()
+    assert single_pass_solver.solved
+    assert np.all(np.sum(res, axis=1) == 2)
+    assert np.all(np.sum(res, axis=0) >= 1)
+    assert np.all(np.sum(res, axis=0) <= 4)
+    assert np.all(res[constraint_matrix == -1] == 0)
+    check_solution(single_pass_solver, single_pass_solver.optimal_cost)
+    assert single_pass_solver.cost <= two_pass_solver.cost
+
+
+def test_solver_minmax_single_pass_unmet_minimum():
+    """
+    Tests 3 papers, 4 reviewers.
+    Reviewers review min: 2, max: 3 papers.
+    Reviewer 4 has a conflict with two of the papers.
+    Purpose: Assert that the single-pass formulation reports no solution
+    when a minimum load can not be met, like the two-pass solver.
+    """
+    cost_matrix = np.transpose(
+        np.array(
+            [
+                [-1, -2, -3],
+                [-4, -5, -6],
+                [-7, -8, -9],
+                [-1, -1, -1],
+            ]
+        )
+    )
+    constraint_matrix = np.transpose(
+        np.array([[0, 0, 0], [0, 0, 0], [0, 0, 0], [-1, -1, 0]])
+    )
+    solver = MinMaxSolver(
+        [2, 2, 2, 2],
+        [3, 3, 3, 3],
+        [3, 3, 3],
+        encoder(cost_matrix, constraint_matrix),
+        single_pass=True,
+    )
+    solver.solve()
+    assert solver.solved is False
+
+
+def test_solver_minmax_single_pass_pruned_minimum():
+    """
+    Tests 6 papers, 6 reviewers.
+    Reviewers review min: 0, max: 3 papers; reviewer 5 reviews at least 3.
+    Each paper needs 1 review.
+    Reviewer 5 is every paper's worst match, so top-1 pruning keeps only
+    one of its pairs.
+    Purpose: Assert that the single-pass formulation grows candidate_k until
+    the pruned graph can meet the minimum load, like the unpruned solver.
+    """
+    cost_matrix = np.transpose(
+        np.array(
+            [
+                [-9, -8, -7, -6, -5, -4],
+                [-8, -9, -7, -6, -5, -4],
+                [-7, -8, -9, -6, -5, -4],
+                [-6, -7, -8, -9, -5, -4],
+                [-5, -6, -7, -8, -9, -4],
+                [-1, -1, -1, -1, -1, -2],
+            ]
+        )
+    )
+    constraint_matrix = np.zeros(np.shape(cost_matrix))
+    minimums = [0, 0, 0, 0, 0, 3]
+    maximums = [3] * 6
+    demands = [1] * 6
+
+    full_solver = MinMaxSolver(
+        minimums,
+        maximums,
+        demands,
+        encoder(cost_matrix, constraint_matrix),
+        single_pass=True,
+    )
+    full_solver.solve()
+
+    pruned_solver = MinMaxSolver(
+        minimums,
+        maximums,
+        demands,
+        encoder(cost_matrix, constraint_matrix),
+        single_pass=True,
+        candidate_k=1,
+    )
+    res = pruned_solver.solve()
+    assert full_solver.solved
+    assert pruned_solver.solved
+    assert np.all(np.sum(res, axis=1) == 1)
+    assert np.sum(res, axis=0)[5] >= 3
+    assert pruned_solver.cost == full_solver.cost
@@ -308,6 +308,33 @@ def test_solution_optimal_no_limit():
     )
 
 
+def test_highs_backend():
+    """Test that the HiGHS backend finds the same optimal solution as Gurobi"""
+    pytest.importorskip("highspy")
+    S = np.transpose(
+        np.array([[0.1, 0.4, 0.7], [0.3, 0.6, 0.5], [0.5, 0.8, 0.5]])
+    )
+    M = np.zeros(np.shape(S))
+    Q = np.full(np.shape(S), 0.75)
+
+    solutions = []
+    for lp_backend in ["gurobi", "highs"]:
+        solver = PerturbedMaximizationSolver(
+            [0, 0, 0],
+            [2, 2, 2],
+            [2, 2, 2],
+            encoder(-S, M, Q, 0.5),
+            lp_backend=lp_backend,
+        )
+        solver.solve()
+        assert solver.solved
+        solver.sample_assignment()
+        check_sampled_solution(solver)
+        solutions.append(solver.fractional_assignment_matrix)
+
+    assert np.allclose(solutions[0], solutions[1], atol=1e-4)
+
+
 def test_constraints():
     """Ensure constraint matrix is respected"""
     S = np.transpose(
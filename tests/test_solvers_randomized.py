@@ -2,6 +2,10 @@ import pytest
 from collections import namedtuple
 import numpy as np
 from matcher.solvers import SolverException, RandomizedSolver
+from matcher.solvers.bvn_extension import (
+    sample_sparse_assignment,
+    sample_sparse_assignments,
+)
 
 cost_scale = 1000
 
@@ -405,3 +409,52 @@ def test_identical_costs():
     )
     for _ in range(1000):
         check_test_solution(solver, T=1)
+
+
+def test_sparse_sampling():
+    """Sampling from the nonzero cells only preserves the marginals"""
+    one = 1000
+    paper_indices = np.array([0, 0, 1, 1, 2, 2])
+    reviewer_indices = np.array([0, 1, 1, 2, 2, 0])
+    flows = np.array([500, 500, 500, 500, 500, 500])
+
+    T = 1000
+    counts = np.zeros(len(flows))
+    for _ in range(T):
+        sampled_papers, sampled_reviewers = sample_sparse_assignment(
+            paper_indices, reviewer_indices, flows, 3, 1000, one
+        )
+        # every paper gets exactly one of its two reviewers
+        assert np.array_equal(np.sort(sampled_papers), [0, 1, 2])
+        for p, r in zip(sampled_papers, sampled_reviewers):
+            counts[(paper_indices == p) & (reviewer_indices == r)] += 1
+
+    assert np.allclose(counts / T, flows / one, atol=0.1)
+
+
+def test_batch_sampling_seeds():
+    """Batched samples are reproducible from their seeds, with or without threads"""
+    one = 1000
+    paper_indices = np.array([0, 0, 1, 1, 2, 2])
+    reviewer_indices = np.array([0, 1, 1, 2, 2, 0])
+    flows = np.array([300, 700, 300, 700, 300, 700])
+
+    samples = sample_sparse_assignments(
+        paper_indices, reviewer_indices, flows, 3, 3, one, 200, seeds=1
+    )
+    threaded_samples = sample_sparse_assignments(
+        paper_indices,
+        reviewer_indices,
+        flows,
+        3,
+        3,
+        one,
+        200,
+        seeds=1,
+        num_threads=4,
+    )
+
+    assert samples.shape == (200, len(flows))
+    assert np.array_equal(samples, threaded_samples)
+    assert np.all(samples.sum(axis=1) == 3)
+    assert np.allclose(samples.mean(axis=0), flows / one, atol=0.15)
@@ -0,0 +1,64 @@
+import numpy as np  # loads the BLAS library that threadpoolctl limits
+from threadpoolctl import threadpool_info
+from matcher.solvers.threads import (
+    available_cpus,
+    cgroup_cpu_quota,
+    limit_blas_threads,
+    thread_budget,
+)
+
+
+def test_cgroup_cpu_quota_v2(tmp_path):
+    """cgroup v2 quotas are read from cpu.max"""
+    (tmp_path / "cpu.max").write_text("250000 100000\n")
+    assert cgroup_cpu_quota(str(tmp_path)) == 2.5
+    assert available_cpus(str(tmp_path)) <= 3
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cgroup_cpu_quota(str(tmp_path)) is None
+
+
+def test_cgroup_cpu_quota_v1(tmp_path):
+    """cgroup v1 quotas are read from cpu.cfs_quota_us and cpu.cfs_period_us"""
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("50000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert cgroup_cpu_quota(str(tmp_path)) == 0.5
+    assert available_cpus(str(tmp_path)) == 1
+
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert cgroup_cpu_quota(str(tmp_path)) is None
+    assert cgroup_cpu_quota(str(tmp_path / "missing")) is None
+
+
+def test_thread_budget(monkeypatch):
+    """The budget is a share of the available CPUs, or set directly"""
+    monkeypatch.delenv("MATCHER_THREADS", raising=False)
+    monkeypatch.delenv("MATCHER_JOB_CPU_SHARE", raising=False)
+    assert thread_budget() == available_cpus()
+
+    monkeypatch.setenv("MATCHER_JOB_CPU_SHARE", "0.000001")
+    assert thread_budget() == 1
+
+    monkeypatch.setenv("MATCHER_THREADS", "3")
+    assert thread_budget() == 3
+
+
+def test_limit_blas_threads(monkeypatch):
+    """BLAS libraries use the thread budget inside the context"""
+    monkeypatch.setenv("MATCHER_THREADS", "2")
+
+    def blas_threads():
+        return [
+            info["num_threads"]
+            for info in threadpool_info()
+            if info["user_api"] == "blas"
+        ]
+
+    before = blas_threads()
+    assert before
+    with limit_blas_threads():
+        assert blas_threads() == [2] * len(before)
+    with limit_blas_threads(1):
+        assert blas_threads() == [1] * len(before)
+    assert blas_threads() == before